@@ -0,0 +1,175 @@
+"""
+Este archivo contiene el almacén local de velas OHLC:
+
+- Velas cerradas persistidas en SQLite por (símbolo, intervalo)
+- Descarga incremental desde la última vela cerrada usando startTime
+- Vela en curso (sin cerrar) guardada aparte, en memoria
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import List
+
+import config
+from api.consulta_api_datos import obtener_velas_ohlc
+
+# Duración de cada intervalo de Binance en milisegundos
+DURACION_INTERVALOS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+MAXIMO_VELAS_POR_PETICION = 1000
+
+
+def ahora_ms():
+    """Devuelve el instante actual en milisegundos, como los tiempos de Binance."""
+    return int(time.time() * 1000)
+
+
+class AlmacenVelas:
+    """Almacén de velas con descarga incremental y vela en curso en memoria."""
+
+    def __init__(self, ruta=None):
+        ruta = ruta or config.RUTA_ALMACEN_VELAS
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS velas (
+                simbolo TEXT NOT NULL,
+                intervalo TEXT NOT NULL,
+                tiempo_apertura INTEGER NOT NULL,
+                apertura REAL NOT NULL,
+                maximo REAL NOT NULL,
+                minimo REAL NOT NULL,
+                cierre REAL NOT NULL,
+                volumen REAL NOT NULL,
+                tiempo_cierre INTEGER NOT NULL,
+                PRIMARY KEY (simbolo, intervalo, tiempo_apertura)
+            ) WITHOUT ROWID"""
+        )
+        self._conexion.commit()
+        self._velas_vivas = {}  # (simbolo, intervalo) -> vela en curso
+        self._lock = threading.Lock()
+
+    def ultima_apertura(self, simbolo, intervalo):
+        """Devuelve el tiempo de apertura de la última vela cerrada guardada."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT MAX(tiempo_apertura) FROM velas WHERE simbolo = ? AND intervalo = ?",
+                (simbolo, intervalo),
+            ).fetchone()
+        return fila[0]
+
+    def guardar(self, simbolo, intervalo, velas):
+        """Guarda las velas cerradas y deja la que sigue abierta como vela en curso."""
+        instante = ahora_ms()
+        cerradas = []
+        for vela in velas:
+            fila = (simbolo, intervalo, int(vela[0]), float(vela[1]), float(vela[2]),
+                    float(vela[3]), float(vela[4]), float(vela[5]), int(vela[6]))
+            if fila[-1] < instante:
+                cerradas.append(fila)
+            else:
+                self._velas_vivas[(simbolo, intervalo)] = list(fila[2:])
+
+        with self._lock:
+            self._conexion.executemany("INSERT OR REPLACE INTO velas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", cerradas)
+            self._conexion.commit()
+
+    def descargar_nuevas(self, simbolo, intervalo, limite):
+        """Pide a Binance solo las velas posteriores a la última cerrada guardada."""
+        duracion = DURACION_INTERVALOS[intervalo]
+        ultima = self.ultima_apertura(simbolo, intervalo)
+        minimo_necesario = ahora_ms() - (limite + 1) * duracion
+        if ultima is None or ultima + duracion < minimo_necesario:
+            velas = obtener_velas_ohlc(simbolo, intervalo, limite)
+        else:
+            velas = obtener_velas_ohlc(simbolo, intervalo, MAXIMO_VELAS_POR_PETICION, inicio=ultima + duracion)
+        self.guardar(simbolo, intervalo, velas)
+
+    def completar_historial(self, simbolo, intervalo, desde_ms):
+        """Descarga por páginas todas las velas cerradas desde desde_ms hasta ahora."""
+        duracion = DURACION_INTERVALOS[intervalo]
+        ultima = self.ultima_apertura(simbolo, intervalo)
+        inicio = desde_ms if ultima is None else max(desde_ms, ultima + duracion)
+        while inicio < ahora_ms():
+            velas = obtener_velas_ohlc(simbolo, intervalo, MAXIMO_VELAS_POR_PETICION, inicio=inicio)
+            if not velas:
+                break
+            self.guardar(simbolo, intervalo, velas)
+            if len(velas) < MAXIMO_VELAS_POR_PETICION:
+                break
+            inicio = int(velas[-1][0]) + duracion
+
+    def leer(self, simbolo, intervalo, limite=None, desde_ms=None, hasta_ms=None) -> List:
+        """Devuelve velas cerradas en formato de Binance, de la más vieja a la más nueva."""
+        consulta = ("SELECT tiempo_apertura, apertura, maximo, minimo, cierre, volumen, tiempo_cierre "
+                    "FROM velas WHERE simbolo = ? AND intervalo = ?")
+        parametros = [simbolo, intervalo]
+        if desde_ms is not None:
+            consulta += " AND tiempo_apertura >= ?"
+            parametros.append(desde_ms)
+        if hasta_ms is not None:
+            consulta += " AND tiempo_apertura <= ?"
+            parametros.append(hasta_ms)
+        consulta += " ORDER BY tiempo_apertura DESC"
+        if limite is not None:
+            consulta += " LIMIT ?"
+            parametros.append(limite)
+        with self._lock:
+            filas = self._conexion.execute(consulta, parametros).fetchall()
+        return [list(fila) for fila in reversed(filas)]
+
+    def vela_en_curso(self, simbolo, intervalo):
+        """Devuelve la vela sin cerrar conocida, o None."""
+        vela = self._velas_vivas.get((simbolo, intervalo))
+        return list(vela) if vela else None
+
+    def obtener_velas(self, simbolo, intervalo="1h", limite=100, precio_actual=None) -> List:
+        """Devuelve las últimas `limite` velas (la última es la vela en curso).
+
+        Si la vela en curso sigue abierta y se conoce el precio actual, no se
+        consulta la API: solo se actualiza el cierre de la vela en memoria.
+        """
+        vela = self._velas_vivas.get((simbolo, intervalo))
+        if vela is None or vela[6] < ahora_ms() or precio_actual is None:
+            self.descargar_nuevas(simbolo, intervalo, limite)
+            vela = self._velas_vivas.get((simbolo, intervalo))
+        else:
+            vela[4] = precio_actual
+            vela[2] = max(vela[2], precio_actual)
+            vela[3] = min(vela[3], precio_actual)
+
+        cerradas = self.leer(simbolo, intervalo, limite - 1 if vela else limite)
+        return cerradas + [list(vela)] if vela else cerradas
+
+
+_almacen = None
+_lock_almacen = threading.Lock()
+
+
+def obtener_almacen_velas() -> AlmacenVelas:
+    """Devuelve el almacén compartido, creándolo en el primer uso."""
+    global _almacen
+    with _lock_almacen:
+        if _almacen is None:
+            _almacen = AlmacenVelas()
+    return _almacen
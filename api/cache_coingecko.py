@@ -0,0 +1,111 @@
+"""
+Este archivo contiene la caché de datos de mercado de CoinGecko:
+
+- Páginas de /coins/markets cacheadas por separado con un TTL configurable
+- Stale-while-revalidate: se sirve la copia vieja y se refresca en segundo plano
+- Snapshot en disco para arrancar sin esperar a la red
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict
+
+import config
+
+# Las copias sin versión estaban indexadas por símbolo y se descartan
+VERSION_SNAPSHOT = 2
+
+
+class CacheCoinGecko:
+    """Caché con TTL y persistencia en disco de las páginas de mercado de CoinGecko."""
+
+    def __init__(self, descargar_pagina: Callable[[int], Dict], ruta=None, ttl=None):
+        self.descargar_pagina = descargar_pagina
+        self.ruta = ruta or config.RUTA_CACHE_COINGECKO
+        self.ttl = config.TTL_COINGECKO if ttl is None else ttl
+        self._paginas = None  # pagina -> {'instante': epoch, 'datos': {...}}
+        self._refrescando = set()
+        self._lock = threading.Lock()
+        self._lock_escritura = threading.Lock()  # los refrescos de varias páginas comparten el temporal
+
+    def _cargar_snapshot(self):
+        """Carga el snapshot de disco la primera vez que se usa la caché."""
+        if self._paginas is not None:
+            return
+        self._paginas = {}
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                snapshot = json.load(archivo)
+            if snapshot.get("version") == VERSION_SNAPSHOT:
+                self._paginas = {int(pagina): entrada for pagina, entrada in snapshot.get("paginas", {}).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error al leer la caché de CoinGecko: {e}")
+
+    def _guardar_snapshot(self):
+        """Escribe el snapshot de forma atómica, una escritura a la vez."""
+        with self._lock_escritura:
+            # Se copia dentro del lock de escritura: el último en escribir lleva todas las páginas
+            with self._lock:
+                snapshot = {"version": VERSION_SNAPSHOT,
+                            "paginas": {str(pagina): entrada for pagina, entrada in self._paginas.items()}}
+            try:
+                os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+                temporal = f"{self.ruta}.tmp"
+                with open(temporal, "w", encoding="utf-8") as archivo:
+                    json.dump(snapshot, archivo)
+                os.replace(temporal, self.ruta)
+            except Exception as e:
+                print(f"Error al guardar la caché de CoinGecko: {e}")
+
+    def _refrescar_pagina(self, pagina):
+        """Descarga una página; ante un error se conserva la copia anterior."""
+        try:
+            datos = self.descargar_pagina(pagina)
+        except Exception as e:
+            print(f"Error al obtener datos de CoinGecko (página {pagina}): {e}")
+            return
+        finally:
+            with self._lock:
+                self._refrescando.discard(pagina)
+
+        with self._lock:
+            self._paginas[pagina] = {"instante": time.time(), "datos": datos}
+        self._guardar_snapshot()
+
+    def _refrescar_en_segundo_plano(self, pagina):
+        with self._lock:
+            if pagina in self._refrescando:
+                return
+            self._refrescando.add(pagina)
+        threading.Thread(target=self._refrescar_pagina, args=(pagina,), daemon=True).start()
+
+    def obtener(self, paginas=1) -> Dict:
+        """Devuelve la información por id de CoinGecko de las primeras `paginas` páginas."""
+        with self._lock:
+            self._cargar_snapshot()
+
+        resultado = {}
+        for pagina in range(1, paginas + 1):
+            with self._lock:
+                entrada = self._paginas.get(pagina)
+
+            if entrada is None:
+                # Sin copia previa no queda otra que esperar a la red
+                with self._lock:
+                    self._refrescando.add(pagina)
+                self._refrescar_pagina(pagina)
+                with self._lock:
+                    entrada = self._paginas.get(pagina)
+                if entrada is None:
+                    continue
+            elif time.time() - entrada["instante"] > self.ttl:
+                self._refrescar_en_segundo_plano(pagina)
+
+            # Una moneda que pasó de página entre refrescos queda con la copia de la página anterior
+            for id_coingecko, info in entrada["datos"].items():
+                resultado.setdefault(id_coingecko, info)
+        return resultado
@@ -0,0 +1,228 @@
+"""
+Este archivo contiene la grabación y reproducción de cintas de mercado:
+
+- Grabador de respuestas REST y frames de stream con su instante
+- Formato de cinta comprimido por registro, con índice para buscar por instante
+- Transporte de requests que sirve la cinta a 1x, Nx o a velocidad máxima
+
+La grabación se activa con config.RUTA_GRABACION_CINTA y la reproducción con
+config.RUTA_REPRODUCCION_CINTA; herramientas/servidor_cinta_local.py sirve la
+misma cinta por HTTP.
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from collections import defaultdict, deque
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+import config
+
+MAGIA = b"CINTA1\n"
+CABECERA_REGISTRO = struct.Struct("<dBHI")  # instante, tipo, largo de la clave, largo comprimido
+TIPOS = {"http": 0, "ws": 1}
+NOMBRES_TIPOS = {codigo: nombre for nombre, codigo in TIPOS.items()}
+RESPUESTA_SIN_GRABACION = b'{"error": "sin grabacion"}'
+CABECERAS_OMITIDAS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def clave_peticion(url):
+    """Clave de una petición: ruta y parámetros ordenados, sin el host."""
+    partes = urlsplit(url)
+    return f"{partes.path}?{urlencode(sorted(parse_qsl(partes.query)))}"
+
+
+class GrabadorCinta:
+    """Agrega registros comprimidos a una cinta."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, "ab")
+        if self._archivo.tell() == 0:
+            self._archivo.write(MAGIA)
+        self._lock = threading.Lock()
+
+    def grabar(self, registro: Dict, instante=None):
+        """Agrega un registro; la clave queda sin comprimir para indexar sin descomprimir."""
+        clave = registro.get("clave", "").encode("utf-8")
+        datos = zlib.compress(json.dumps(registro, separators=(",", ":")).encode("utf-8"))
+        cabecera = CABECERA_REGISTRO.pack(instante or time.time(), TIPOS[registro["tipo"]], len(clave), len(datos))
+        with self._lock:
+            self._archivo.write(cabecera + clave + datos)
+            self._archivo.flush()
+
+    def grabar_respuesta(self, respuesta: requests.Response, instante=None):
+        """Graba una respuesta HTTP con el cuerpo ya descomprimido."""
+        self.grabar({
+            "tipo": "http",
+            "clave": clave_peticion(respuesta.url),
+            "estado": respuesta.status_code,
+            "cabeceras": {k: v for k, v in respuesta.headers.items() if k.lower() not in CABECERAS_OMITIDAS},
+            "cuerpo": respuesta.content.decode("utf-8", errors="replace"),
+        }, instante)
+
+    def grabar_frame(self, mensaje, instante=None):
+        """Graba un frame recibido por WebSocket."""
+        self.grabar({"tipo": "ws", "frame": mensaje}, instante)
+
+    def cerrar(self):
+        """Cierra el archivo de la cinta."""
+        with self._lock:
+            self._archivo.close()
+
+
+class LectorCinta:
+    """Lee una cinta; al abrirla indexa las cabeceras sin descomprimir los registros."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.instantes = []
+        self.tipos = []
+        self.claves = []
+        self._posiciones = []  # (offset de los datos, largo)
+        with open(ruta, "rb") as archivo:
+            if archivo.read(len(MAGIA)) != MAGIA:
+                raise ValueError(f"{ruta} no es una cinta válida")
+            tamano = os.fstat(archivo.fileno()).st_size
+            while True:
+                cabecera = archivo.read(CABECERA_REGISTRO.size)
+                if len(cabecera) < CABECERA_REGISTRO.size:
+                    break
+                instante, tipo, largo_clave, largo = CABECERA_REGISTRO.unpack(cabecera)
+                clave = archivo.read(largo_clave)
+                offset = archivo.tell()
+                # seek no falla más allá del final: el corte se detecta con el tamaño del archivo
+                if len(clave) < largo_clave or offset + largo > tamano:
+                    break  # registro cortado al final de la cinta
+                archivo.seek(largo, 1)
+                self.instantes.append(instante)
+                self.tipos.append(NOMBRES_TIPOS[tipo])
+                self.claves.append(clave.decode("utf-8"))
+                self._posiciones.append((offset, largo))
+        self._archivo = open(ruta, "rb")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.instantes)
+
+    def leer(self, indice) -> Dict:
+        """Descomprime y devuelve el registro `indice`."""
+        offset, largo = self._posiciones[indice]
+        with self._lock:
+            self._archivo.seek(offset)
+            datos = self._archivo.read(largo)
+        return json.loads(zlib.decompress(datos))
+
+    def buscar(self, instante) -> int:
+        """Índice del primer registro grabado en o después de `instante`."""
+        return bisect_left(self.instantes, instante)
+
+    def registros(self, desde=0, tipo=None) -> Iterator:
+        """Recorre (instante, registro) desde el índice `desde`, opcionalmente de un tipo."""
+        for indice in range(desde, len(self)):
+            if tipo is None or self.tipos[indice] == tipo:
+                yield self.instantes[indice], self.leer(indice)
+
+
+class RelojReproduccion:
+    """Traduce instantes de la cinta a esperas reales según la velocidad (0 = sin esperas)."""
+
+    def __init__(self, inicio_cinta, velocidad=1.0):
+        self.inicio_cinta = inicio_cinta
+        self.velocidad = velocidad
+        self.inicio_real = None
+
+    def esperar(self, instante):
+        if self.velocidad <= 0:
+            return
+        if self.inicio_real is None:
+            self.inicio_real = time.monotonic()
+        espera = (instante - self.inicio_cinta) / self.velocidad - (time.monotonic() - self.inicio_real)
+        if espera > 0:
+            time.sleep(espera)
+
+
+class TransporteCinta(BaseAdapter):
+    """Adaptador de requests que responde con las respuestas grabadas en una cinta.
+
+    Cada clave de petición sirve sus respuestas en el orden grabado; al
+    agotarse se repite la última.
+    """
+
+    def __init__(self, lector: LectorCinta, velocidad=1.0):
+        super().__init__()
+        self.lector = lector
+        self._pendientes = defaultdict(deque)
+        self._ultima = {}
+        for indice, (tipo, clave) in enumerate(zip(lector.tipos, lector.claves)):
+            if tipo == "http":
+                self._pendientes[clave].append(indice)
+        self.reloj = RelojReproduccion(lector.instantes[0] if len(lector) else 0.0, velocidad)
+        self._lock = threading.Lock()
+
+    def siguiente(self, clave) -> Optional[Dict]:
+        """Devuelve el próximo registro grabado para la clave, esperando según el reloj."""
+        with self._lock:
+            cola = self._pendientes.get(clave)
+            if cola:
+                indice = self._ultima[clave] = cola.popleft()
+            else:
+                indice = self._ultima.get(clave)
+        if indice is None:
+            return None
+        self.reloj.esperar(self.lector.instantes[indice])
+        return self.lector.leer(indice)
+
+    def send(self, request, **kwargs):
+        registro = self.siguiente(clave_peticion(request.url))
+        respuesta = requests.Response()
+        respuesta.request = request
+        respuesta.url = request.url
+        if registro is None:
+            respuesta.status_code = 404
+            respuesta._content = RESPUESTA_SIN_GRABACION
+            respuesta._content_consumed = True
+            return respuesta
+
+        respuesta.status_code = registro["estado"]
+        respuesta.headers = CaseInsensitiveDict(registro["cabeceras"])
+        respuesta._content = registro["cuerpo"].encode("utf-8")
+        respuesta._content_consumed = True  # iter_content recorre _content en vez de leer de la red
+        respuesta.encoding = "utf-8"
+        return respuesta
+
+    def close(self):
+        pass
+
+
+def activar_reproduccion(sesion: requests.Session, ruta, velocidad=1.0):
+    """Hace que la sesión responda desde la cinta en vez de la red."""
+    transporte = TransporteCinta(LectorCinta(ruta), velocidad)
+    sesion.mount("https://", transporte)
+    sesion.mount("http://", transporte)
+    return transporte
+
+
+_grabador = None
+_lock_grabador = threading.Lock()
+
+
+def obtener_grabador() -> Optional[GrabadorCinta]:
+    """Devuelve el grabador compartido si la grabación está configurada."""
+    global _grabador
+    if not config.RUTA_GRABACION_CINTA:
+        return None
+    with _lock_grabador:
+        if _grabador is None:
+            os.makedirs(os.path.dirname(config.RUTA_GRABACION_CINTA) or ".", exist_ok=True)
+            _grabador = GrabadorCinta(config.RUTA_GRABACION_CINTA)
+    return _grabador
@@ -0,0 +1,135 @@
+"""
+Este archivo contiene el cliente HTTP compartido por las consultas a las APIs:
+
+- Sesión con pools de conexiones por host y keep-alive
+- Timeouts explícitos de conexión y lectura
+- Reintentos con espera exponencial y jitter ante 429/418/5xx
+- Grabación de respuestas o reproducción desde una cinta de mercado
+- Latencia, bytes y errores de cada petición en el registro de métricas
+"""
+
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from api.cinta import activar_reproduccion, obtener_grabador
+from api.instrumentacion import registro_metricas
+
+CODIGOS_REINTENTABLES = {418, 429, 500, 502, 503, 504}
+
+
+class ClienteHTTP:
+    """Cliente con conexiones reutilizables y política de reintentos."""
+
+    def __init__(self, timeout_conexion=None, timeout_lectura=None, max_reintentos=None, tamano_pool=None):
+        self.timeout = (
+            timeout_conexion or config.TIMEOUT_CONEXION,
+            timeout_lectura or config.TIMEOUT_LECTURA,
+        )
+        self.max_reintentos = config.MAX_REINTENTOS if max_reintentos is None else max_reintentos
+        tamano_pool = tamano_pool or config.MAX_HILOS_DESCARGA
+
+        self.grabador = None  # GrabadorCinta que recibe cada respuesta, si se graba
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=tamano_pool, max_retries=0)
+        self.sesion.mount("https://", adaptador)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+    def _calcular_espera(self, intento, retry_after=None):
+        """Devuelve los segundos a esperar antes del siguiente intento."""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, config.ESPERA_BASE_REINTENTO)
+        tope = min(config.ESPERA_MAXIMA_REINTENTO, config.ESPERA_BASE_REINTENTO * 2 ** intento)
+        return random.uniform(0, tope)
+
+    def obtener(self, url, params=None, peso=0, limitador=None, stream=False) -> requests.Response:
+        """Hace un GET con reintentos y devuelve la respuesta correcta. Con `stream` el cuerpo no se lee todavía."""
+        ruta = urlsplit(url).path
+        for intento in range(self.max_reintentos + 1):
+            ultimo_intento = intento == self.max_reintentos
+            if limitador is not None:
+                limitador.adquirir(peso)
+
+            inicio = time.perf_counter()
+            try:
+                respuesta = self.sesion.get(url, params=params, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                registro_metricas.sumar("http_errores_total", ruta=ruta, codigo="conexion")
+                if ultimo_intento:
+                    raise
+                time.sleep(self._calcular_espera(intento))
+                continue
+
+            registro_metricas.observar("http_peticion_segundos", time.perf_counter() - inicio, ruta=ruta)
+            # Content-Length es el tamaño transferido (comprimido); si falta, el del cuerpo
+            # (en una respuesta por bloques lo suma quien la lee)
+            longitud = respuesta.headers.get("Content-Length")
+            if longitud is not None or not stream:
+                registro_metricas.sumar("http_bytes_total", int(longitud or len(respuesta.content)), ruta=ruta)
+            if respuesta.status_code >= 400:
+                registro_metricas.sumar("http_errores_total", ruta=ruta, codigo=str(respuesta.status_code))
+            if self.grabador is not None:
+                self.grabador.grabar_respuesta(respuesta)
+            if limitador is not None:
+                limitador.actualizar_desde_cabeceras(respuesta.headers)
+
+            if respuesta.status_code in CODIGOS_REINTENTABLES and not ultimo_intento:
+                retry_after = leer_retry_after(respuesta.headers.get("Retry-After"))
+                # Un baneo largo (418) no se espera bloqueando el hilo
+                if retry_after is not None and retry_after > config.ESPERA_MAXIMA_REINTENTO:
+                    respuesta.raise_for_status()
+                respuesta.close()
+                time.sleep(self._calcular_espera(intento, retry_after))
+                continue
+
+            respuesta.raise_for_status()
+            return respuesta
+
+    def obtener_json(self, url, params=None, peso=0, limitador=None):
+        """Hace un GET con reintentos y devuelve el cuerpo decodificado."""
+        return self.obtener(url, params=params, peso=peso, limitador=limitador).json()
+
+    def obtener_por_bloques(self, url, params=None, peso=0, limitador=None, tamano_bloque=64 * 1024):
+        """Hace un GET con reintentos y devuelve el cuerpo descomprimido en bloques, sin cargarlo entero."""
+        respuesta = self.obtener(url, params=params, peso=peso, limitador=limitador, stream=True)
+        leidos = 0
+        try:
+            for bloque in respuesta.iter_content(tamano_bloque):
+                leidos += len(bloque)
+                yield bloque
+        finally:
+            respuesta.close()
+            if "Content-Length" not in respuesta.headers:
+                registro_metricas.sumar("http_bytes_total", leidos, ruta=urlsplit(url).path)
+
+
+def leer_retry_after(valor):
+    """Convierte la cabecera Retry-After (segundos o fecha HTTP) a segundos."""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+cliente_http = ClienteHTTP()
+if config.RUTA_REPRODUCCION_CINTA:
+    activar_reproduccion(cliente_http.sesion, config.RUTA_REPRODUCCION_CINTA, config.VELOCIDAD_REPRODUCCION)
+else:
+    cliente_http.grabador = obtener_grabador()
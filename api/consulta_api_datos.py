@@ -1,73 +1,145 @@
+import json
+from typing import Container, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 import requests
-from typing import Dict, List
+
+import config
+from api.cache_coingecko import CacheCoinGecko
+from api.cliente_http import cliente_http
+from api.limitador_peso import limitador_binance
+from api.ticker_24h import parsear_tickers
 
 # URLs
 BINANCE_API = "https://api.binance.com/api/v3"
 COINGECKO_API = "https://api.coingecko.com/api/v3"
 
+CODIGO_SIMBOLO_INVALIDO = -1121
+
 
 def obtener_precio_actual(par) -> Dict:
     """Devuelve el precio actual de un par (ej: BTCUSDT)."""
     try:
         url = f"{BINANCE_API}/ticker/price"
-        respuesta = requests.get(url, params={"symbol": par})
-        respuesta.raise_for_status()
-        return respuesta.json()
+        return cliente_http.obtener_json(url, params={"symbol": par},
+                                         peso=config.PESO_PRECIO, limitador=limitador_binance)
     except Exception as e:
         print("Error al obtener precio actual:", e)
         return {}
 
 
-def obtener_precios_24h() -> List:
-    """Devuelve los precios y cambios de las últimas 24h para todos los pares."""
+def peso_ticker_24h(cantidad=None):
+    """Peso de /ticker/24hr según la cantidad de símbolos pedidos (None = todos)."""
+    if cantidad is None or cantidad > 100:
+        return config.PESO_TICKER_24H
+    return config.PESO_TICKER_24H_HASTA_20 if cantidad <= 20 else config.PESO_TICKER_24H_HASTA_100
+
+
+def es_simbolo_invalido(respuesta) -> bool:
+    """Si Binance rechazó la consulta por un símbolo inexistente (400 con código -1121)."""
+    if respuesta is None or respuesta.status_code != 400:
+        return False
     try:
-        url = f"{BINANCE_API}/ticker/24hr"
-        respuesta = requests.get(url)
-        respuesta.raise_for_status()
-        return respuesta.json()
+        return respuesta.json().get("code") == CODIGO_SIMBOLO_INVALIDO
+    except ValueError:
+        return False
+
+
+def obtener_tickers_24h(simbolos: Optional[Iterable[str]] = None, sufijo="USDT",
+                        operables: Optional[Container[str]] = None) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Devuelve los pares contra `sufijo` y sus columnas de 24h, leyendo la respuesta MINI por bloques.
+    Con `simbolos` pide solo esos pares (menos peso); si alguno ya no existe, pide todos.
+    Con `operables` (del registro de símbolos) se descartan los pares que no están en TRADING.
+    """
+    url = f"{BINANCE_API}/ticker/24hr"
+    params = {"type": "MINI"}
+    if simbolos is not None:
+        simbolos = sorted(simbolos)
+        params["symbols"] = json.dumps(simbolos, separators=(",", ":"))
+    try:
+        bloques = cliente_http.obtener_por_bloques(url, params=params, peso=peso_ticker_24h(
+            None if simbolos is None else len(simbolos)), limitador=limitador_binance)
+        return parsear_tickers(bloques, sufijo, operables)
+    except requests.HTTPError as e:
+        # Un par deslistado después del último /exchangeInfo invalida toda la consulta: se piden todos.
+        # Ante 429/418/5xx no: el mercado completo pesa mucho más y agravaría el límite o el baneo
+        if simbolos is not None and es_simbolo_invalido(e.response):
+            return obtener_tickers_24h(None, sufijo, operables)
+        print("Error al obtener precios de 24h:", e)
+        return parsear_tickers((), sufijo)
     except Exception as e:
         print("Error al obtener precios de 24h:", e)
-        return []
+        return parsear_tickers((), sufijo)
+
 
+def obtener_exchange_info() -> List[Tuple]:
+    """
+    Descarga /exchangeInfo de los pares spot y lo proyecta a filas
+    (símbolo, base, cotizado, estado, paso de precio, paso de cantidad, cantidad mínima).
+    Propaga los errores para que el registro conserve la copia anterior.
+    """
+    url = f"{BINANCE_API}/exchangeInfo"
+    params = {"permissions": "SPOT", "showPermissionSets": "false"}
+    datos = cliente_http.obtener_json(url, params=params, peso=config.PESO_EXCHANGE_INFO, limitador=limitador_binance)
 
-def obtener_velas_ohlc(par, intervalo="1h", limite=100) -> List:
-    """Devuelve datos OHLC (velas) para un par específico."""
+    filas = []
+    for par in datos["symbols"]:
+        filtros = {filtro["filterType"]: filtro for filtro in par.get("filters", ())}
+        precio = filtros.get("PRICE_FILTER", {})
+        lote = filtros.get("LOT_SIZE", {})
+        filas.append((
+            par["symbol"], par["baseAsset"], par["quoteAsset"], par["status"],
+            float(precio.get("tickSize", 0)), float(lote.get("stepSize", 0)), float(lote.get("minQty", 0)),
+        ))
+    return filas
+
+
+def obtener_velas_ohlc(par, intervalo="1h", limite=100, inicio=None) -> List:
+    """Devuelve datos OHLC (velas) para un par específico, opcionalmente desde `inicio` (ms)."""
     try:
         url = f"{BINANCE_API}/klines"
         params = {"symbol": par, "interval": intervalo, "limit": limite}
-        respuesta = requests.get(url, params=params)
-        respuesta.raise_for_status()
-        return respuesta.json()
+        if inicio is not None:
+            params["startTime"] = inicio
+        return cliente_http.obtener_json(url, params=params,
+                                         peso=config.PESO_VELAS, limitador=limitador_binance)
     except Exception as e:
         print("Error al obtener velas:", e)
         return []
 
 
-def obtener_info_cripto_coingecko() -> Dict:
-    """Consulta del Market Cap desde CoinGecko."""
-    try:
-        url = f"{COINGECKO_API}/coins/markets"
-        params = {
-            "vs_currency": "usd",
-            "order": "market_cap_desc",
-            "per_page": 100,
-            "page": 1,
-            "sparkline": False,
+def obtener_pagina_coingecko(pagina=1) -> Dict:
+    """Descarga una página de /coins/markets. Propaga los errores para que la caché conserve la copia anterior."""
+    url = f"{COINGECKO_API}/coins/markets"
+    params = {
+        "vs_currency": "usd",
+        "order": "market_cap_desc",
+        "per_page": 100,
+        "page": pagina,
+        "sparkline": False,
+    }
+    datos = cliente_http.obtener_json(url, params=params)
+
+    # Por id: varias monedas pueden compartir símbolo, el registro de símbolos elige cuál va con cada par
+    resultado = {}
+    for cripto in datos:
+        resultado[cripto["id"]] = {
+            "simbolo": cripto["symbol"].upper(),
+            "nombre": cripto["name"],
+            "cap_mercado": cripto["market_cap"],
+            "suministro_circulante": cripto["circulating_supply"],
         }
-        respuesta = requests.get(url, params=params)
-        respuesta.raise_for_status()
-        datos = respuesta.json()
-
-        resultado = {}
-        for cripto in datos:
-            simbolo = cripto["symbol"].upper()
-            resultado[simbolo] = {
-                "nombre": cripto["name"],
-                "cap_mercado": cripto["market_cap"],
-                "suministro_circulante": cripto["circulating_supply"],
-            }
-        # print(resultado)
-        return resultado
+    return resultado
+
+
+cache_coingecko = CacheCoinGecko(obtener_pagina_coingecko)
+
+
+def obtener_info_cripto_coingecko(paginas=None) -> Dict:
+    """Consulta del Market Cap desde CoinGecko, a través de la caché con TTL. Devuelve {id de CoinGecko: info}."""
+    try:
+        return cache_coingecko.obtener(paginas or config.PAGINAS_COINGECKO)
     except Exception as e:
         print("Error al obtener datos de CoinGecko:", e)
-        return {}
\ No newline at end of file
+        return {}
@@ -0,0 +1,195 @@
+"""
+Este archivo contiene la instrumentación de rendimiento de la aplicación:
+
+- Spans que miden cada etapa del refresco y cada llamada HTTP
+- Histogramas de latencia por buckets, contadores y medidores con etiquetas
+- Exportación periódica a JSON y a texto de Prometheus
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+import config
+
+# Límites superiores de los buckets de latencia, en segundos
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def clave_metrica(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{clave}="{valor}"' for clave, valor in etiquetas) + "}"
+
+
+class Histograma:
+    """Histograma acumulativo de latencias con buckets fijos."""
+
+    __slots__ = ("conteos", "suma", "cuenta", "ultimo")
+
+    def __init__(self):
+        self.conteos = [0] * (len(BUCKETS_LATENCIA) + 1)  # el último es +Inf
+        self.suma = 0.0
+        self.cuenta = 0
+        self.ultimo = 0.0
+
+    def observar(self, segundos):
+        self.conteos[bisect_left(BUCKETS_LATENCIA, segundos)] += 1
+        self.suma += segundos
+        self.cuenta += 1
+        self.ultimo = segundos
+
+    def percentil(self, p):
+        """Estima el percentil interpolando dentro del bucket que lo contiene."""
+        if not self.cuenta:
+            return 0.0
+        objetivo = self.cuenta * p / 100
+        acumulado = 0
+        for indice, conteo in enumerate(self.conteos):
+            if conteo and acumulado + conteo >= objetivo:
+                inferior = BUCKETS_LATENCIA[indice - 1] if indice > 0 else 0.0
+                superior = BUCKETS_LATENCIA[indice] if indice < len(BUCKETS_LATENCIA) else inferior * 2
+                return inferior + (superior - inferior) * (objetivo - acumulado) / conteo
+            acumulado += conteo
+        return BUCKETS_LATENCIA[-1]
+
+
+class RegistroMetricas:
+    """Registro de histogramas, contadores y medidores de la aplicación."""
+
+    def __init__(self):
+        self.histogramas: Dict[tuple, Histograma] = {}
+        self.contadores: Dict[tuple, float] = {}
+        self.medidores: Dict[tuple, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, nombre, segundos, **etiquetas):
+        """Registra una latencia en el histograma `nombre`."""
+        clave = clave_metrica(nombre, etiquetas)
+        with self._lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = Histograma()
+            histograma.observar(segundos)
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        """Suma `valor` al contador `nombre`."""
+        clave = clave_metrica(nombre, etiquetas)
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def registrar_medidor(self, nombre, funcion, **etiquetas):
+        """Registra una función que devuelve el valor actual de un medidor."""
+        self.medidores[clave_metrica(nombre, etiquetas)] = funcion
+
+    @contextmanager
+    def medir(self, etapa):
+        """Span que mide una etapa; si lanza una excepción, cuenta el error y la propaga."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.sumar("errores_total", etapa=etapa)
+            raise
+        finally:
+            self.observar("etapa_segundos", time.perf_counter() - inicio, etapa=etapa)
+
+    def ultimo(self, nombre, **etiquetas):
+        """Última latencia observada del histograma, en segundos."""
+        histograma = self.histogramas.get(clave_metrica(nombre, etiquetas))
+        return histograma.ultimo if histograma else 0.0
+
+    def instantanea(self) -> Dict:
+        """Copia serializable del estado actual de todas las métricas."""
+        with self._lock:
+            histogramas = [
+                {
+                    "nombre": nombre, "etiquetas": dict(etiquetas), "cuenta": h.cuenta, "suma": h.suma,
+                    "ultimo": h.ultimo, "p50": h.percentil(50), "p99": h.percentil(99),
+                    "buckets": dict(zip([*map(str, BUCKETS_LATENCIA), "+Inf"], h.conteos)),
+                }
+                for (nombre, etiquetas), h in self.histogramas.items()
+            ]
+            contadores = [
+                {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": valor}
+                for (nombre, etiquetas), valor in self.contadores.items()
+            ]
+        medidores = [
+            {"nombre": nombre, "etiquetas": dict(etiquetas), "valor": funcion()}
+            for (nombre, etiquetas), funcion in list(self.medidores.items())
+        ]
+        return {"instante": time.time(), "histogramas": histogramas, "contadores": contadores, "medidores": medidores}
+
+    def a_prometheus(self, prefijo="exchange_") -> str:
+        """Devuelve las métricas en el formato de texto de Prometheus."""
+        lineas = []
+        with self._lock:
+            tipos_emitidos = set()
+            for (nombre, etiquetas), h in sorted(self.histogramas.items()):
+                if nombre not in tipos_emitidos:
+                    lineas.append(f"# TYPE {prefijo}{nombre} histogram")
+                    tipos_emitidos.add(nombre)
+                acumulado = 0
+                for limite, conteo in zip([*map(str, BUCKETS_LATENCIA), "+Inf"], h.conteos):
+                    acumulado += conteo
+                    lineas.append(f"{prefijo}{nombre}_bucket{formatear_etiquetas(etiquetas + (('le', limite),))} {acumulado}")
+                lineas.append(f"{prefijo}{nombre}_sum{formatear_etiquetas(etiquetas)} {h.suma}")
+                lineas.append(f"{prefijo}{nombre}_count{formatear_etiquetas(etiquetas)} {h.cuenta}")
+            for (nombre, etiquetas), valor in sorted(self.contadores.items()):
+                if nombre not in tipos_emitidos:
+                    lineas.append(f"# TYPE {prefijo}{nombre} counter")
+                    tipos_emitidos.add(nombre)
+                lineas.append(f"{prefijo}{nombre}{formatear_etiquetas(etiquetas)} {valor}")
+        for (nombre, etiquetas), funcion in sorted(self.medidores.items()):
+            lineas.append(f"# TYPE {prefijo}{nombre} gauge")
+            lineas.append(f"{prefijo}{nombre}{formatear_etiquetas(etiquetas)} {funcion()}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta_json=None, ruta_prometheus=None):
+        """Escribe las métricas de forma atómica en JSON y en texto de Prometheus."""
+        for ruta, contenido in ((ruta_json or config.RUTA_METRICAS_JSON, json.dumps(self.instantanea())),
+                                (ruta_prometheus or config.RUTA_METRICAS_PROMETHEUS, self.a_prometheus())):
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+            temporal = f"{ruta}.tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                archivo.write(contenido)
+            os.replace(temporal, ruta)
+
+
+registro_metricas = RegistroMetricas()
+
+_hilo_exportacion = None
+_detener_exportacion = threading.Event()
+
+
+def _bucle_exportacion():
+    while not _detener_exportacion.wait(config.INTERVALO_EXPORTACION_METRICAS):
+        try:
+            registro_metricas.exportar()
+        except Exception as e:
+            print(f"Error al exportar métricas: {e}")
+
+
+def iniciar_exportacion():
+    """Lanza el hilo que exporta las métricas periódicamente."""
+    global _hilo_exportacion
+    if _hilo_exportacion is not None and _hilo_exportacion.is_alive():
+        return
+    _detener_exportacion.clear()
+    _hilo_exportacion = threading.Thread(target=_bucle_exportacion, daemon=True)
+    _hilo_exportacion.start()
+
+
+def detener_exportacion():
+    """Detiene la exportación periódica y escribe una última vez."""
+    _detener_exportacion.set()
+    if _hilo_exportacion is not None:
+        registro_metricas.exportar()
@@ -0,0 +1,65 @@
+"""
+Este archivo contiene el limitador de peso para la API de Binance:
+
+- Cubeta de tokens con el presupuesto de peso por minuto
+- Sincronización con las cabeceras X-MBX-USED-WEIGHT de cada respuesta
+"""
+
+import threading
+import time
+from typing import Mapping
+
+import config
+from api.instrumentacion import registro_metricas
+
+
+class LimitadorPeso:
+    """Cubeta de tokens que reparte el peso de peticiones permitido por Binance."""
+
+    def __init__(self, capacidad=None, ventana=60):
+        capacidad = capacidad or config.PESO_MAXIMO_POR_MINUTO * config.FRACCION_PESO_UTILIZABLE
+        self.capacidad = float(capacidad)
+        self.tasa_recarga = self.capacidad / ventana
+        self.tokens = self.capacidad
+        self.peso_usado = 0
+        self._ultima_recarga = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _recargar(self):
+        """Suma los tokens generados desde la última recarga."""
+        ahora = time.monotonic()
+        transcurrido = ahora - self._ultima_recarga
+        self._ultima_recarga = ahora
+        self.tokens = min(self.capacidad, self.tokens + transcurrido * self.tasa_recarga)
+
+    def adquirir(self, peso=1):
+        """Bloquea hasta que haya presupuesto para una petición del peso indicado."""
+        while True:
+            with self._lock:
+                self._recargar()
+                if self.tokens >= peso:
+                    self.tokens -= peso
+                    return
+                espera = (peso - self.tokens) / self.tasa_recarga
+            time.sleep(espera)
+
+    def actualizar_desde_cabeceras(self, cabeceras: Mapping):
+        """Ajusta los tokens al peso usado que informa Binance para la IP."""
+        usado = cabeceras.get("X-MBX-USED-WEIGHT-1M") or cabeceras.get("X-MBX-USED-WEIGHT")
+        if usado is None:
+            return
+        try:
+            usado = int(usado)
+        except ValueError:
+            return
+
+        with self._lock:
+            self._recargar()
+            self.peso_usado = usado
+            # El servidor cuenta también el peso de otros procesos con la misma IP
+            self.tokens = min(self.tokens, self.capacidad - usado)
+
+
+limitador_binance = LimitadorPeso()
+registro_metricas.registrar_medidor("binance_peso_usado", lambda: limitador_binance.peso_usado)
+registro_metricas.registrar_medidor("binance_peso_disponible", lambda: limitador_binance.tokens)
@@ -0,0 +1,263 @@
+"""
+Este archivo contiene el registro de símbolos de Binance:
+
+- Pares de /exchangeInfo con activo base, activo cotizado, estado y tamaños de tick y de lote
+- Búsqueda por símbolo o por (base, cotizado) en O(1), con ids enteros estables y textos internados
+- Id de CoinGecko de cada activo base, unido una sola vez por carga del registro
+- Snapshot en disco con un TTL largo y refresco en segundo plano, como la caché de CoinGecko
+- Sin registro (primer arranque sin red) los símbolos se separan por los activos cotizados conocidos
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+from api.consulta_api_datos import obtener_exchange_info
+
+ESTADO_OPERABLE = "TRADING"
+
+# Activos cotizados para separar símbolos que el registro no conoce; el más largo gana
+COTIZADOS_CONOCIDOS = ("FDUSD", "USDT", "USDC", "TUSD", "BUSD", "BTC", "ETH", "BNB", "TRY", "EUR", "BRL")
+
+# Segundos entre refrescos en segundo plano cuando /exchangeInfo falla
+ESPERA_ENTRE_INTENTOS = 60
+
+
+def ids_por_simbolo(monedas: Dict[str, Dict]) -> Dict[str, str]:
+    """Id de CoinGecko de cada símbolo; si varias monedas comparten símbolo gana la de mayor capitalización."""
+    ids = {}
+    for id_coingecko, info in sorted(monedas.items(), key=lambda item: item[1].get('cap_mercado') or 0.0,
+                                     reverse=True):
+        ids.setdefault(info['simbolo'], id_coingecko)
+    return ids
+
+
+class InfoSimbolo:
+    """Datos de un par de /exchangeInfo."""
+
+    __slots__ = ("id", "simbolo", "base", "cotizado", "estado", "paso_precio", "paso_cantidad", "cantidad_minima",
+                 "id_coingecko")
+
+    def __init__(self, id_simbolo, simbolo, base, cotizado, estado, paso_precio, paso_cantidad, cantidad_minima):
+        self.id = id_simbolo
+        self.simbolo = sys.intern(simbolo)
+        self.base = sys.intern(base)
+        self.cotizado = sys.intern(cotizado)
+        self.estado = sys.intern(estado)
+        self.paso_precio = paso_precio
+        self.paso_cantidad = paso_cantidad
+        self.cantidad_minima = cantidad_minima
+        self.id_coingecko = None  # lo completa RegistroSimbolos.vincular_coingecko
+
+    @property
+    def operable(self):
+        return self.estado == ESTADO_OPERABLE
+
+
+class RegistroSimbolos:
+    """Índice de los pares de Binance con persistencia en disco."""
+
+    def __init__(self, descargar: Callable[[], List[Sequence]], ruta=None, ttl=None):
+        self.descargar = descargar
+        self.ruta = ruta or config.RUTA_REGISTRO_SIMBOLOS
+        self.ttl = config.TTL_REGISTRO_SIMBOLOS if ttl is None else ttl
+        self.instante = None  # epoch de la última descarga, o None si nunca se cargó
+        # Los índices se reemplazan enteros al refrescar: las lecturas no toman el lock
+        self._simbolos: Dict[str, InfoSimbolo] = {}
+        self._por_par: Dict[Tuple[str, str], InfoSimbolo] = {}
+        self._operables: Dict[str, frozenset] = {}
+        self._por_coingecko: Dict[Tuple[str, str], InfoSimbolo] = {}
+        self._vinculado = False  # si los pares del índice actual ya tienen su id de CoinGecko
+        self._desconocidos = {}  # símbolo -> (base, cotizado) separados por sufijo, o None
+        self._siguiente_id = 0
+        self._snapshot_leido = False
+        self._refrescando = False
+        self._ultimo_intento = None  # monotonic del último refresco, para no reintentar en cada consulta
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._simbolos)
+
+    def _cargar_snapshot(self):
+        """Carga el snapshot de disco la primera vez que se consulta el registro."""
+        with self._lock:
+            if self._snapshot_leido:
+                return
+            self._snapshot_leido = True
+        try:
+            with open(self.ruta, encoding="utf-8") as archivo:
+                snapshot = json.load(archivo)
+            self._indexar(snapshot["simbolos"], snapshot["instante"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error al leer el registro de símbolos: {e}")
+
+    def _guardar_snapshot(self, filas, instante):
+        """Escribe el snapshot de forma atómica."""
+        try:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            temporal = f"{self.ruta}.tmp"
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump({"instante": instante, "simbolos": filas}, archivo, separators=(",", ":"))
+            os.replace(temporal, self.ruta)
+        except Exception as e:
+            print(f"Error al guardar el registro de símbolos: {e}")
+
+    def _indexar(self, filas, instante):
+        """Arma los índices nuevos conservando el id de los pares que ya se conocían."""
+        with self._lock:
+            anteriores = self._simbolos
+            simbolos = {}
+            por_par = {}
+            for simbolo, base, cotizado, estado, paso_precio, paso_cantidad, cantidad_minima in filas:
+                anterior = anteriores.get(simbolo)
+                if anterior is not None:
+                    id_simbolo = anterior.id
+                else:
+                    id_simbolo = self._siguiente_id
+                    self._siguiente_id += 1
+                info = InfoSimbolo(id_simbolo, simbolo, base, cotizado, estado,
+                                   paso_precio, paso_cantidad, cantidad_minima)
+                simbolos[info.simbolo] = info
+                por_par[(info.base, info.cotizado)] = info
+            self._simbolos = simbolos
+            self._por_par = por_par
+            self._operables = {}
+            self._por_coingecko = {}
+            self._vinculado = False
+            self.instante = instante
+
+    def refrescar(self):
+        """Descarga /exchangeInfo; ante un error se conserva el registro anterior."""
+        self._ultimo_intento = time.monotonic()
+        try:
+            filas = self.descargar()
+        except Exception as e:
+            print(f"Error al obtener el registro de símbolos: {e}")
+            with self._lock:
+                self._refrescando = False
+            return
+
+        instante = time.time()
+        try:
+            self._indexar(filas, instante)
+            self._guardar_snapshot(filas, instante)
+        finally:
+            # Hasta indexar, cargar() vería el registro vacío y lanzaría otra descarga
+            with self._lock:
+                self._refrescando = False
+
+    def _refrescar_en_segundo_plano(self):
+        with self._lock:
+            reciente = self._ultimo_intento is not None and time.monotonic() - self._ultimo_intento < ESPERA_ENTRE_INTENTOS
+            if self._refrescando or reciente:
+                return
+            self._refrescando = True
+        threading.Thread(target=self.refrescar, daemon=True).start()
+
+    def _revisar(self):
+        """Lee el snapshot si hace falta y programa un refresco si falta o está vencido."""
+        self._cargar_snapshot()
+        if self.instante is None or time.time() - self.instante > self.ttl:
+            self._refrescar_en_segundo_plano()
+
+    def cargar(self):
+        """Deja el registro listo; sin copia previa espera a la red. Devuelve si hay pares cargados."""
+        self._cargar_snapshot()
+        with self._lock:
+            esperar = self.instante is None and not self._refrescando and (
+                self._ultimo_intento is None or time.monotonic() - self._ultimo_intento >= ESPERA_ENTRE_INTENTOS)
+            if esperar:
+                self._refrescando = True
+        if esperar:
+            self.refrescar()
+        else:
+            self._revisar()
+        return bool(self._simbolos)
+
+    def obtener(self, simbolo) -> Optional[InfoSimbolo]:
+        """Datos de un par, o None si el registro no lo conoce."""
+        self._revisar()
+        return self._simbolos.get(simbolo)
+
+    def par(self, base, cotizado) -> Optional[InfoSimbolo]:
+        """Datos del par de `base` contra `cotizado`, o None si no existe."""
+        self._revisar()
+        return self._por_par.get((base, cotizado))
+
+    def par_coingecko(self, id_coingecko, cotizado) -> Optional[InfoSimbolo]:
+        """Par contra `cotizado` de la moneda de CoinGecko indicada, o None si no se unió a ninguno."""
+        return self._por_coingecko.get((id_coingecko, cotizado))
+
+    def vincular_coingecko(self, monedas: Dict[str, Dict]):
+        """Une cada activo base con su id de CoinGecko ({id: {'simbolo', 'cap_mercado', ...}}).
+        
+        Se hace una sola vez por carga del registro: hasta el próximo refresco de /exchangeInfo
+        las consultas por id no vuelven a comparar símbolos.
+        """
+        if self._vinculado or not monedas:
+            return
+        ids = ids_por_simbolo(monedas)
+        with self._lock:
+            if self._vinculado or not self._simbolos:
+                return
+            por_coingecko = {}
+            for info in self._simbolos.values():
+                info.id_coingecko = ids.get(info.base)
+                if info.id_coingecko is not None:
+                    por_coingecko[(info.id_coingecko, info.cotizado)] = info
+            self._por_coingecko = por_coingecko
+            self._vinculado = True
+
+    def separar(self, simbolo) -> Optional[Tuple[str, str]]:
+        """Devuelve (activo base, activo cotizado) internados de un par, o None si el activo cotizado es desconocido."""
+        info = self.obtener(simbolo)
+        if info is not None:
+            return info.base, info.cotizado
+        if simbolo in self._desconocidos:
+            return self._desconocidos[simbolo]
+        cotizado = next((cotizado for cotizado in COTIZADOS_CONOCIDOS
+                         if simbolo.endswith(cotizado) and len(simbolo) > len(cotizado)), None)
+        partes = None
+        if cotizado is not None:
+            partes = (sys.intern(simbolo[:len(simbolo) - len(cotizado)]), sys.intern(cotizado))
+        self._desconocidos[sys.intern(simbolo)] = partes
+        return partes
+
+    def operable(self, simbolo) -> bool:
+        """Si el par se puede operar. Sin registro cargado no se descarta ninguno."""
+        info = self.obtener(simbolo)
+        if info is None:
+            return not self._simbolos
+        return info.operable
+
+    def operables(self, cotizado="USDT") -> Optional[frozenset]:
+        """Símbolos en TRADING contra `cotizado`, o None si el registro todavía no tiene pares."""
+        self._revisar()
+        simbolos = self._simbolos
+        if not simbolos:
+            return None
+        pares = self._operables.get(cotizado)
+        if pares is None:
+            pares = frozenset(info.simbolo for info in simbolos.values()
+                              if info.cotizado == cotizado and info.operable)
+            self._operables[cotizado] = pares
+        return pares
+
+
+_registro = None
+_lock_registro = threading.Lock()
+
+
+def obtener_registro_simbolos() -> RegistroSimbolos:
+    """Devuelve el registro compartido, creándolo en el primer uso."""
+    global _registro
+    with _lock_registro:
+        if _registro is None:
+            _registro = RegistroSimbolos(obtener_exchange_info)
+    return _registro
@@ -0,0 +1,188 @@
+"""
+Este archivo contiene el modo streaming de datos de mercado:
+
+- Conexión a los streams combinados de Binance (!miniTicker@arr y velas de 1h)
+- Estado de cotizaciones en memoria que se actualiza en el lugar, solo de los pares USDT operables
+- Reconexión automática, resuscripción y resincronización por REST tras cortes
+"""
+
+import itertools
+import json
+import random
+import threading
+
+from websockets.sync.client import connect
+
+import config
+from api.cinta import obtener_grabador
+from api.consulta_api_datos import obtener_tickers_24h
+from api.registro_simbolos import obtener_registro_simbolos
+
+
+class StreamMercado:
+    """Mantiene cotizaciones en memoria a partir de los streams de Binance."""
+
+    def __init__(self, url_base=None, al_actualizar=None):
+        self.url_base = url_base or config.URL_STREAM_BINANCE
+        self.al_actualizar = al_actualizar
+        self.cotizaciones = {}  # simbolo -> {'precio', 'apertura_24h', 'cambio_24h', 'volumen_24h'}
+        self.velas_1h = {}  # simbolo -> {'apertura', 'cierre', 'tiempo_apertura', 'cerrada'}
+        self.conectado = False
+        self.grabador = obtener_grabador()
+        self._simbolos_velas = set()
+        self._conexion = None
+        self._hilo = None
+        self._detener = threading.Event()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def iniciar(self):
+        """Lanza el hilo del stream si no está activo."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        """Cierra la conexión y termina el hilo del stream."""
+        self._detener.set()
+        conexion = self._conexion
+        if conexion is not None:
+            try:
+                conexion.close()
+            except Exception:
+                pass
+
+    def suscribir_velas(self, simbolos):
+        """Ajusta las suscripciones de velas de 1h a los símbolos visibles."""
+        nuevos = {simbolo.lower() for simbolo in simbolos}
+        with self._lock:
+            altas = nuevos - self._simbolos_velas
+            bajas = self._simbolos_velas - nuevos
+            self._simbolos_velas = nuevos
+
+        # Sin conexión las suscripciones se aplican al reconectar
+        if self._conexion is None:
+            return
+        try:
+            if bajas:
+                self._enviar("UNSUBSCRIBE", [f"{s}@kline_1h" for s in bajas])
+            if altas:
+                self._enviar("SUBSCRIBE", [f"{s}@kline_1h" for s in altas])
+        except Exception as e:
+            print(f"Error al actualizar suscripciones: {e}")
+
+    def _enviar(self, metodo, streams):
+        mensaje = {"method": metodo, "params": sorted(streams), "id": next(self._ids)}
+        self._conexion.send(json.dumps(mensaje))
+
+    def _url_streams(self):
+        with self._lock:
+            streams = [config.STREAM_TICKERS] + [f"{s}@kline_1h" for s in sorted(self._simbolos_velas)]
+        return f"{self.url_base}/stream?streams={'/'.join(streams)}"
+
+    def _bucle(self):
+        """Hilo principal: conecta, resincroniza y procesa mensajes hasta detenerse."""
+        intento = 0
+        while not self._detener.is_set():
+            try:
+                with connect(self._url_streams(), open_timeout=config.TIMEOUT_CONEXION) as conexion:
+                    self._conexion = conexion
+                    self.conectado = True
+                    intento = 0
+                    # Lo ocurrido durante el corte se recupera por REST
+                    self._resincronizar()
+                    while not self._detener.is_set():
+                        mensaje = conexion.recv(timeout=config.TIMEOUT_STREAM)
+                        self._procesar(mensaje)
+            except Exception as e:
+                if not self._detener.is_set():
+                    print(f"Stream desconectado: {e}")
+            finally:
+                self._conexion = None
+                self.conectado = False
+
+            if self._detener.is_set():
+                break
+            espera = random.uniform(0, min(config.ESPERA_MAXIMA_REINTENTO, config.ESPERA_BASE_REINTENTO * 2 ** intento))
+            intento += 1
+            self._detener.wait(espera)
+
+    def _resincronizar(self):
+        """Recarga el estado completo desde /ticker/24hr."""
+        simbolos, columnas = obtener_tickers_24h(operables=obtener_registro_simbolos().operables())
+        if not simbolos:
+            return
+        filas = zip(simbolos, *(columnas[campo].tolist() for campo in ('precio', 'apertura', 'cambio_24h', 'volumen_24h')))
+        with self._lock:
+            for simbolo, precio, apertura, cambio, volumen in filas:
+                self.cotizaciones[simbolo] = {
+                    'precio': precio,
+                    'apertura_24h': apertura,
+                    'cambio_24h': cambio,
+                    'volumen_24h': volumen,
+                }
+        if self.al_actualizar:
+            self.al_actualizar(set(simbolos))
+
+    def _procesar(self, mensaje):
+        """Aplica un mensaje del stream combinado al estado en memoria."""
+        if self.grabador is not None:
+            self.grabador.grabar_frame(mensaje)
+        datos = json.loads(mensaje)
+        if 'stream' not in datos:
+            # Respuestas a SUBSCRIBE/UNSUBSCRIBE
+            return
+        carga = datos['data']
+        if isinstance(carga, list):
+            cambiados = self._aplicar_tickers(carga)
+        elif carga.get('e') == 'kline':
+            cambiados = self._aplicar_vela(carga)
+        else:
+            return
+        if cambiados and self.al_actualizar:
+            self.al_actualizar(cambiados)
+
+    def _aplicar_tickers(self, tickers):
+        cambiados = set()
+        operables = obtener_registro_simbolos().operables()
+        # Sin el registro de símbolos los pares se reconocen por el sufijo
+        aceptar = operables.__contains__ if operables is not None else (lambda simbolo: simbolo.endswith('USDT'))
+        with self._lock:
+            for ticker in tickers:
+                simbolo = ticker['s']
+                if not aceptar(simbolo):
+                    continue
+                precio = float(ticker['c'])
+                apertura = float(ticker['o'])
+                cotizacion = self.cotizaciones.setdefault(simbolo, {})
+                cotizacion['precio'] = precio
+                cotizacion['apertura_24h'] = apertura
+                cotizacion['cambio_24h'] = round((precio - apertura) / apertura * 100, 2) if apertura else 0.0
+                cotizacion['volumen_24h'] = float(ticker['q'])
+                cambiados.add(simbolo)
+        return cambiados
+
+    def _aplicar_vela(self, evento):
+        vela = evento['k']
+        simbolo = vela['s']
+        with self._lock:
+            self.velas_1h[simbolo] = {
+                'apertura': float(vela['o']),
+                'cierre': float(vela['c']),
+                'tiempo_apertura': vela['t'],
+                'cerrada': vela['x'],
+            }
+            cotizacion = self.cotizaciones.setdefault(simbolo, {})
+            cotizacion['precio'] = float(vela['c'])
+        return {simbolo}
+
+    def obtener_cotizacion(self, simbolo):
+        """Devuelve una copia de la cotización y el cambio de 1h de un símbolo."""
+        with self._lock:
+            cotizacion = dict(self.cotizaciones.get(simbolo, {}))
+            vela = self.velas_1h.get(simbolo)
+        if vela and vela['apertura']:
+            cotizacion['cambio_1h'] = round((vela['cierre'] - vela['apertura']) / vela['apertura'] * 100, 2)
+        return cotizacion
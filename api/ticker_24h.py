@@ -0,0 +1,71 @@
+"""
+Este archivo contiene el parser por bloques de /ticker/24hr:
+
+- Recorre el cuerpo de la respuesta a medida que llega y decodifica solo los objetos completos de cada bloque
+- La memoria pico es la de un bloque de tickers, no la de la lista entera de dicts
+- Descarta los pares que no cotizan contra el sufijo pedido o que el registro de símbolos no da por operables
+- Copia solo los campos que usa la aplicación
+- Sirve para las respuestas FULL y MINI: el cambio y el VWAP se derivan de los campos de MINI
+"""
+
+import json
+from typing import Container, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Campo de la respuesta MINI -> columna del contenedor de cotizaciones
+CAMPOS_MINI = {
+    'lastPrice': 'precio',
+    'openPrice': 'apertura',
+    'highPrice': 'maximo',
+    'lowPrice': 'minimo',
+    'volume': 'volumen_base',
+    'quoteVolume': 'volumen_24h',
+}
+
+
+def parsear_tickers(bloques: Iterable[bytes], sufijo="USDT",
+                    operables: Optional[Container[str]] = None) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Lee el arreglo JSON de /ticker/24hr por bloques y devuelve los símbolos con sus columnas: precio,
+    apertura, maximo, minimo, vwap, cambio_24h y volumen_24h. Con `operables` se conservan los
+    símbolos que están en ese conjunto; sin él, los que terminan en `sufijo`.
+    """
+    # Sin el registro de símbolos los pares se reconocen por el sufijo
+    aceptar = operables.__contains__ if operables is not None else (lambda simbolo: simbolo.endswith(sufijo))
+    simbolos = []
+    crudos = {campo: [] for campo in CAMPOS_MINI}
+    resto = b""
+    for bloque in bloques:
+        datos = resto + bloque if resto else bloque
+        # Los tickers son objetos planos: del primer "{" al último "}" solo hay objetos completos
+        inicio = datos.find(b"{")
+        fin = datos.rfind(b"}") + 1
+        if inicio < 0 or fin <= inicio:
+            resto = datos
+            continue
+        for ticker in json.loads(b"[" + datos[inicio:fin] + b"]"):
+            simbolo = ticker.get("symbol", "")
+            if not aceptar(simbolo):
+                continue
+            simbolos.append(simbolo)
+            for campo, valores in crudos.items():
+                valores.append(ticker[campo])
+        resto = datos[fin:]
+    return simbolos, columnas_desde_crudos(crudos)
+
+
+def columnas_desde_crudos(crudos: Dict[str, Sequence[str]]) -> Dict[str, np.ndarray]:
+    """Convierte los textos numéricos a columnas y deriva el cambio de 24h y el VWAP."""
+    columnas = {
+        CAMPOS_MINI[campo]: np.fromiter(map(float, valores), dtype=np.float64, count=len(valores))
+        for campo, valores in crudos.items()
+    }
+    apertura = columnas['apertura']
+    precio = columnas['precio']
+    volumen_base = columnas.pop('volumen_base')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columnas['cambio_24h'] = np.where(apertura > 0, (precio - apertura) / apertura * 100, 0.0)
+        # El precio promedio ponderado de 24h es el volumen en USDT sobre el volumen en la moneda
+        columnas['vwap'] = np.where(volumen_base > 0, columnas['volumen_24h'] / volumen_base, precio)
+    return columnas
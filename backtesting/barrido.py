@@ -0,0 +1,57 @@
+"""
+Este archivo contiene el barrido de parámetros del backtesting:
+
+- Grilla de parámetros repartida en un pool de procesos
+- Velas en memoria compartida: los workers las leen sin recibirlas serializadas
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+
+from backtesting.motor_backtesting import backtest_cruce_medias
+
+# Estado de cada worker, inicializado una vez por proceso
+_memoria = None
+_cierres = None
+_acumulada = None
+
+
+def _inicializar_worker(nombre, largo):
+    """Se conecta a la memoria compartida y precalcula la suma acumulada."""
+    global _memoria, _cierres, _acumulada
+    _memoria = shared_memory.SharedMemory(name=nombre)
+    _cierres = np.ndarray((largo,), dtype=np.float64, buffer=_memoria.buf)
+    _acumulada = np.concatenate(([0.0], np.cumsum(_cierres)))
+
+
+def _evaluar_lote(celdas):
+    return [backtest_cruce_medias(_cierres, rapida, lenta, _acumulada) for rapida, lenta in celdas]
+
+
+def grilla_cruce_medias(rapidas, lentas):
+    """Combinaciones válidas (rápida menor que lenta)."""
+    return [(rapida, lenta) for rapida in rapidas for lenta in lentas if rapida < lenta]
+
+
+def barrer_parametros(cierres, celdas, procesos=None, tamano_lote=16) -> List[Dict]:
+    """Evalúa cada celda de la grilla en paralelo y devuelve los resultados por retorno."""
+    procesos = procesos or os.cpu_count() or 1
+    cierres = np.ascontiguousarray(cierres, dtype=np.float64)
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, cierres.nbytes))
+    try:
+        np.ndarray(cierres.shape, dtype=np.float64, buffer=memoria.buf)[:] = cierres
+        lotes = [celdas[i:i + tamano_lote] for i in range(0, len(celdas), tamano_lote)]
+        resultados = []
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_worker,
+                                 initargs=(memoria.name, len(cierres))) as ejecutor:
+            for lote in ejecutor.map(_evaluar_lote, lotes):
+                resultados.extend(lote)
+    finally:
+        memoria.close()
+        memoria.unlink()
+    resultados.sort(key=lambda resultado: resultado['retorno'], reverse=True)
+    return resultados
@@ -0,0 +1,57 @@
+"""
+Benchmark del backtesting:
+
+- Barrido de la grilla de cruce de medias sobre velas sintéticas
+- Reporta velas procesadas por segundo, en total y por núcleo
+
+Uso:
+    python -m benchmarks.bench_backtesting --velas 500000 --procesos 4
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from backtesting.barrido import barrer_parametros, grilla_cruce_medias
+
+
+def ejecutar(velas=500_000, procesos=None, semilla=42):
+    """Corre el barrido y devuelve las métricas medidas."""
+    procesos = procesos or os.cpu_count() or 1
+    azar = np.random.default_rng(semilla)
+    cierres = 100 * np.exp(np.cumsum(azar.normal(0, 0.001, velas)))
+    celdas = grilla_cruce_medias(range(5, 55, 5), range(20, 220, 20))
+
+    inicio = time.perf_counter()
+    resultados = barrer_parametros(cierres, celdas, procesos)
+    total = time.perf_counter() - inicio
+
+    velas_procesadas = velas * len(celdas)
+    return {
+        "celdas": len(celdas),
+        "procesos": procesos,
+        "segundos": total,
+        "velas_por_segundo": velas_procesadas / total,
+        "velas_por_segundo_por_nucleo": velas_procesadas / total / procesos,
+        "mejor": resultados[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del backtesting")
+    parser.add_argument("--velas", type=int, default=500_000)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.velas, args.procesos)
+    print(f"Celdas: {resultado['celdas']} en {resultado['procesos']} procesos ({resultado['segundos']:.2f} s)")
+    print(f"Velas/s: {resultado['velas_por_segundo']:,.0f}")
+    print(f"Velas/s por núcleo: {resultado['velas_por_segundo_por_nucleo']:,.0f}")
+    mejor = resultado['mejor']
+    print(f"Mejor: rápida={mejor['rapida']} lenta={mejor['lenta']} retorno={mejor['retorno']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark del refresco de cotizaciones y de la tabla:
+
+- obtener_datos_cotizacion de punta a punta contra fixtures, con N = 20/50/100/400
+- cambio_porcentual vectorizado y las funciones formatear_*
+- Parser por bloques de /ticker/24hr con las respuestas FULL y MINI
+- crear_tabla_cotizaciones en un contexto de dearpygui sin ventana
+- Mantenimiento de los índices de orden con actualizaciones del stream
+- Reporta throughput, latencias p50/p99 y RSS pico; guarda JSON y compara con una línea base
+
+Uso:
+    python -m benchmarks.bench_cotizaciones --salida resultados.json
+    python -m benchmarks.bench_cotizaciones --base benchmarks/base.json  # falla si hay regresiones
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+
+import dearpygui.dearpygui as dpg
+
+import config
+from api import almacen_velas, consulta_api_datos, registro_simbolos
+from api.cache_coingecko import CacheCoinGecko
+from api.cliente_http import cliente_http
+from api.limitador_peso import LimitadorPeso
+from api.registro_simbolos import RegistroSimbolos
+from api.ticker_24h import parsear_tickers
+from benchmarks.fixtures_mercado import generar_mercado, generar_velas, montar_fixtures, vista_mini
+from benchmarks.medicion import comparar_con_base, guardar_resultados, medir
+from interfaz.cotizaciones.metricas import cambio_porcentual, matriz_cierres
+from interfaz.cotizaciones.modelo_cotizaciones import (CAMPOS_STREAM, formatear_porcentaje, formatear_precio,
+                                                       formatear_volumen, obtener_datos_cotizacion)
+from interfaz.cotizaciones.vista_cotizaciones import actualizar_orden_tabla, crear_tabla_cotizaciones, ordenar_tabla
+
+TAMANOS = (20, 50, 100, 400)
+LOTE_FUNCIONES = 10_000
+
+
+def preparar_entorno(directorio):
+    """Redirige las APIs a las fixtures y el almacenamiento a un directorio temporal."""
+    montar_fixtures(cliente_http.sesion)
+    # Sin red no hay peso que cuidar: el limitador no debe frenar la medición
+    consulta_api_datos.limitador_binance = LimitadorPeso(capacidad=10 ** 12)
+    config.RUTA_ALMACEN_VELAS = ":memory:"
+    config.PAGINAS_COINGECKO = max(TAMANOS) // 100
+    reiniciar_caches(directorio)
+
+
+def reiniciar_caches(directorio):
+    """Empieza con el almacén de velas, la caché de CoinGecko y el registro de símbolos vacíos."""
+    almacen_velas._almacen = None
+    registro_simbolos._registro = RegistroSimbolos(consulta_api_datos.obtener_exchange_info,
+                                                   ruta=f"{directorio}/simbolos.json")
+    consulta_api_datos.cache_coingecko = CacheCoinGecko(
+        consulta_api_datos.obtener_pagina_coingecko, ruta=f"{directorio}/coingecko.json")
+
+
+def bench_refresco(directorio, repeticiones):
+    """Refresco completo en frío (cachés vacías) y en régimen (velas en curso ya conocidas)."""
+    resultados = {}
+    for limite in TAMANOS:
+        resultados[f"refresco_frio_n{limite}"] = medir(
+            lambda: obtener_datos_cotizacion(limite), max(3, repeticiones // 4),
+            preparar=lambda: reiniciar_caches(directorio))
+        resultados[f"refresco_n{limite}"] = medir(lambda: obtener_datos_cotizacion(limite), repeticiones)
+    return resultados
+
+
+def bench_funciones():
+    """Funciones de cálculo y formato, medidas en lotes de LOTE_FUNCIONES llamadas."""
+    azar = random.Random(42)
+    # Una fila de cierres por par, como en calcular_metricas_velas
+    cierres = matriz_cierres([generar_velas("BTCUSDT", "1h", 25)] * LOTE_FUNCIONES, 25)
+    precios = [10 ** azar.uniform(-4, 5) for _ in range(LOTE_FUNCIONES)]
+    porcentajes = [azar.uniform(-20, 20) for _ in range(LOTE_FUNCIONES)]
+    volumenes = [10 ** azar.uniform(0, 11) for _ in range(LOTE_FUNCIONES)]
+
+    def lote(funcion, valores):
+        return lambda: [funcion(valor) for valor in valores]
+
+    return {
+        "cambio_porcentual": medir(lambda: cambio_porcentual(cierres, 24), 50, LOTE_FUNCIONES),
+        "formatear_precio": medir(lote(formatear_precio, precios), 50, LOTE_FUNCIONES),
+        "formatear_porcentaje": medir(lote(formatear_porcentaje, porcentajes), 50, LOTE_FUNCIONES),
+        "formatear_volumen": medir(lote(formatear_volumen, volumenes), 50, LOTE_FUNCIONES),
+    }
+
+
+def bench_ticker_24h(repeticiones, tamano_bloque=64 * 1024):
+    """Parseo de la respuesta de /ticker/24hr de 2000 pares, entregada en bloques como por la red."""
+    tickers = generar_mercado()
+    cuerpos = {
+        "full": json.dumps(tickers, separators=(",", ":")).encode("utf-8"),
+        "mini": json.dumps([vista_mini(ticker) for ticker in tickers], separators=(",", ":")).encode("utf-8"),
+    }
+
+    def parsear(cuerpo):
+        return lambda: parsear_tickers(cuerpo[i:i + tamano_bloque] for i in range(0, len(cuerpo), tamano_bloque))
+
+    return {f"ticker_24h_{tipo}": medir(parsear(cuerpo), repeticiones) for tipo, cuerpo in cuerpos.items()}
+
+
+def bench_tabla(repeticiones):
+    """Tabla completa desde cero y actualización diferencial con precios nuevos, sin ventana."""
+    formateadores = (formatear_precio, formatear_porcentaje, formatear_volumen)
+    resultados = {}
+    dpg.create_context()
+    try:
+        with dpg.window():
+            dpg.add_child_window(tag="contenedor_tabla")
+        for limite in TAMANOS:
+            datos = obtener_datos_cotizacion(limite)
+
+            def borrar_tabla():
+                if dpg.does_item_exist("tabla_cotizaciones"):
+                    dpg.delete_item("tabla_cotizaciones")
+
+            resultados[f"tabla_completa_n{limite}"] = medir(
+                lambda: crear_tabla_cotizaciones(datos, *formateadores), repeticiones, preparar=borrar_tabla)
+
+            def mover_precios():
+                for crypto in datos:
+                    crypto['precio'] *= 1.001
+                    crypto['cambio_24h'] = -crypto['cambio_24h']
+
+            resultados[f"tabla_diferencial_n{limite}"] = medir(
+                lambda: crear_tabla_cotizaciones(datos, *formateadores), repeticiones, preparar=mover_precios)
+
+            # Tabla ordenada por 24h%: cada mensaje del stream mueve unos pocos símbolos en el índice
+            ordenar_tabla('cambio_24h')
+            movidos = datos[:10]
+            simbolos = {crypto['simbolo'] for crypto in movidos}
+
+            def mover_algunos():
+                for crypto in movidos:
+                    crypto['precio'] *= 1.001
+                    crypto['cambio_24h'] += random.uniform(-1, 1)
+
+            resultados[f"orden_stream_n{limite}"] = medir(
+                lambda: actualizar_orden_tabla(simbolos, CAMPOS_STREAM), repeticiones, operaciones=len(movidos),
+                preparar=mover_algunos)
+            ordenar_tabla(None)
+    finally:
+        dpg.destroy_context()
+    return resultados
+
+
+def ejecutar(repeticiones=20):
+    """Corre todos los benchmarks y devuelve las métricas por nombre."""
+    with tempfile.TemporaryDirectory() as directorio:
+        preparar_entorno(directorio)
+        resultados = bench_funciones()
+        resultados.update(bench_ticker_24h(repeticiones))
+        resultados.update(bench_refresco(directorio, repeticiones))
+        resultados.update(bench_tabla(repeticiones))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del refresco de cotizaciones y de la tabla")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--salida", default="benchmarks/resultados_cotizaciones.json")
+    parser.add_argument("--base", help="JSON de una corrida anterior contra el cual comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="empeoramiento admitido (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.repeticiones)
+    print(f"{'Benchmark':<30} {'ops/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<30} {r['operaciones_por_segundo']:>12,.1f} {r['p50_ms']:>10.4f} "
+              f"{r['p99_ms']:>10.4f} {r['rss_pico_mb']:>8.1f}")
+    guardar_resultados(args.salida, resultados)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.base:
+        regresiones = comparar_con_base(resultados, args.base, args.tolerancia)
+        if regresiones:
+            print("Regresiones respecto de la línea base:")
+            for regresion in regresiones:
+                print(f"  {regresion}")
+            sys.exit(1)
+        print("Sin regresiones respecto de la línea base")
+
+
+if __name__ == "__main__":
+    main()
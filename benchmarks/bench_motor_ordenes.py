@@ -0,0 +1,77 @@
+"""
+Benchmark del motor de emparejamiento:
+
+- Muchos usuarios simulados enviando órdenes límite, de mercado, IOC y cancelaciones
+- Reporta órdenes por segundo y latencias p50/p99 por orden
+
+Uso:
+    python -m benchmarks.bench_motor_ordenes --ordenes 200000 --usuarios 1000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.medicion import percentil
+from simulador.motor_ordenes import COMPRA, IOC, LIMITE, MERCADO, VENTA, MotorOrdenes
+
+
+def ejecutar(ordenes=200_000, usuarios=1000, simbolos=4, semilla=42):
+    """Envía `ordenes` operaciones aleatorias y devuelve las métricas medidas."""
+    azar = random.Random(semilla)
+    precio_medio = {f"SIM{i}USDT": 100.0 * (i + 1) for i in range(simbolos)}
+    motor = MotorOrdenes(cotizacion_externa=precio_medio.get)
+    lista_simbolos = list(precio_medio)
+    abiertas = []
+    latencias = []
+
+    inicio = time.perf_counter()
+    for _ in range(ordenes):
+        simbolo = azar.choice(lista_simbolos)
+        usuario = f"u{azar.randrange(usuarios)}"
+        lado = COMPRA if azar.random() < 0.5 else VENTA
+        sorteo = azar.random()
+        # Precios alrededor del medio, del lado que no cruza con la contraparte simulada
+        desvio = azar.randint(1, 500) / 100
+        precio = precio_medio[simbolo] - desvio if lado == COMPRA else precio_medio[simbolo] + desvio
+
+        t0 = time.perf_counter_ns()
+        if sorteo < 0.15 and abiertas:
+            motor.cancelar_orden(abiertas.pop(azar.randrange(len(abiertas))))
+        elif sorteo < 0.20:
+            motor.enviar_orden(usuario, simbolo, lado, MERCADO, azar.uniform(0.1, 2))
+        elif sorteo < 0.30:
+            motor.enviar_orden(usuario, simbolo, lado, IOC, azar.uniform(0.1, 2), precio_medio[simbolo])
+        else:
+            resultado = motor.enviar_orden(usuario, simbolo, lado, LIMITE, azar.uniform(0.1, 2), round(precio, 2))
+            if resultado["pendiente"] > 0:
+                abiertas.append(resultado["id"])
+        latencias.append(time.perf_counter_ns() - t0)
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "ordenes": ordenes,
+        "ordenes_por_segundo": ordenes / total,
+        "p50_us": percentil(latencias, 50) / 1000,
+        "p99_us": percentil(latencias, 99) / 1000,
+        "ordenes_abiertas": len(motor.ordenes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de órdenes")
+    parser.add_argument("--ordenes", type=int, default=200_000)
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--simbolos", type=int, default=4)
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.ordenes, args.usuarios, args.simbolos)
+    print(f"Órdenes procesadas: {resultado['ordenes']}")
+    print(f"Órdenes/s: {resultado['ordenes_por_segundo']:,.0f}")
+    print(f"Latencia p50: {resultado['p50_us']:.1f} µs  p99: {resultado['p99_us']:.1f} µs")
+    print(f"Órdenes abiertas al final: {resultado['ordenes_abiertas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark del motor de portafolios:
+
+- Miles de cuentas simuladas con posiciones FIFO o de costo promedio sobre varios símbolos
+- Ejecuciones aplicadas una por una, como llegan del diario
+- Cotizaciones de un símbolo (stream) y del mercado entero (refresco) marcando solo las posiciones afectadas
+- Reporta ejecuciones y cotizaciones por segundo y latencias p50/p99
+
+Uso:
+    python -m benchmarks.bench_portafolio --cuentas 5000 --ejecuciones 200000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.medicion import percentil
+from simulador.portafolio import COSTO_PROMEDIO, FIFO, MotorPortafolio
+
+
+def ejecutar(cuentas=5000, ejecuciones=200_000, simbolos=50, cotizaciones=20_000, metodo=FIFO, semilla=42):
+    """Aplica `ejecuciones` y `cotizaciones` aleatorias y devuelve las métricas medidas."""
+    azar = random.Random(semilla)
+    precios = {f"SIM{i}USDT": 100.0 * (i + 1) for i in range(simbolos)}
+    lista_simbolos = list(precios)
+    # Todos los pares sintéticos cotizan contra USDT: no hace falta el registro de símbolos
+    motor = MotorPortafolio(metodo, separar=lambda simbolo: (simbolo[:-4], "USDT"))
+    motor.cargado = True
+
+    latencias_ejecucion = []
+    inicio = time.perf_counter()
+    for _ in range(ejecuciones):
+        simbolo = azar.choice(lista_simbolos)
+        operacion = {
+            "usuario": f"u{azar.randrange(cuentas)}",
+            "simbolo": simbolo,
+            "lado": "compra" if azar.random() < 0.55 else "venta",
+            "cantidad": azar.uniform(0.1, 2),
+            "precio": precios[simbolo] * azar.uniform(0.99, 1.01),
+            "comision": 0.01,
+        }
+        t0 = time.perf_counter_ns()
+        motor.agregar(operacion)
+        latencias_ejecucion.append(time.perf_counter_ns() - t0)
+    total_ejecuciones = time.perf_counter() - inicio
+
+    latencias_cotizacion = []
+    inicio = time.perf_counter()
+    for _ in range(cotizaciones):
+        simbolo = azar.choice(lista_simbolos)
+        precios[simbolo] *= azar.uniform(0.999, 1.001)
+        t0 = time.perf_counter_ns()
+        motor.actualizar_precios({simbolo: precios[simbolo]})
+        latencias_cotizacion.append(time.perf_counter_ns() - t0)
+    total_cotizaciones = time.perf_counter() - inicio
+
+    # Un refresco completo trae el precio de todos los pares a la vez
+    for simbolo in precios:
+        precios[simbolo] *= azar.uniform(0.99, 1.01)
+    t0 = time.perf_counter()
+    afectadas = motor.actualizar_precios(precios)
+    refresco_ms = (time.perf_counter() - t0) * 1000
+
+    latencias_ejecucion.sort()
+    latencias_cotizacion.sort()
+    return {
+        "cuentas": len(motor.cuentas),
+        "posiciones_abiertas": sum(len(abiertas) for abiertas in motor._abiertas.values()),
+        "ejecuciones_por_segundo": ejecuciones / total_ejecuciones,
+        "ejecucion_p50_us": percentil(latencias_ejecucion, 50) / 1000,
+        "ejecucion_p99_us": percentil(latencias_ejecucion, 99) / 1000,
+        "cotizaciones_por_segundo": cotizaciones / total_cotizaciones,
+        "cotizacion_p50_us": percentil(latencias_cotizacion, 50) / 1000,
+        "cotizacion_p99_us": percentil(latencias_cotizacion, 99) / 1000,
+        "refresco_ms": refresco_ms,
+        "cuentas_refresco": len(afectadas),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de portafolios")
+    parser.add_argument("--cuentas", type=int, default=5000)
+    parser.add_argument("--ejecuciones", type=int, default=200_000)
+    parser.add_argument("--simbolos", type=int, default=50)
+    parser.add_argument("--cotizaciones", type=int, default=20_000)
+    parser.add_argument("--metodo", choices=(FIFO, COSTO_PROMEDIO), default=FIFO)
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.cuentas, args.ejecuciones, args.simbolos, args.cotizaciones, args.metodo)
+    print(f"Cuentas: {resultado['cuentas']}  posiciones abiertas: {resultado['posiciones_abiertas']}")
+    print(f"Ejecuciones/s: {resultado['ejecuciones_por_segundo']:,.0f}  "
+          f"p50: {resultado['ejecucion_p50_us']:.1f} µs  p99: {resultado['ejecucion_p99_us']:.1f} µs")
+    print(f"Cotizaciones/s: {resultado['cotizaciones_por_segundo']:,.0f}  "
+          f"p50: {resultado['cotizacion_p50_us']:.1f} µs  p99: {resultado['cotizacion_p99_us']:.1f} µs")
+    print(f"Refresco de todo el mercado: {resultado['refresco_ms']:.1f} ms ({resultado['cuentas_refresco']} cuentas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Fixtures de mercado para los benchmarks:
+
+- Respuestas sintéticas y deterministas de /ticker/24hr (FULL, MINI y con symbols=), /exchangeInfo, /klines y /coins/markets
+- Transporte de requests que las sirve sin red ni límites de peso
+"""
+
+import json
+import math
+import random
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+from api.almacen_velas import DURACION_INTERVALOS
+
+# Campos de /ticker/24hr con type=MINI, en el orden de Binance
+CAMPOS_MINI = ("symbol", "openPrice", "highPrice", "lowPrice", "lastPrice", "volume", "quoteVolume",
+               "openTime", "closeTime", "firstId", "lastId", "count")
+SIMBOLO_INVALIDO = b'{"code":-1121,"msg":"Invalid symbol."}'
+
+
+def generar_mercado(pares=2000, semilla=42):
+    """Devuelve los tickers de 24h (respuesta FULL) de `pares` símbolos contra USDT y algunos contra BTC."""
+    azar = random.Random(semilla)
+    tickers = []
+    for i in range(pares):
+        cotizado = "BTC" if i % 10 == 9 else "USDT"
+        precio = 10 ** azar.uniform(-4, 4.5)
+        apertura = precio * azar.uniform(0.9, 1.1)
+        volumen = 10 ** azar.uniform(3, 9)
+        promedio = (precio + apertura) / 2
+        tickers.append({
+            "symbol": f"M{i:04d}{cotizado}",
+            "priceChange": f"{precio - apertura:.8f}",
+            "priceChangePercent": f"{(precio - apertura) / apertura * 100:.3f}",
+            "weightedAvgPrice": f"{promedio:.8f}",
+            "prevClosePrice": f"{apertura:.8f}",
+            "lastPrice": f"{precio:.8f}",
+            "lastQty": "1.00000000",
+            "bidPrice": f"{precio * 0.999:.8f}",
+            "bidQty": "10.00000000",
+            "askPrice": f"{precio * 1.001:.8f}",
+            "askQty": "10.00000000",
+            "openPrice": f"{apertura:.8f}",
+            "highPrice": f"{max(precio, apertura) * 1.02:.8f}",
+            "lowPrice": f"{min(precio, apertura) * 0.98:.8f}",
+            "volume": f"{volumen / promedio:.8f}",
+            "quoteVolume": f"{volumen:.2f}",
+            "openTime": 1700000000000,
+            "closeTime": 1700086399999,
+            "firstId": 1000 * i,
+            "lastId": 1000 * i + 999,
+            "count": 1000,
+        })
+    return tickers
+
+
+def vista_mini(ticker):
+    """Campos de un ticker en la respuesta con type=MINI."""
+    return {campo: ticker[campo] for campo in CAMPOS_MINI}
+
+
+def generar_exchange_info(tickers):
+    """Devuelve /exchangeInfo de los tickers; uno de cada 50 pares está suspendido (BREAK)."""
+    simbolos = []
+    for i, ticker in enumerate(tickers):
+        simbolo = ticker["symbol"]
+        cotizado = "BTC" if simbolo.endswith("BTC") else "USDT"
+        simbolos.append({
+            "symbol": simbolo,
+            "status": "BREAK" if i % 50 == 7 else "TRADING",
+            "baseAsset": simbolo[:-len(cotizado)],
+            "quoteAsset": cotizado,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.00000001", "maxPrice": "1000000.00000000",
+                 "tickSize": "0.00000001"},
+                {"filterType": "LOT_SIZE", "minQty": "0.00000100", "maxQty": "9000000.00000000",
+                 "stepSize": "0.00000100"},
+            ],
+        })
+    return {"timezone": "UTC", "serverTime": 1700086399999, "rateLimits": [], "symbols": simbolos}
+
+
+def generar_monedas(tickers, semilla=42):
+    """Devuelve la lista de /coins/markets ordenada por capitalización para los pares USDT."""
+    azar = random.Random(semilla)
+    monedas = []
+    for ticker in tickers:
+        if not ticker["symbol"].endswith("USDT"):
+            continue
+        simbolo = ticker["symbol"][:-4]
+        suministro = 10 ** azar.uniform(6, 11)
+        monedas.append({
+            "id": f"moneda-{simbolo.lower()}",
+            "symbol": simbolo.lower(),
+            "name": f"Moneda {simbolo}",
+            "market_cap": float(ticker["lastPrice"]) * suministro,
+            "circulating_supply": suministro,
+        })
+    monedas.sort(key=lambda moneda: moneda["market_cap"], reverse=True)
+    return monedas
+
+
+def generar_velas(simbolo, intervalo, limite, inicio=None):
+    """Devuelve velas deterministas que terminan con la vela en curso."""
+    duracion = DURACION_INTERVALOS[intervalo]
+    ahora = int(time.time() * 1000)
+    ultima = ahora - ahora % duracion
+    primera = ultima - (limite - 1) * duracion
+    if inicio is not None:
+        primera = max(inicio - inicio % duracion, primera)
+    base = 1 + sum(map(ord, simbolo)) % 1000
+    velas = []
+    for apertura_ms in range(primera, ultima + 1, duracion):
+        fase = apertura_ms / duracion
+        apertura = base * (1 + 0.02 * math.sin(fase / 3))
+        cierre = base * (1 + 0.02 * math.sin((fase + 1) / 3))
+        velas.append([
+            apertura_ms, f"{apertura:.8f}", f"{max(apertura, cierre) * 1.01:.8f}",
+            f"{min(apertura, cierre) * 0.99:.8f}", f"{cierre:.8f}", "1000.0",
+            apertura_ms + duracion - 1, "0", 100, "0", "0", "0",
+        ])
+    return velas
+
+
+class TransporteFixtures(BaseAdapter):
+    """Adaptador de requests que responde las consultas de la app con datos sintéticos."""
+
+    def __init__(self, pares=2000, semilla=42):
+        super().__init__()
+        tickers = generar_mercado(pares, semilla)
+        monedas = generar_monedas(tickers, semilla)
+        self._tickers = {ticker["symbol"]: ticker for ticker in tickers}
+        # Binance responde JSON compacto
+        self._ticker_24h = json.dumps(tickers, separators=(",", ":")).encode("utf-8")
+        self._ticker_24h_mini = json.dumps([vista_mini(ticker) for ticker in tickers], separators=(",", ":")).encode("utf-8")
+        self._exchange_info = json.dumps(generar_exchange_info(tickers), separators=(",", ":")).encode("utf-8")
+        self._paginas = [json.dumps(monedas[i:i + 100]).encode("utf-8") for i in range(0, len(monedas), 100)]
+        self.peticiones = 0
+
+    def send(self, request, **kwargs):
+        self.peticiones += 1
+        partes = urlsplit(request.url)
+        params = {clave: valores[0] for clave, valores in parse_qs(partes.query).items()}
+
+        estado = 200
+        if partes.path.endswith("/ticker/24hr"):
+            cuerpo = self._responder_ticker_24h(params)
+            if cuerpo is SIMBOLO_INVALIDO:
+                estado = 400
+        elif partes.path.endswith("/exchangeInfo"):
+            cuerpo = self._exchange_info
+        elif partes.path.endswith("/klines"):
+            inicio = int(params["startTime"]) if "startTime" in params else None
+            velas = generar_velas(params["symbol"], params["interval"], int(params["limit"]), inicio)
+            cuerpo = json.dumps(velas).encode("utf-8")
+        elif partes.path.endswith("/coins/markets"):
+            pagina = int(params.get("page", 1)) - 1
+            cuerpo = self._paginas[pagina] if pagina < len(self._paginas) else b"[]"
+        else:
+            cuerpo = None
+
+        respuesta = requests.Response()
+        respuesta.request = request
+        respuesta.url = request.url
+        respuesta.status_code = estado if cuerpo is not None else 404
+        respuesta._content = cuerpo or b"{}"
+        respuesta._content_consumed = True  # iter_content recorre _content en vez de leer de la red
+        respuesta.encoding = "utf-8"
+        return respuesta
+
+    def _responder_ticker_24h(self, params):
+        """Cuerpo de /ticker/24hr para todos los pares o los de `symbols`, FULL o MINI."""
+        mini = params.get("type") == "MINI"
+        if "symbols" not in params:
+            return self._ticker_24h_mini if mini else self._ticker_24h
+        simbolos = json.loads(params["symbols"])
+        if any(simbolo not in self._tickers for simbolo in simbolos):
+            return SIMBOLO_INVALIDO
+        tickers = [self._tickers[simbolo] for simbolo in simbolos]
+        return json.dumps([vista_mini(ticker) for ticker in tickers] if mini else tickers, separators=(",", ":")).encode("utf-8")
+
+    def close(self):
+        pass
+
+
+def montar_fixtures(sesion: requests.Session, pares=2000, semilla=42) -> TransporteFixtures:
+    """Hace que la sesión responda con las fixtures en vez de la red."""
+    transporte = TransporteFixtures(pares, semilla)
+    sesion.mount("https://", transporte)
+    sesion.mount("http://", transporte)
+    return transporte
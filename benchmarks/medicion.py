@@ -0,0 +1,85 @@
+"""
+Utilidades de medición compartidas por los benchmarks:
+
+- Percentiles de latencia y memoria residente pico del proceso
+- Resultados en JSON y comparación contra una línea base
+"""
+
+import json
+import platform
+import resource
+import sys
+import time
+
+
+def percentil(valores_ordenados, p):
+    indice = min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p / 100))
+    return valores_ordenados[indice]
+
+
+def rss_pico_mb():
+    """Memoria residente máxima del proceso hasta ahora, en MB."""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la informa en KB y macOS en bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def medir(funcion, repeticiones, operaciones=1, preparar=None):
+    """Ejecuta `funcion` varias veces y devuelve throughput, latencias y RSS pico.
+
+    `operaciones` es cuántas operaciones hace cada llamada, para medir
+    funciones muy rápidas en lotes; las latencias se informan por operación.
+    `preparar` se llama antes de cada repetición, fuera del tiempo medido.
+    """
+    latencias = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcion()
+        latencias.append((time.perf_counter() - inicio) / operaciones)
+    latencias.sort()
+    return {
+        "repeticiones": repeticiones,
+        "operaciones_por_segundo": 1 / (sum(latencias) / len(latencias)),
+        "p50_ms": percentil(latencias, 50) * 1000,
+        "p99_ms": percentil(latencias, 99) * 1000,
+        "rss_pico_mb": rss_pico_mb(),
+    }
+
+
+def describir_entorno():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "instante": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def guardar_resultados(ruta, resultados):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({"entorno": describir_entorno(), "resultados": resultados}, archivo, indent=2)
+
+
+def comparar_con_base(resultados, ruta_base, tolerancia=0.25):
+    """Devuelve la lista de regresiones respecto de la línea base guardada.
+
+    La p50 y el RSS pico fallan si empeoran más que `tolerancia`; la p99,
+    más ruidosa, tiene el doble de margen.
+    """
+    with open(ruta_base, encoding="utf-8") as archivo:
+        base = json.load(archivo)["resultados"]
+
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = base.get(nombre)
+        if anterior is None:
+            continue
+        for metrica, margen in (("p50_ms", tolerancia), ("p99_ms", 2 * tolerancia), ("rss_pico_mb", tolerancia)):
+            if metrica in anterior and actual[metrica] > anterior[metrica] * (1 + margen):
+                regresiones.append(
+                    f"{nombre}: {metrica} {anterior[metrica]:.3f} -> {actual[metrica]:.3f} "
+                    f"(+{(actual[metrica] / anterior[metrica] - 1) * 100:.0f}%)"
+                )
+    return regresiones
@@ -2,12 +2,79 @@
 INTERVALO_ACTUALIZACION = 30  # segundos
 ACTUALIZACION_AUTOMATICA_HABILITADA = True  # Estado inicial de la actualización automática
 LIMITE_CRIPTOMONEDAS_DEFAULT = 20  # Número predeterminado de criptomonedas a mostrar en cotizaciones
+MODO_MERCADO_COMPLETO = False  # Estado inicial del modo que muestra todos los pares USDT
+FILAS_VISIBLES_COTIZACIONES = 14  # Filas de widgets de la tabla; el resto se ve desplazando
+FILAS_POR_PASO_RUEDA = 3  # Filas que avanza la tabla por cada paso de la rueda del mouse
+FACTOR_INTERVALO_LATENCIA = 4  # El intervalo automático es al menos N veces la duración media de un refresco
+HOLGURA_PESO_MINIMA = 0.5  # Con menos peso disponible que esta fracción, el intervalo se estira
+FACTOR_MAXIMO_INTERVALO = 4  # Tope del intervalo adaptado, en veces el intervalo configurado
+PRESUPUESTO_UI_POR_CUADRO = 0.004  # segundos por cuadro para aplicar actualizaciones publicadas por otros hilos
+
+# Configuración de descargas concurrentes
+MAX_HILOS_DESCARGA = 32  # Peticiones de velas en paralelo
+PESO_MAXIMO_POR_MINUTO = 6000  # Límite de peso por IP de la API de Binance
+FRACCION_PESO_UTILIZABLE = 0.8  # Margen para no acercarse al baneo de IP
+PESO_VELAS = 2  # Peso de una petición a /klines
+PESO_TICKER_24H = 80  # Peso de /ticker/24hr sin símbolo o con más de 100
+PESO_TICKER_24H_HASTA_20 = 2  # Peso de /ticker/24hr con symbols= de 1 a 20 pares
+PESO_TICKER_24H_HASTA_100 = 40  # Peso de /ticker/24hr con symbols= de 21 a 100 pares
+PESO_PRECIO = 2  # Peso de /ticker/price con símbolo
+PESO_EXCHANGE_INFO = 20  # Peso de /exchangeInfo
+
+# Configuración del cliente HTTP
+TIMEOUT_CONEXION = 3.05  # segundos
+TIMEOUT_LECTURA = 10  # segundos
+MAX_REINTENTOS = 3
+ESPERA_BASE_REINTENTO = 0.5  # segundos, se duplica en cada intento
+ESPERA_MAXIMA_REINTENTO = 30  # segundos
+
+# Configuración del modo streaming
+MODO_STREAMING_HABILITADO = False  # Estado inicial del streaming por WebSocket
+URL_STREAM_BINANCE = "wss://stream.binance.com:9443"
+STREAM_TICKERS = "!miniTicker@arr"
+TIMEOUT_STREAM = 10  # segundos sin mensajes antes de considerar la conexión cortada
+INTERVALO_RESYNC_STREAMING = 300  # segundos entre recargas completas (ranking, 7d) con streaming
+
+# Configuración del simulador de trading
+COMISION_MAKER = 0.001  # 0.1% como en Binance spot
+COMISION_TAKER = 0.001
+USUARIO_LOCAL = "local"  # Usuario con el que opera la interfaz
+SALDO_INICIAL_USDT = 10000.0  # Saldo con el que arranca cada cuenta simulada
+OPERACIONES_POR_SNAPSHOT = 1000  # Operaciones del diario entre snapshots del portafolio
+INTERVALO_FSYNC = 1  # segundos entre fsync agrupados del diario
+FILAS_POR_PAGINA_HISTORIAL = 10  # Filas visibles por página en la ventana de Historial
+METODO_COSTO_PORTAFOLIO = "fifo"  # "fifo" (lotes) o "promedio" (costo promedio ponderado)
+FILAS_PORTAFOLIO = 5  # Posiciones visibles en la ventana de Portafolio
+
+# Configuración del gráfico
+INTERVALO_GRAFICO_DEFAULT = "1h"
+
+# Almacenamiento local
+RUTA_ALMACEN_VELAS = "datos/velas.sqlite3"
+RUTA_CACHE_COINGECKO = "datos/coingecko.json"
+RUTA_OPERACIONES = "datos/operaciones.json"  # Diario append-only, una operación por línea
+RUTA_PORTAFOLIO = "datos/portafolio.json"  # Último snapshot de saldos
+RUTA_SNAPSHOT_COTIZACIONES = "datos/cotizaciones.json"  # Última tabla de cotizaciones, para el primer cuadro
+RUTA_REGISTRO_SIMBOLOS = "datos/simbolos.json"  # Pares de /exchangeInfo
+
+# Cinta de mercado (grabación y reproducción sin red)
+RUTA_GRABACION_CINTA = None  # p. ej. "datos/mercado.cinta" para grabar respuestas REST y frames
+RUTA_REPRODUCCION_CINTA = None  # Si se define, las consultas REST se responden desde esta cinta
+VELOCIDAD_REPRODUCCION = 1.0  # 1 = tiempo real, N = N veces más rápido, 0 = sin esperas
+
+# Instrumentación de rendimiento
+RUTA_METRICAS_JSON = "datos/metricas.json"
+RUTA_METRICAS_PROMETHEUS = "datos/metricas.prom"  # Texto de Prometheus para un node_exporter textfile
+INTERVALO_EXPORTACION_METRICAS = 15  # segundos entre exportaciones
+INTERVALO_OVERLAY_RENDIMIENTO = 0.5  # segundos entre actualizaciones del overlay de rendimiento
+
+# Configuración de CoinGecko
+TTL_COINGECKO = 300  # segundos antes de refrescar una página en segundo plano
+TTL_REGISTRO_SIMBOLOS = 86400  # segundos antes de refrescar /exchangeInfo en segundo plano
+PAGINAS_COINGECKO = 1  # Páginas de 100 monedas a consultar
 
 ANCHO_VENTANA = 1728
 ALTO_VENTANA = 972
 
 datos_cotizaciones = []
-actualizando = False
-auto_actualizacion = True
-hilo_auto_actualizacion = None
-detener_auto_actualizacion = False
\ No newline at end of file
+stream_mercado = None
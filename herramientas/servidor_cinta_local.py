@@ -0,0 +1,71 @@
+"""
+Este archivo contiene un servidor HTTP local que reemplaza a las APIs REST:
+
+- Responde cada petición con la respuesta grabada en una cinta de mercado
+- Respeta los tiempos originales, acelerados N veces o sin esperas
+- Sirve Binance y CoinGecko a la vez, ya que la cinta guarda ruta y parámetros
+
+Uso:
+    python -m herramientas.servidor_cinta_local datos/mercado.cinta --puerto 8080 --velocidad 0
+
+Para conectar la aplicación, cambiar BINANCE_API y COINGECKO_API en
+api/consulta_api_datos.py a http://127.0.0.1:8080/api/v3
+"""
+
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.cinta import RESPUESTA_SIN_GRABACION, LectorCinta, TransporteCinta, clave_peticion
+
+
+def crear_manejador(transporte: TransporteCinta):
+    """Crea la clase manejadora que responde desde la cinta."""
+
+    class ManejadorCinta(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            registro = transporte.siguiente(clave_peticion(self.path))
+            if registro is None:
+                estado, cabeceras, cuerpo = 404, {"Content-Type": "application/json"}, RESPUESTA_SIN_GRABACION
+            else:
+                estado, cabeceras, cuerpo = registro["estado"], registro["cabeceras"], registro["cuerpo"].encode("utf-8")
+            self.send_response(estado)
+            for nombre, valor in cabeceras.items():
+                self.send_header(nombre, valor)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    return ManejadorCinta
+
+
+def iniciar_servidor(ruta, host="127.0.0.1", puerto=8080, velocidad=1.0):
+    """Inicia el servidor en un hilo y lo devuelve para poder cerrarlo."""
+    transporte = TransporteCinta(LectorCinta(ruta), velocidad)
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(transporte))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP local que reproduce una cinta de mercado")
+    parser.add_argument("cinta")
+    parser.add_argument("--puerto", type=int, default=8080)
+    parser.add_argument("--velocidad", type=float, default=1.0, help="0 = sin esperas")
+    args = parser.parse_args()
+
+    lector = LectorCinta(args.cinta)
+    servidor = ThreadingHTTPServer(("127.0.0.1", args.puerto), crear_manejador(TransporteCinta(lector, args.velocidad)))
+    servidor.daemon_threads = True
+    print(f"Reproduciendo {len(lector)} registros en http://127.0.0.1:{args.puerto}")
+    servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Este archivo contiene un servidor WebSocket local que reemplaza a Binance:
+
+- Graba frames reales de los streams combinados a un archivo JSONL
+- Reproduce esos frames respetando los tiempos originales (o acelerados)
+- Atiende SUBSCRIBE/UNSUBSCRIBE y solo envía los streams suscriptos
+
+Uso:
+    python -m herramientas.servidor_stream_local grabar frames.jsonl --segundos 60
+    python -m herramientas.servidor_stream_local reproducir frames.jsonl --puerto 8765
+    python -m herramientas.servidor_stream_local reproducir datos/mercado.cinta --velocidad 10
+
+Para conectar la aplicación, cambiar config.URL_STREAM_BINANCE a ws://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect
+from websockets.sync.server import serve
+
+import config
+from api.cinta import MAGIA, LectorCinta
+
+# Segundos entre vueltas de la grabación cuando una vuelta no envió ningún frame (nada suscripto)
+PAUSA_SIN_ENVIOS = 0.5
+
+
+def grabar_frames(archivo, segundos=60, streams=None):
+    """Graba los frames recibidos del stream combinado con su instante relativo."""
+    streams = streams or [config.STREAM_TICKERS, "btcusdt@kline_1h", "ethusdt@kline_1h"]
+    url = f"{config.URL_STREAM_BINANCE}/stream?streams={'/'.join(streams)}"
+    inicio = time.monotonic()
+    with connect(url) as conexion, open(archivo, "w", encoding="utf-8") as salida:
+        while time.monotonic() - inicio < segundos:
+            mensaje = conexion.recv(timeout=config.TIMEOUT_STREAM)
+            registro = {"t": round(time.monotonic() - inicio, 3), "frame": json.loads(mensaje)}
+            salida.write(json.dumps(registro) + "\n")
+
+
+def cargar_frames(archivo):
+    """Lee una grabación JSONL o una cinta de mercado y devuelve la lista de (instante, frame)."""
+    with open(archivo, "rb") as entrada:
+        es_cinta = entrada.read(len(MAGIA)) == MAGIA
+    if es_cinta:
+        lector = LectorCinta(archivo)
+        frames = [(instante, json.loads(registro["frame"])) for instante, registro in lector.registros(tipo="ws")]
+        inicio = frames[0][0] if frames else 0.0
+        return [(instante - inicio, frame) for instante, frame in frames]
+    with open(archivo, encoding="utf-8") as entrada:
+        registros = [json.loads(linea) for linea in entrada if linea.strip()]
+    return [(registro["t"], registro["frame"]) for registro in registros]
+
+
+def crear_manejador(frames, velocidad=1.0, repetir=True):
+    """Crea el manejador de conexiones que reproduce la grabación."""
+
+    def manejador(conexion):
+        if not frames:
+            # Sin frames el bucle de repetición daría vueltas sin esperar nunca
+            return
+        consulta = parse_qs(urlparse(conexion.request.path).query)
+        suscriptos = set("/".join(consulta.get("streams", [])).split("/")) - {""}
+        lock = threading.Lock()
+        cerrada = threading.Event()
+
+        def atender_mensajes():
+            try:
+                for mensaje in conexion:
+                    pedido = json.loads(mensaje)
+                    with lock:
+                        if pedido.get("method") == "SUBSCRIBE":
+                            suscriptos.update(pedido.get("params", []))
+                        elif pedido.get("method") == "UNSUBSCRIBE":
+                            suscriptos.difference_update(pedido.get("params", []))
+                    conexion.send(json.dumps({"result": None, "id": pedido.get("id")}))
+            except ConnectionClosed:
+                pass
+            finally:
+                cerrada.set()
+
+        threading.Thread(target=atender_mensajes, daemon=True).start()
+
+        try:
+            while True:
+                inicio = time.monotonic()
+                enviados = 0
+                for instante, frame in frames:
+                    if velocidad > 0:
+                        espera = instante / velocidad - (time.monotonic() - inicio)
+                        if espera > 0:
+                            time.sleep(espera)
+                    stream = frame.get("stream", "")
+                    with lock:
+                        enviar = stream.startswith("!") or stream in suscriptos
+                    if enviar:
+                        conexion.send(json.dumps(frame))
+                        enviados += 1
+                if not repetir:
+                    break
+                if not enviados and (velocidad <= 0 or frames[-1][0] <= 0):
+                    # Una vuelta sin envíos ni esperas: se espera a que el cliente se suscriba o se vaya
+                    if cerrada.wait(PAUSA_SIN_ENVIOS):
+                        break
+        except ConnectionClosed:
+            pass
+
+    return manejador
+
+
+def iniciar_servidor(frames, host="127.0.0.1", puerto=8765, velocidad=1.0, repetir=True):
+    """Inicia el servidor en un hilo y lo devuelve para poder cerrarlo."""
+    servidor = serve(crear_manejador(frames, velocidad, repetir), host, puerto)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de streams de Binance")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    grabar = subcomandos.add_parser("grabar")
+    grabar.add_argument("archivo")
+    grabar.add_argument("--segundos", type=float, default=60)
+
+    reproducir = subcomandos.add_parser("reproducir")
+    reproducir.add_argument("archivo")
+    reproducir.add_argument("--puerto", type=int, default=8765)
+    reproducir.add_argument("--velocidad", type=float, default=1.0, help="0 = sin esperas")
+
+    args = parser.parse_args()
+    if args.comando == "grabar":
+        grabar_frames(args.archivo, args.segundos)
+        return
+
+    frames = cargar_frames(args.archivo)
+    if not frames:
+        print(f"{args.archivo} no tiene frames para reproducir")
+        return
+    with serve(crear_manejador(frames, args.velocidad), "127.0.0.1", args.puerto) as servidor:
+        print(f"Reproduciendo {len(frames)} frames en ws://127.0.0.1:{args.puerto}")
+        servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
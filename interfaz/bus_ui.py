@@ -0,0 +1,100 @@
+"""
+Este archivo contiene el bus de actualizaciones de la interfaz:
+
+- Los hilos de trabajo (refresco, stream, timers) publican lotes de actualizaciones en vez de tocar dearpygui
+- El bucle de render de iniciar_ui aplica lotes enteros entre cuadro y cuadro, con un presupuesto de tiempo por cuadro
+- Una actualización nueva de la misma clave reemplaza a la pendiente: solo se aplica la última
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Hashable, Iterable, Optional, Tuple
+
+import config
+from api.instrumentacion import registro_metricas
+
+# (clave, función, argumentos); clave None = no se reemplaza con otras
+Actualizacion = Tuple[Optional[Hashable], Callable, tuple]
+
+
+class BusUI:
+    """Cola de lotes de actualizaciones de la interfaz que se vacía en el hilo de render."""
+
+    def __init__(self):
+        self._lotes = OrderedDict()  # id de lote -> OrderedDict(clave -> (función, argumentos))
+        self._lote_de = {}  # clave -> id del lote pendiente que la tiene
+        self._lock = threading.Lock()
+        self._anonimas = count()
+        self._ids = count()
+
+    def __len__(self):
+        return len(self._lote_de)
+
+    def publicar(self, clave: Optional[Hashable], funcion: Callable, *args):
+        """Publica una actualización; reemplaza a la pendiente con la misma clave."""
+        self.publicar_lote(((clave, funcion, args),))
+
+    def publicar_lote(self, lote: Iterable[Actualizacion]):
+        """Publica varias actualizaciones juntas: el hilo de render no ve el lote a medias.
+
+        Los lotes pendientes que comparten alguna clave con el nuevo se funden con él, así
+        sus otras actualizaciones se siguen aplicando en el mismo cuadro que la más reciente.
+        """
+        lote = tuple(lote)
+        reemplazadas = 0
+        with self._lock:
+            entradas = []
+            for clave, funcion, args in lote:
+                if clave is None:
+                    clave = ("anonima", next(self._anonimas))
+                entradas.append((clave, (funcion, tuple(args))))
+            absorbidos = {self._lote_de[clave] for clave, _ in entradas if clave in self._lote_de}
+            fusion = OrderedDict()
+            for id_lote in [id_lote for id_lote in self._lotes if id_lote in absorbidos]:
+                fusion.update(self._lotes.pop(id_lote))
+            for clave, actualizacion in entradas:
+                if clave in fusion:
+                    # Se mueve al final para respetar el orden con las publicadas entre medio
+                    del fusion[clave]
+                    reemplazadas += 1
+                fusion[clave] = actualizacion
+            id_lote = next(self._ids)
+            self._lotes[id_lote] = fusion
+            for clave in fusion:
+                self._lote_de[clave] = id_lote
+        if reemplazadas:
+            registro_metricas.sumar("ui_actualizaciones_reemplazadas_total", reemplazadas)
+
+    def procesar(self, presupuesto=None) -> int:
+        """
+        Aplica lotes enteros en orden hasta agotar el presupuesto (segundos), que se revisa solo
+        entre lotes. Siempre aplica al menos uno, y los que no entran quedan para el cuadro
+        siguiente. Devuelve las actualizaciones aplicadas. Solo en el hilo de render.
+        """
+        presupuesto = config.PRESUPUESTO_UI_POR_CUADRO if presupuesto is None else presupuesto
+        inicio = time.perf_counter()
+        aplicadas = 0
+        while True:
+            with self._lock:
+                if not self._lotes:
+                    break
+                _, lote = self._lotes.popitem(last=False)
+                for clave in lote:
+                    del self._lote_de[clave]
+            for funcion, args in lote.values():
+                try:
+                    funcion(*args)
+                except Exception as e:
+                    print(f"Error al aplicar actualización de interfaz: {e}")
+            aplicadas += len(lote)
+            if time.perf_counter() - inicio >= presupuesto:
+                break
+        if aplicadas:
+            registro_metricas.observar("ui_bus_segundos", time.perf_counter() - inicio)
+        return aplicadas
+
+
+bus_ui = BusUI()
+registro_metricas.registrar_medidor("ui_actualizaciones_pendientes", lambda: len(bus_ui))
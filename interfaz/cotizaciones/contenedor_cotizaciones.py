@@ -0,0 +1,149 @@
+"""
+Este archivo contiene el contenedor columnar de cotizaciones:
+
+- Un arreglo de NumPy por campo numérico para todo el mercado, en vez de un dict por par
+- Las columnas de /ticker/24hr llegan ya proyectadas por el parser de api/ticker_24h.py
+- Símbolos y tickers internados por el registro de símbolos, y un índice símbolo -> fila
+- Vistas de fila livianas que la tabla y el controlador usan como si fueran dicts
+"""
+
+import sys
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from api.registro_simbolos import ids_por_simbolo, obtener_registro_simbolos
+
+# Columnas que se calculan después de cargar los tickers, con su valor inicial
+COLUMNAS_CALCULADAS = {
+    'posicion': 0.0,
+    'cambio_1h': 0.0,
+    'cambio_7d': 0.0,
+    'rsi': 50.0,
+    'volatilidad_7d': 0.0,
+    'desviacion_vwap': 0.0,
+    'cap_mercado': 0.0,
+    'suministro_circulante': 0.0,
+}
+
+# Campos que expone cada fila, en el orden de las filas de la tabla
+CAMPOS_FILA = (
+    'posicion', 'simbolo', 'nombre', 'ticker', 'precio', 'cambio_1h', 'cambio_24h', 'cambio_7d',
+    'volumen_24h', 'cap_mercado', 'suministro_circulante', 'rsi', 'volatilidad_7d', 'desviacion_vwap',
+)
+
+
+class CotizacionesColumnares:
+    """Cotizaciones de muchos pares guardadas por columna."""
+
+    def __init__(self, simbolos: List[str], columnas: Dict[str, np.ndarray], registro=None):
+        if registro is None:
+            registro = obtener_registro_simbolos()
+        # Los textos internados se comparten con el registro y entre refrescos
+        self.simbolos = [sys.intern(simbolo) for simbolo in simbolos]
+        self.tickers = []
+        self.ids_coingecko = []  # unidos por el registro, o None si el par no se unió
+        for simbolo in self.simbolos:
+            info = registro.obtener(simbolo)
+            if info is not None:
+                self.tickers.append(info.base)
+                self.ids_coingecko.append(info.id_coingecko)
+            else:
+                partes = registro.separar(simbolo)
+                self.tickers.append(partes[0] if partes is not None else simbolo)
+                self.ids_coingecko.append(None)
+        self.nombres = list(self.tickers)  # nombre completo de CoinGecko, o el ticker si no se conoce
+        self.indice = {simbolo: fila for fila, simbolo in enumerate(self.simbolos)}
+        self.columnas = columnas
+        for nombre, inicial in COLUMNAS_CALCULADAS.items():
+            if nombre not in columnas:
+                columnas[nombre] = np.full(len(simbolos), inicial)
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    def __getitem__(self, campo) -> np.ndarray:
+        """Columna numérica completa."""
+        return self.columnas[campo]
+
+    def completar_info(self, info_monedas: Dict[str, Dict]):
+        """Agrega nombre, capitalización y suministro de CoinGecko ({id: info}) por el id unido a cada par.
+        
+        Los pares sin id (registro sin cargar) se buscan por ticker, con la moneda de mayor capitalización.
+        """
+        vacio = {}
+        por_ticker = None
+        infos = []
+        for id_coingecko, ticker in zip(self.ids_coingecko, self.tickers):
+            if id_coingecko is None:
+                if por_ticker is None:
+                    por_ticker = ids_por_simbolo(info_monedas)
+                id_coingecko = por_ticker.get(ticker)
+            infos.append(info_monedas.get(id_coingecko, vacio))
+        self.nombres = [info.get('nombre') or ticker for info, ticker in zip(infos, self.tickers)]
+        for campo in ('cap_mercado', 'suministro_circulante'):
+            self.columnas[campo] = np.fromiter((info.get(campo) or 0.0 for info in infos),
+                                               dtype=np.float64, count=len(infos))
+
+    def valor(self, fila, campo):
+        """Valor de un campo de una fila como tipo de Python."""
+        columna = self.columnas.get(campo)
+        if columna is not None:
+            valor = columna.item(fila)
+            return int(valor) if campo == 'posicion' else valor
+        if campo == 'simbolo':
+            return self.simbolos[fila]
+        if campo == 'ticker':
+            return self.tickers[fila]
+        if campo == 'nombre':
+            return f"{self.nombres[fila]} ({self.tickers[fila]})"
+        raise KeyError(campo)
+
+    def asignar(self, fila, campo, valor):
+        """Modifica en el lugar un campo numérico de una fila."""
+        self.columnas[campo][fila] = valor
+
+    def fila(self, fila) -> "FilaCotizacion":
+        return FilaCotizacion(self, fila)
+
+    def filas(self, indices: Iterable[int]) -> List["FilaCotizacion"]:
+        """Vistas de las filas indicadas, en ese orden."""
+        return [FilaCotizacion(self, fila) for fila in indices]
+
+
+class FilaCotizacion:
+    """Vista de una fila del contenedor con la interfaz de lectura y escritura de un dict."""
+
+    __slots__ = ('tabla', 'fila_tabla')
+
+    def __init__(self, tabla: CotizacionesColumnares, fila):
+        self.tabla = tabla
+        self.fila_tabla = fila
+
+    def __getitem__(self, campo):
+        try:
+            return self.tabla.valor(self.fila_tabla, campo)
+        except (KeyError, IndexError):
+            raise KeyError(campo) from None
+
+    def __setitem__(self, campo, valor):
+        self.tabla.asignar(self.fila_tabla, campo, valor)
+
+    def __contains__(self, campo):
+        return campo in CAMPOS_FILA
+
+    def __iter__(self):
+        return iter(CAMPOS_FILA)
+
+    def get(self, campo, defecto=None):
+        try:
+            return self.tabla.valor(self.fila_tabla, campo)
+        except KeyError:
+            return defecto
+
+    def keys(self):
+        return CAMPOS_FILA
+
+    def como_dict(self) -> Dict:
+        """Copia de la fila como dict, para serializarla."""
+        return {campo: self[campo] for campo in CAMPOS_FILA}
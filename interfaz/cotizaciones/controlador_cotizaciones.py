@@ -1,108 +1,193 @@
 """
 Este archivo conecta el modelo con la vista:
 
-- Gestiona los hilos para actualización de datos
+- Pide los refrescos de datos al planificador
 - Maneja eventos de la interfaz
 - Controla el flujo de actualización automática
 """
 
-import threading
-import time
 import dearpygui.dearpygui as dpg
 import config
+from api.instrumentacion import registro_metricas, detener_exportacion
 from interfaz.cotizaciones.modelo_cotizaciones import *
 from interfaz.cotizaciones.vista_cotizaciones import *
+from interfaz.cotizaciones.planificador_refresco import PlanificadorRefresco
+from interfaz.bus_ui import bus_ui
+
+# Funciones que reciben {simbolo: precio} con cada actualización de cotizaciones
+oyentes_cotizaciones = []
+
+def agregar_oyente_cotizaciones(funcion):
+    """Registra una función a la que se avisan los precios nuevos"""
+    oyentes_cotizaciones.append(funcion)
+
+def notificar_cotizaciones(precios):
+    """Avisa los precios nuevos a los oyentes registrados"""
+    for oyente in oyentes_cotizaciones:
+        try:
+            oyente(precios)
+        except Exception as e:
+            print(f"Error al notificar cotizaciones: {e}")
 
 def inicializar_panel_cotizaciones():
     """Inicializa el panel de cotizaciones"""
     # Crear panel con los manejadores
     crear_panel_cotizaciones(
         btn_actualizar_fn=btn_actualizar_handler,
-        chk_auto_actualizacion_fn=chk_auto_actualizacion_handler
+        chk_auto_actualizacion_fn=chk_auto_actualizacion_handler,
+        chk_streaming_fn=chk_streaming_handler,
+        chk_mercado_completo_fn=chk_mercado_completo_handler,
+        input_limite_fn=input_limite_handler
     )
 
 def cargar_datos_iniciales():
     """Carga los datos iniciales de la tabla de cotizaciones"""
     try:
         print("Iniciando carga de datos iniciales...")
-        btn_actualizar_handler()
+        mostrar_snapshot_cotizaciones()
+        
+        # El planificador hace el primer refresco y, si está habilitada, la actualización automática
+        planificador_refresco.iniciar()
+        planificador_refresco.solicitar(limite=leer_limite())
         
-        # Iniciar actualización automática si está habilitada
-        if config.auto_actualizacion:
-            iniciar_actualizacion_automatica()
+        if config.MODO_STREAMING_HABILITADO:
+            iniciar_streaming()
     except Exception as e:
         print(f"Error al cargar datos iniciales: {e}")
-        
-def actualizar_datos_cotizaciones():
-    """Función que actualiza los datos de cotizaciones"""
-    config.actualizando = True
-    actualizar_estado_boton(True)
+
+def mostrar_snapshot_cotizaciones():
+    """Dibuja la última tabla guardada, marcada como desactualizada, hasta que termine el primer refresco.
     
-    try:
-        # Obtener límite de criptomonedas
-        limite = dpg.get_value("input_limite") if dpg.does_item_exist("input_limite") else config.LIMITE_CRIPTOMONEDAS_DEFAULT
+    Las filas no se copian a config.datos_cotizaciones para que el simulador
+    no opere con precios viejos.
+    """
+    datos, instante = cargar_snapshot_cotizaciones()
+    if not datos:
+        return
+    crear_tabla_cotizaciones(datos, formatear_precio, formatear_porcentaje, formatear_volumen)
+    mostrar_datos_desactualizados(instante)
         
-        # Obtener datos
-        config.datos_cotizaciones = obtener_tabla_cotizaciones(limite)
-        
-        # Recrear la tabla con los nuevos datos
-        crear_tabla_cotizaciones(
-            config.datos_cotizaciones,
-            formatear_precio,
-            formatear_porcentaje,
-            formatear_volumen
-        )
-        
-        # Actualizar hora de actualización
-        actualizar_hora_actualizacion()
-    except Exception as e:
-        print(f"Error al actualizar datos: {e}")
+def leer_limite():
+    """Límite de criptomonedas elegido en la interfaz (None = todo el mercado); solo desde el hilo de render"""
+    if dpg.does_item_exist("chk_mercado_completo") and dpg.get_value("chk_mercado_completo"):
+        return None
+    return dpg.get_value("input_limite") if dpg.does_item_exist("input_limite") else config.LIMITE_CRIPTOMONEDAS_DEFAULT
+
+def actualizar_datos_cotizaciones(cancelado=None, limite=config.LIMITE_CRIPTOMONEDAS_DEFAULT):
+    """Función que actualiza los datos de cotizaciones; la ejecuta el hilo del planificador"""
+    with registro_metricas.medir("refresco"):
+        actualizar_tabla_desde_api(cancelado, limite)
+
+def actualizar_tabla_desde_api(cancelado=None, limite=config.LIMITE_CRIPTOMONEDAS_DEFAULT):
+    """Obtiene los datos, los publica a los oyentes y actualiza la tabla.
+    
+    `limite` lo lee el manejador que pidió el refresco (None = todo el mercado).
+    Si `cancelado` se activa mientras se descargan los datos (cambió el límite), no se publican.
+    """
+    # Obtener datos
+    datos = obtener_tabla_cotizaciones(limite, cancelado)
+    if cancelado is not None and cancelado.is_set():
+        return
     
-    actualizar_estado_boton(False)
-    config.actualizando = False
+    # Con streaming activo, suscribir las filas visibles y usar sus precios
+    if config.stream_mercado is not None:
+        config.stream_mercado.suscribir_velas([crypto['simbolo'] for crypto in datos])
+        aplicar_cotizaciones_stream(datos, config.stream_mercado)
+    config.datos_cotizaciones = datos
+    with registro_metricas.medir("refresco.oyentes"):
+        notificar_cotizaciones({crypto['simbolo']: crypto['precio'] for crypto in datos})
+    
+    # La tabla y la hora se actualizan en el hilo de render, en el mismo cuadro
+    bus_ui.publicar_lote((
+        ("tabla_cotizaciones", dibujar_tabla_cotizaciones, (datos, "refresco.tabla")),
+        ("hora_actualizacion", actualizar_hora_actualizacion, ()),
+    ))
+    
+    # Guardar la tabla para mostrarla al instante en el próximo arranque
+    guardar_snapshot_cotizaciones(datos)
+
+def dibujar_tabla_cotizaciones(datos, etapa):
+    """Redibuja la tabla; se ejecuta en el hilo de render desde el bus"""
+    with registro_metricas.medir(etapa):
+        crear_tabla_cotizaciones(datos, formatear_precio, formatear_porcentaje, formatear_volumen)
+
+def publicar_estado_boton(actualizando):
+    bus_ui.publicar("estado_boton_actualizar", actualizar_estado_boton, actualizando)
+
+def intervalo_actualizacion():
+    """Con streaming los precios llegan solos y la recarga completa se espacia"""
+    return config.INTERVALO_RESYNC_STREAMING if config.stream_mercado is not None else config.INTERVALO_ACTUALIZACION
+
+planificador_refresco = PlanificadorRefresco(
+    refrescar=actualizar_datos_cotizaciones,
+    intervalo_base=intervalo_actualizacion,
+    automatico=config.ACTUALIZACION_AUTOMATICA_HABILITADA,
+    al_cambiar_estado=publicar_estado_boton,
+    parametros={'limite': config.LIMITE_CRIPTOMONEDAS_DEFAULT}
+)
+registro_metricas.registrar_medidor("refresco_intervalo_segundos", planificador_refresco.intervalo)
 
 def btn_actualizar_handler(sender=None, app_data=None, user_data=None):
     """Manejador para el botón de actualización"""
-    if not config.actualizando:
-        hilo = threading.Thread(target=actualizar_datos_cotizaciones, daemon=True)
-        hilo.start()
+    planificador_refresco.solicitar(limite=leer_limite())
+
+def input_limite_handler(sender, app_data):
+    """Manejador del límite: el refresco en curso pide otra cantidad, se descarta y se pide de nuevo"""
+    planificador_refresco.solicitar(cancelar_en_curso=True, limite=leer_limite())
+
+def chk_mercado_completo_handler(sender, app_data):
+    """Manejador del checkbox de mercado completo: recarga con todos los pares o con el límite"""
+    dpg.configure_item("input_limite", enabled=not app_data)
+    planificador_refresco.solicitar(cancelar_en_curso=True, limite=leer_limite())
 
 def chk_auto_actualizacion_handler(sender, app_data):
     """Manejador para el checkbox de actualización automática"""
-    config.auto_actualizacion = app_data
-    
-    if app_data and (config.hilo_auto_actualizacion is None or not config.hilo_auto_actualizacion.is_alive()):
-        iniciar_actualizacion_automatica()
-
-def bucle_actualizacion_automatica():
-    """Hilo que ejecuta actualizaciones periódicas"""
-    while not config.detener_auto_actualizacion:
-        # Esperar el intervalo configurado
-        for _ in range(config.INTERVALO_ACTUALIZACION):
-            if config.detener_auto_actualizacion:
-                break
-            time.sleep(1)
-        
-        # Verificar si debe continuar actualizando
-        if config.detener_auto_actualizacion or not config.auto_actualizacion:
-            continue
-        
-        # Actualizar si no está en proceso
-        if not config.actualizando:
-            actualizar_datos_cotizaciones()
+    planificador_refresco.automatico = app_data
+
 
-def iniciar_actualizacion_automatica():
-    """Inicia el proceso de actualización automática"""
-    config.detener_auto_actualizacion = False
+def stream_actualizado(simbolos):
+    """Aplica los precios del stream a la tabla; el bus deja un solo redibujado pendiente por cuadro"""
+    stream = config.stream_mercado
+    if stream is None:
+        return
+    precios = {simbolo: stream.obtener_cotizacion(simbolo).get('precio') for simbolo in simbolos}
+    notificar_cotizaciones({simbolo: precio for simbolo, precio in precios.items() if precio})
     
-    # Crear y lanzar el hilo solo si no existe o no está activo
-    if config.hilo_auto_actualizacion is None or not config.hilo_auto_actualizacion.is_alive():
-        hilo = threading.Thread(target=bucle_actualizacion_automatica, daemon=True)
-        hilo.start()
-        config.hilo_auto_actualizacion = hilo
+    cambiados = aplicar_cotizaciones_stream(config.datos_cotizaciones, stream, simbolos)
+    if not cambiados:
+        return
+    actualizar_orden_tabla(cambiados, CAMPOS_STREAM)
+    bus_ui.publicar("tabla_cotizaciones", dibujar_tabla_cotizaciones, config.datos_cotizaciones, "stream.tabla")
+
+def iniciar_streaming():
+    """Conecta el stream de Binance y suscribe las filas visibles"""
+    if config.stream_mercado is not None:
+        return
+    # websockets solo se carga si se activa el streaming
+    from api.stream_mercado import StreamMercado
+    stream = StreamMercado(al_actualizar=stream_actualizado)
+    stream.suscribir_velas([crypto['simbolo'] for crypto in config.datos_cotizaciones if 'simbolo' in crypto])
+    stream.iniciar()
+    config.stream_mercado = stream
+    planificador_refresco.reprogramar()
 
+def detener_streaming():
+    """Desconecta el stream y vuelve al sondeo por REST"""
+    stream = config.stream_mercado
+    config.stream_mercado = None
+    if stream is not None:
+        stream.detener()
+    planificador_refresco.reprogramar()
 
+def chk_streaming_handler(sender, app_data):
+    """Manejador para el checkbox de streaming"""
+    if app_data:
+        iniciar_streaming()
+    else:
+        detener_streaming()
 
 def detener_servicios():
     """Detiene los hilos y servicios antes de cerrar la aplicación"""
-    config.detener_auto_actualizacion = True
\ No newline at end of file
+    planificador_refresco.detener()
+    detener_streaming()
+    detener_exportacion()
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Este archivo contiene el cálculo vectorizado de métricas de cotizaciones:
+
+- Métricas del ticker sobre las columnas del contenedor de cotizaciones
+- Cambios de 1h/24h/7d, volatilidad, desviación del VWAP y RSI en una sola pasada
+- Selección del top N con argpartition
+"""
+
+import numpy as np
+
+PERIODOS_RSI = 14
+
+
+def calcular_metricas_ticker(tickers):
+    """Calcula las métricas que solo dependen del ticker de 24h, para todo el mercado.
+
+    `tickers` es cualquier mapeo campo -> arreglo, como CotizacionesColumnares.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        desviacion_vwap = (tickers['precio'] - tickers['vwap']) / tickers['vwap'] * 100
+    return {
+        'desviacion_vwap': np.nan_to_num(np.round(desviacion_vwap, 2), nan=0.0, posinf=0.0, neginf=0.0),
+    }
+
+
+def seleccionar_top(valores, limite):
+    """Devuelve los índices de los `limite` mayores valores, ordenados de mayor a menor."""
+    limite = min(limite, len(valores))
+    if limite <= 0:
+        return np.empty(0, dtype=np.intp)
+    if limite < len(valores):
+        candidatos = np.argpartition(-valores, limite - 1)[:limite]
+    else:
+        candidatos = np.arange(len(valores))
+    return candidatos[np.argsort(-valores[candidatos], kind='stable')]
+
+
+def matriz_cierres(series_velas, largo):
+    """Arma una matriz (pares x largo) con los cierres; las series cortas se rellenan con NaN a la izquierda."""
+    cierres = np.full((len(series_velas), largo), np.nan)
+    for fila, velas in enumerate(series_velas):
+        ultimas = velas[-largo:]
+        if ultimas:
+            cierres[fila, largo - len(ultimas):] = [float(vela[4]) for vela in ultimas]
+    return cierres
+
+
+def cambio_porcentual(cierres, periodos):
+    """Cambio porcentual entre el último cierre y el de `periodos` velas antes, por fila."""
+    if cierres.shape[1] <= periodos:
+        return np.zeros(cierres.shape[0])
+    actual = cierres[:, -1]
+    anterior = cierres[:, -1 - periodos]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cambio = (actual - anterior) / anterior * 100
+    return np.nan_to_num(np.round(cambio, 2), nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def volatilidad(cierres):
+    """Desvío estándar de los retornos logarítmicos de cada fila, en porcentaje."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        retornos = np.diff(np.log(cierres), axis=1)
+    validos = np.sum(~np.isnan(retornos), axis=1)
+    resultado = np.zeros(cierres.shape[0])
+    con_datos = validos > 1
+    if np.any(con_datos):
+        resultado[con_datos] = np.nanstd(retornos[con_datos], axis=1, ddof=1) * 100
+    return np.round(resultado, 2)
+
+
+def rsi(cierres, periodos=PERIODOS_RSI):
+    """RSI de cada fila usando la media simple de subas y bajas de los últimos `periodos` cierres."""
+    diferencias = np.diff(cierres[:, -(periodos + 1):], axis=1)
+    validos = np.sum(~np.isnan(diferencias), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        subas = np.sum(np.where(diferencias > 0, diferencias, 0.0), axis=1) / validos
+        bajas = np.sum(np.where(diferencias < 0, -diferencias, 0.0), axis=1) / validos
+        resultado = 100 - 100 / (1 + subas / bajas)
+    # Sin bajas el RSI es 100; sin movimiento se deja en 50
+    resultado = np.where((bajas == 0) & (subas > 0), 100.0, resultado)
+    resultado = np.where((bajas == 0) & (subas == 0), 50.0, resultado)
+    return np.round(np.nan_to_num(resultado, nan=50.0), 2)
+
+
+def calcular_metricas_velas(velas_1h, velas_1d):
+    """Calcula en bloque las métricas basadas en velas para los pares seleccionados."""
+    cierres_1h = matriz_cierres(velas_1h, PERIODOS_RSI + 1)
+    cierres_1d = matriz_cierres(velas_1d, 8)
+    return {
+        'cambio_1h': cambio_porcentual(cierres_1h, 1),
+        'cambio_7d': cambio_porcentual(cierres_1d, 7),
+        'rsi': rsi(cierres_1h),
+        'volatilidad_7d': volatilidad(cierres_1d),
+    }
@@ -2,94 +2,165 @@
 Este archivo contiene toda la lógica de obtención y procesamiento de datos:
 
 - Funciones para obtener información de criptomonedas desde las APIs
-- Cálculo de cambios porcentuales
+- Mercado completo en un contenedor columnar (contenedor_cotizaciones.py)
+- Cálculo de cambios porcentuales y métricas (vectorizadas en metricas.py)
 - Formateo de valores (precios, porcentajes, volúmenes)
+- Snapshot en disco de la última tabla para mostrarla al arrancar
 """
 
+import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import config
 from api.consulta_api_datos import *
+from api.almacen_velas import obtener_almacen_velas
+from api.registro_simbolos import obtener_registro_simbolos
+from api.instrumentacion import registro_metricas
+from interfaz.cotizaciones.contenedor_cotizaciones import CotizacionesColumnares
+from interfaz.cotizaciones.metricas import PERIODOS_RSI, calcular_metricas_ticker, calcular_metricas_velas, seleccionar_top
 
-def calcular_cambio_porcentual(velas, periodos=1):
-    """Calcula el cambio porcentual de precio en un número determinado de periodos."""
-    if len(velas) <= periodos:
-        return 0.0
-        
-    precio_actual = float(velas[-1][4])
-    precio_anterior = float(velas[-1 - periodos][4])
-    cambio_porcentual = ((precio_actual - precio_anterior) / precio_anterior) * 100
+def obtener_mercado(limite=None):
+    """Descarga tickers y CoinGecko y arma el contenedor columnar de los pares USDT operables.
     
-    return round(cambio_porcentual, 2)
-
-def obtener_datos_cotizacion(limite=50):
-    """Obtiene datos de cotización para las principales criptomonedas."""
+    Con `limite` y el registro de símbolos cargado se piden solo los candidatos al top por capitalización.
+    """
     # Obtener información de CoinGecko
-    info_coingecko = obtener_info_cripto_coingecko()
+    with registro_metricas.medir("refresco.coingecko"):
+        info_coingecko = obtener_info_cripto_coingecko()
     
-    # Obtener datos de Binance
-    datos_24h = obtener_precios_24h()
-    pares_usdt = [dato for dato in datos_24h if dato['symbol'].endswith('USDT')]
+    # Obtener datos de Binance, ya proyectados a columnas y sin pares suspendidos ni deslistados
+    with registro_metricas.medir("refresco.precios_24h"):
+        registro = obtener_registro_simbolos()
+        registro.cargar()
+        registro.vincular_coingecko(info_coingecko)
+        simbolos, columnas = obtener_tickers_24h(candidatos_top(info_coingecko, limite, registro),
+                                                 operables=registro.operables())
     
-    # Enriquecer datos con información de CoinGecko
-    for par in pares_usdt:
-        ticker = par['symbol'].replace('USDT', '')
-        if ticker in info_coingecko:
-            par['nombre_completo'] = info_coingecko[ticker]['nombre']
-            par['cap_mercado'] = info_coingecko[ticker]['cap_mercado']
-            par['suministro_circulante'] = info_coingecko[ticker]['suministro_circulante']
-        else:
-            par['nombre_completo'] = ticker
-            par['cap_mercado'] = 0
-            par['suministro_circulante'] = 0
+    # Cargar el mercado en arreglos y calcular las métricas del ticker en bloque
+    with registro_metricas.medir("refresco.seleccion"):
+        mercado = CotizacionesColumnares(simbolos, columnas, registro)
+        mercado.completar_info(info_coingecko)
+        for campo, valores in calcular_metricas_ticker(mercado).items():
+            mercado[campo][:] = valores
+    return mercado
+
+def candidatos_top(info_coingecko, limite, registro, cotizado="USDT"):
+    """Pares operables de las `limite` monedas de mayor capitalización, o None para pedir todos.
     
-    pares_usdt.sort(key=lambda par: float(par.get('cap_mercado', 0)), reverse=True)
-    pares_top = pares_usdt[:limite]
+    Es el mismo top que se elegiría sobre el mercado completo, porque la capitalización sale de CoinGecko.
+    """
+    if limite is None or not len(registro):
+        return None
+    por_capitalizacion = sorted(info_coingecko.items(), key=lambda item: item[1].get('cap_mercado') or 0.0, reverse=True)
+    candidatos = []
+    for id_coingecko, info in por_capitalizacion:
+        if len(candidatos) == limite or not info.get('cap_mercado'):
+            break
+        # Una moneda que comparte símbolo con otra de mayor capitalización no tiene par
+        par = registro.par_coingecko(id_coingecko, cotizado)
+        if par is not None and par.operable:
+            candidatos.append(par.simbolo)
+    # Si faltan monedas con capitalización, el top se completa con pares sin datos: hace falta el mercado completo
+    return candidatos if len(candidatos) == limite else None
+
+def completar_metricas_velas(mercado, indices, cancelado=None):
+    """Calcula las métricas de velas de las filas indicadas; el almacén solo descarga las velas que faltan.
     
-    # Procesar datos
-    datos_procesados = []
-    for i, par in enumerate(pares_top):
-        simbolo = par['symbol']
-        ticker = simbolo.replace('USDT', '')
-        nombre_completo = par.get('nombre_completo', ticker)
-        
-        # Datos básicos
-        precio_actual = float(par['lastPrice'])
-        cambio_24h = float(par['priceChangePercent'])
-        volumen_24h = float(par['quoteVolume'])
-        cap_mercado = par.get('cap_mercado', 'N/A')
-        suministro_circulante = par.get('suministro_circulante', 'N/A')
-        
-        # Para cambio de 1h
-        try:
-            velas_1h = obtener_velas_ohlc(simbolo, intervalo="1h", limite=2)
-            cambio_1h = calcular_cambio_porcentual(velas_1h, 1)
-        except:
-            cambio_1h = 0.0
-            
-        # Para cambio de 7d
+    Si `cancelado` se activa no se piden más velas, se cancelan las pendientes y devuelve False.
+    """
+    simbolos = [mercado.simbolos[i] for i in indices]
+    precios = mercado['precio'][indices].tolist()
+    cancelado = cancelado or threading.Event()
+    
+    # Pedir en paralelo las velas de 1h y 1d
+    with registro_metricas.medir("refresco.velas"):
+        almacen = obtener_almacen_velas()
+        ejecutor = ThreadPoolExecutor(max_workers=config.MAX_HILOS_DESCARGA)
         try:
-            velas_1d = obtener_velas_ohlc(simbolo, intervalo="1d", limite=8)
-            cambio_7d = calcular_cambio_porcentual(velas_1d, 7)
-        except:
-            cambio_7d = 0.0
+            futuros_1h = []
+            futuros_1d = []
+            for simbolo, precio in zip(simbolos, precios):
+                if cancelado.is_set():
+                    return False
+                futuros_1h.append(ejecutor.submit(almacen.obtener_velas, simbolo, "1h", PERIODOS_RSI + 1, precio))
+                futuros_1d.append(ejecutor.submit(almacen.obtener_velas, simbolo, "1d", 8, precio))
             
-        # Crear diccionario con la información
-        crypto_data = {
-            'posicion': i + 1,
-            'nombre': f"{nombre_completo} ({ticker})",
-            'ticker': ticker,
-            'precio': precio_actual,
-            'cambio_1h': cambio_1h,
-            'cambio_24h': cambio_24h,
-            'cambio_7d': cambio_7d,
-            'volumen_24h': volumen_24h,
-            'cap_mercado': cap_mercado,
-            'suministro_circulante': suministro_circulante
-        }
-        
-        datos_procesados.append(crypto_data)
-        time.sleep(0.1)  # Pausa para evitar límites de la API
+            velas_1h = obtener_resultados(futuros_1h, cancelado)
+            velas_1d = obtener_resultados(futuros_1d, cancelado)
+            if velas_1h is None or velas_1d is None:
+                return False
+        finally:
+            # Al cancelar no se espera a las descargas en curso: sus velas quedan igual en el almacén
+            ejecutor.shutdown(wait=not cancelado.is_set(), cancel_futures=True)
+    with registro_metricas.medir("refresco.metricas_velas"):
+        for campo, valores in calcular_metricas_velas(velas_1h, velas_1d).items():
+            mercado[campo][indices] = valores
+    return True
+
+def obtener_datos_cotizacion(limite=50, cancelado=None):
+    """Obtiene datos de cotización para las principales criptomonedas, como vistas de fila del mercado.
+    
+    Con `limite` None se devuelven todos los pares USDT. Si `cancelado` se activa devuelve una lista vacía.
+    """
+    mercado = obtener_mercado(limite)
+    if not len(mercado) or (cancelado is not None and cancelado.is_set()):
+        return []
+    if limite is None:
+        limite = len(mercado)
     
-    return datos_procesados
+    # Seleccionar el top por capitalización sin ordenar todo el mercado
+    indices_top = seleccionar_top(mercado['cap_mercado'], limite)
+    if not completar_metricas_velas(mercado, indices_top, cancelado):
+        return []
+    mercado['posicion'][indices_top] = np.arange(1, len(indices_top) + 1)
+    return mercado.filas(indices_top.tolist())
+
+def obtener_resultado(futuro):
+    """Devuelve las velas de un futuro, o una lista vacía si la descarga falló."""
+    try:
+        return futuro.result()
+    except Exception:
+        return []
+
+def obtener_resultados(futuros, cancelado):
+    """Devuelve las velas de cada futuro en orden, o None si `cancelado` se activa mientras se esperan."""
+    resultados = []
+    for futuro in futuros:
+        if cancelado.is_set():
+            return None
+        resultados.append(obtener_resultado(futuro))
+    return resultados
+
+# Campos de la tabla que actualiza el stream de Binance
+CAMPOS_STREAM = ('precio', 'cambio_1h', 'cambio_24h', 'volumen_24h')
+
+def aplicar_cotizaciones_stream(datos, stream, simbolos=None):
+    """Actualiza en el lugar las filas con los precios recibidos por el stream. Devuelve los símbolos que cambiaron."""
+    cambiados = set()
+    for crypto in datos:
+        simbolo = crypto.get('simbolo')
+        if simbolo is None or (simbolos is not None and simbolo not in simbolos):
+            continue
+        cotizacion = stream.obtener_cotizacion(simbolo)
+        for campo in CAMPOS_STREAM:
+            if campo in cotizacion and crypto.get(campo) != cotizacion[campo]:
+                crypto[campo] = cotizacion[campo]
+                cambiados.add(simbolo)
+    return cambiados
+
+def obtener_precio_en_cache(simbolo):
+    """Devuelve el último precio de un par en el stream o en la tabla, sin ir a la red, o None."""
+    if config.stream_mercado is not None:
+        precio = config.stream_mercado.obtener_cotizacion(simbolo).get('precio')
+        if precio:
+            return precio
+    for crypto in config.datos_cotizaciones:
+        if crypto.get('simbolo') == simbolo:
+            return crypto['precio']
+    return None
 
 def formatear_precio(precio):
     """Formatea el precio según su magnitud."""
@@ -120,6 +191,33 @@ def formatear_volumen(volumen):
     else:
         return f"${volumen:.2f}"
 
-def obtener_tabla_cotizaciones(limite=50):
+def guardar_snapshot_cotizaciones(datos, ruta=None):
+    """Guarda las filas en formato columnar (claves una sola vez) con escritura atómica."""
+    if not datos:
+        return
+    ruta = ruta or config.RUTA_SNAPSHOT_COTIZACIONES
+    columnas = list(datos[0])
+    snapshot = {
+        'instante': time.time(),
+        'columnas': columnas,
+        'filas': [[crypto.get(columna) for columna in columnas] for crypto in datos],
+    }
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(snapshot, archivo, separators=(",", ":"))
+    os.replace(temporal, ruta)
+
+def cargar_snapshot_cotizaciones(ruta=None):
+    """Devuelve (filas, instante) del último snapshot, o ([], None) si no hay uno válido."""
+    try:
+        with open(ruta or config.RUTA_SNAPSHOT_COTIZACIONES, encoding="utf-8") as archivo:
+            snapshot = json.load(archivo)
+        columnas = snapshot['columnas']
+        return [dict(zip(columnas, fila)) for fila in snapshot['filas']], snapshot['instante']
+    except (OSError, ValueError, KeyError, TypeError):
+        return [], None
+
+def obtener_tabla_cotizaciones(limite=50, cancelado=None):
     """Obtiene y formatea los datos para la tabla de cotizaciones."""
-    return obtener_datos_cotizacion(limite)
\ No newline at end of file
+    return obtener_datos_cotizacion(limite, cancelado)
\ No newline at end of file
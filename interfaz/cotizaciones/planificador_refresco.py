@@ -0,0 +1,154 @@
+"""
+Este archivo contiene el planificador de refrescos de cotizaciones:
+
+- Un solo hilo ejecuta los refrescos; los pedidos manuales y automáticos se agrupan (single-flight)
+- Cancelación del refresco en curso cuando cambia lo que hay que pedir (límite, mercado completo)
+- Parámetros de cada pedido leídos por quien lo hace (el hilo de render), nunca por el hilo del planificador
+- Intervalo automático medido desde el inicio del refresco anterior, sin deriva
+- Intervalo adaptado a la latencia medida y al peso disponible de la API de Binance
+- Espera y apagado con threading.Event, sin dormir en pasos de 1 segundo
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import config
+from api import limitador_peso
+from api.instrumentacion import registro_metricas
+
+
+class PlanificadorRefresco:
+    """Coordina los refrescos manuales y automáticos de la tabla de cotizaciones."""
+
+    def __init__(self, refrescar: Callable[..., None], intervalo_base: Callable[[], float],
+                 automatico=True, al_cambiar_estado: Optional[Callable[[bool], None]] = None, limitador=None,
+                 parametros: Optional[Dict] = None):
+        self.refrescar = refrescar  # recibe el Event de cancelación y los parámetros del último pedido
+        self.intervalo_base = intervalo_base
+        self.al_cambiar_estado = al_cambiar_estado
+        self.limitador = limitador
+        self.duracion_media = None  # EWMA de la duración de los refrescos, en segundos
+        self._automatico = automatico
+        self._pendiente = False
+        self._ocupado = False
+        self._cancelado = threading.Event()
+        self._parametros = dict(parametros or {})  # los usan también los refrescos automáticos
+        self._ultimo_inicio = None
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    @property
+    def ocupado(self):
+        return self._ocupado
+
+    @property
+    def automatico(self):
+        return self._automatico
+
+    @automatico.setter
+    def automatico(self, habilitado):
+        self._automatico = habilitado
+        self._despertar.set()
+
+    def iniciar(self):
+        """Lanza el hilo del planificador si no está corriendo."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, daemon=True)
+            self._hilo.start()
+
+    def solicitar(self, cancelar_en_curso=False, **parametros):
+        """
+        Pide un refresco. Si ya hay uno pendiente se agrupa con él; si hay uno en curso se ejecuta
+        otro al terminar, o se cancela el actual si sus resultados ya no sirven.
+        
+        Los `parametros` reemplazan a los del pedido anterior y se pasan a `refrescar`.
+        """
+        with self._lock:
+            self._parametros.update(parametros)
+            if self._pendiente or (self._ocupado and not cancelar_en_curso):
+                registro_metricas.sumar("refrescos_agrupados_total")
+            self._pendiente = True
+            if cancelar_en_curso and self._ocupado:
+                self._cancelado.set()
+                registro_metricas.sumar("refrescos_cancelados_total")
+        self._despertar.set()
+
+    def reprogramar(self):
+        """Recalcula la espera del refresco automático (p. ej. al activar o desactivar el streaming)."""
+        self._despertar.set()
+
+    def detener(self, timeout=5):
+        """Cancela el refresco en curso y detiene el hilo."""
+        self._detener.set()
+        self._cancelado.set()
+        self._despertar.set()
+        hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout)
+
+    def intervalo(self):
+        """
+        Intervalo automático: el configurado, pero nunca menor que FACTOR_INTERVALO_LATENCIA veces la
+        duración media de un refresco, y estirado cuando queda poco peso de la API.
+        """
+        base = self.intervalo_base()
+        intervalo = base
+        if self.duracion_media is not None:
+            intervalo = max(intervalo, self.duracion_media * config.FACTOR_INTERVALO_LATENCIA)
+        limitador = self.limitador or limitador_peso.limitador_binance
+        disponible = max(0.0, limitador.tokens) / limitador.capacidad
+        if disponible < config.HOLGURA_PESO_MINIMA:
+            intervalo *= config.HOLGURA_PESO_MINIMA / max(disponible, config.HOLGURA_PESO_MINIMA / config.FACTOR_MAXIMO_INTERVALO)
+        return min(intervalo, base * config.FACTOR_MAXIMO_INTERVALO)
+
+    def _espera(self):
+        """Segundos hasta el próximo refresco automático, o None si no hay ninguno programado."""
+        if not self._automatico or self._ultimo_inicio is None:
+            return None
+        return max(0.0, self._ultimo_inicio + self.intervalo() - time.monotonic())
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            espera = self._espera()
+            if espera is None or espera > 0:
+                self._despertar.wait(espera)
+            # Se limpia antes de leer el estado: un pedido que llegue después vuelve a despertar el hilo
+            self._despertar.clear()
+            if self._detener.is_set():
+                break
+
+            with self._lock:
+                vencido = self._espera() == 0
+                if not (self._pendiente or vencido):
+                    continue
+                self._pendiente = False
+                self._ocupado = True
+                self._cancelado = cancelado = threading.Event()
+                parametros = dict(self._parametros)
+            self._ejecutar(cancelado, parametros)
+
+    def _ejecutar(self, cancelado, parametros):
+        self._notificar(True)
+        inicio = self._ultimo_inicio = time.monotonic()
+        try:
+            self.refrescar(cancelado, **parametros)
+        except Exception as e:
+            print(f"Error al actualizar datos: {e}")
+        duracion = time.monotonic() - inicio
+        self.duracion_media = duracion if self.duracion_media is None else 0.8 * self.duracion_media + 0.2 * duracion
+        with self._lock:
+            self._ocupado = False
+        self._notificar(False)
+
+    def _notificar(self, ocupado):
+        if self.al_cambiar_estado is not None:
+            try:
+                self.al_cambiar_estado(ocupado)
+            except Exception as e:
+                print(f"Error al notificar estado de actualización: {e}")
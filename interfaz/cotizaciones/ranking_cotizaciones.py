@@ -0,0 +1,86 @@
+"""
+Este archivo contiene los índices ordenados de la tabla de cotizaciones:
+
+- Una lista ordenada (valor, símbolo) por cada columna que se pidió ordenar, creada la primera vez
+- Actualización incremental en O(log n) por símbolo cuando llegan precios del stream
+- Ventanas de cualquier columna sin reordenar toda la tabla
+"""
+
+from typing import Dict, Iterable, Iterator, List
+
+from sortedcontainers import SortedList
+
+# Columnas de la tabla que se pueden ordenar con un índice
+COLUMNAS_ORDENABLES = (
+    'posicion', 'nombre', 'precio', 'cambio_1h', 'cambio_24h', 'cambio_7d', 'volumen_24h', 'cap_mercado',
+    'suministro_circulante', 'rsi', 'volatilidad_7d', 'desviacion_vwap',
+)
+
+
+class RankingCotizaciones:
+    """Índices ordenados por columna sobre un conjunto de filas de cotizaciones."""
+
+    def __init__(self, filas: Iterable):
+        self.filas = {fila['simbolo']: fila for fila in filas}
+        self.valores: Dict[str, Dict[str, float]] = {}
+        self.indices: Dict[str, SortedList] = {}
+
+    def __len__(self):
+        return len(self.filas)
+
+    def indice(self, columna) -> SortedList:
+        """Índice de una columna; se arma en O(n log n) la primera vez que se pide."""
+        indice = self.indices.get(columna)
+        if indice is None:
+            if columna not in COLUMNAS_ORDENABLES:
+                raise KeyError(columna)
+            valores = self.valores[columna] = {simbolo: fila.get(columna, 0.0) for simbolo, fila in self.filas.items()}
+            indice = self.indices[columna] = SortedList((valor, simbolo) for simbolo, valor in valores.items())
+        return indice
+
+    def actualizar(self, simbolos: Iterable[str], columnas: Iterable[str] = None) -> int:
+        """
+        Reubica en los índices ya armados los símbolos cuyos valores cambiaron; `columnas` limita los
+        índices a revisar. Devuelve cuántas claves se movieron.
+        """
+        indices = self.indices if columnas is None else {
+            columna: self.indices[columna] for columna in columnas if columna in self.indices}
+        movidas = 0
+        for simbolo in simbolos:
+            fila = self.filas.get(simbolo)
+            if fila is None:
+                continue
+            for columna, indice in indices.items():
+                valores = self.valores[columna]
+                anterior = valores[simbolo]
+                nuevo = fila.get(columna, 0.0)
+                if nuevo == anterior:
+                    continue
+                indice.remove((anterior, simbolo))
+                indice.add((nuevo, simbolo))
+                valores[simbolo] = nuevo
+                movidas += 1
+        return movidas
+
+    def simbolos(self, columna, inicio=0, fin=None, descendente=True) -> Iterator[str]:
+        """Símbolos en las posiciones [inicio, fin) del orden pedido."""
+        indice = self.indice(columna)
+        total = len(indice)
+        fin = total if fin is None else min(fin, total)
+        inicio = max(0, inicio)
+        if inicio >= fin:
+            return iter(())
+        if descendente:
+            claves = indice.islice(total - fin, total - inicio, reverse=True)
+        else:
+            claves = indice.islice(inicio, fin)
+        return (simbolo for _, simbolo in claves)
+
+    def rango(self, columna, inicio, fin, descendente=True) -> List:
+        """Filas en las posiciones [inicio, fin) del orden pedido, en O(log n + fin - inicio)."""
+        return [self.filas[simbolo] for simbolo in self.simbolos(columna, inicio, fin, descendente)]
+
+    def ordenadas(self, columna, descendente=True) -> Iterator:
+        """Todas las filas en el orden de la columna."""
+        return (self.filas[simbolo] for simbolo in self.simbolos(columna, descendente=descendente))
+
@@ -6,20 +6,30 @@ Este archivo gestiona la interfaz de usuario:
 - Actualización de elementos de UI
 """
 
+import threading
 import dearpygui.dearpygui as dpg
 from datetime import datetime
 import config
+from interfaz.cotizaciones.ranking_cotizaciones import RankingCotizaciones
 
-def crear_panel_cotizaciones(btn_actualizar_fn, chk_auto_actualizacion_fn):
+def crear_panel_cotizaciones(btn_actualizar_fn, chk_auto_actualizacion_fn, chk_streaming_fn=None, chk_mercado_completo_fn=None,
+                             input_limite_fn=None):
     """Crea el panel en la interfaz de cotizaciones el panel de cotizaciones"""
     try:
         # Panel de control con límite y botón de actualización
         with dpg.group(horizontal=True):
             dpg.add_text("Número de criptomonedas:")
             dpg.add_input_int(label="", default_value=config.LIMITE_CRIPTOMONEDAS_DEFAULT, 
-                            min_value=1, max_value=100, tag="input_limite", width=100)
+                            min_value=1, max_value=100, tag="input_limite", width=100,
+                            callback=input_limite_fn)
             dpg.add_button(label="Actualizar Datos", callback=btn_actualizar_fn, 
                           tag="btn_actualizar")
+            dpg.add_checkbox(label="Mercado completo", default_value=config.MODO_MERCADO_COMPLETO,
+                             callback=chk_mercado_completo_fn, tag="chk_mercado_completo")
+            dpg.add_input_text(hint="Filtrar por ticker o nombre", tag="input_filtro", width=200,
+                               callback=filtro_tabla_handler)
+            dpg.add_combo(list(VISTAS_RAPIDAS), default_value="Ranking", tag="combo_vista_rapida", width=150,
+                          callback=vista_rapida_handler)
         
         # Checkbox para actualización automática
         with dpg.group(horizontal=True):
@@ -29,6 +39,12 @@ def crear_panel_cotizaciones(btn_actualizar_fn, chk_auto_actualizacion_fn):
                 callback=chk_auto_actualizacion_fn, 
                 tag="chk_auto_actualizacion"
             )
+            dpg.add_checkbox(
+                label="Streaming en tiempo real",
+                default_value=config.MODO_STREAMING_HABILITADO,
+                callback=chk_streaming_fn,
+                tag="chk_streaming"
+            )
             dpg.add_text("Última act: --:--:--", tag="txt_ultima_actualizacion")
         
         dpg.add_spacer(height=10)
@@ -55,32 +71,72 @@ def obtener_color_cambio(valor):
         return [255, 255, 255, 255]  # Blanco para valores neutros
 
 
-def crear_tabla_cotizaciones(datos, formatear_precio, formatear_porcentaje, formatear_volumen):
-    """Crea la tabla de cotizaciones con los datos proporcionados"""
-    try:
-        # Eliminar tabla si ya existe
-        if dpg.does_item_exist("tabla_cotizaciones"):
-            dpg.delete_item("tabla_cotizaciones")
-            
-        # Definir anchos de columnas
-        anchos = {
-            "#": 50,
-            "Nombre": 250,
-            "Precio": 100,
-            "1h%": 80,
-            "24h%": 80,
-            "7d%": 80,
-            "Volumen 24h": 120,
-            "Cap. Mercado": 120,
-            "Suministro": 120
-        }
-        
-        # Calcular ancho total
-        ancho_total = sum(anchos.values())
-        
-        # Crear tabla
+# Anchos de columnas de la tabla de cotizaciones
+ANCHOS_COLUMNAS = {
+    "#": 50,
+    "Nombre": 250,
+    "Precio": 100,
+    "1h%": 80,
+    "24h%": 80,
+    "7d%": 80,
+    "Volumen 24h": 120,
+    "Cap. Mercado": 120,
+    "Suministro": 120,
+    "RSI": 60,
+    "Volat. 7d": 80,
+    "Desv. VWAP": 90
+}
+
+# Color de texto "sin asignar" de dearpygui: vuelve al del tema
+COLOR_TEXTO_TEMA = [-255, 0, 0, 255]
+COLOR_DESACTUALIZADO = [255, 165, 0, 255]
+
+# Campo por el que ordena cada columna al hacer clic en su encabezado
+CAMPOS_COLUMNAS = {
+    "#": 'posicion',
+    "Nombre": 'nombre',
+    "Precio": 'precio',
+    "1h%": 'cambio_1h',
+    "24h%": 'cambio_24h',
+    "7d%": 'cambio_7d',
+    "Volumen 24h": 'volumen_24h',
+    "Cap. Mercado": 'cap_mercado',
+    "Suministro": 'suministro_circulante',
+    "RSI": 'rsi',
+    "Volat. 7d": 'volatilidad_7d',
+    "Desv. VWAP": 'desviacion_vwap'
+}
+
+# Vistas predefinidas: (campo, descendente), o None para el orden del ranking
+VISTAS_RAPIDAS = {
+    "Ranking": None,
+    "Top ganadores 24h": ('cambio_24h', True),
+    "Top perdedores 24h": ('cambio_24h', False),
+    "Top volumen 24h": ('volumen_24h', True),
+}
+
+# Filas de widgets reutilizadas: la fila i del pool muestra la fila desplazamiento + i de los datos visibles.
+# Cada una es {'fila': id, 'celdas': [ids], 'valores': [(texto, color)] o None si está oculta}
+filas_pool = []
+datos_tabla = None  # filas que pasan el filtro, en orden; None si no hay filtro
+origen_tabla = None  # filas en el orden del ranking
+ranking_tabla = None  # índices ordenados de origen_tabla; se crean al elegir un orden
+orden_tabla = None  # (campo, descendente) o None para el orden de origen_tabla
+columnas_tabla = {}  # id de columna -> campo
+texto_filtro = ""
+desplazamiento = 0
+formateadores = None
+lock_tabla = threading.RLock()
+
+def crear_estructura_tabla():
+    """Crea la tabla con un pool fijo de filas y la barra de desplazamiento (solo la primera vez)"""
+    filas_pool.clear()
+    columnas_tabla.clear()
+    if dpg.does_item_exist("grupo_tabla_cotizaciones"):
+        dpg.delete_item("grupo_tabla_cotizaciones")
+    
+    with dpg.group(horizontal=True, parent="contenedor_tabla", tag="grupo_tabla_cotizaciones"):
         with dpg.table(tag="tabla_cotizaciones",
-                       parent="contenedor_tabla",
                        header_row=True,
                        borders_innerH=True,
                        borders_innerV=True,
@@ -88,86 +144,235 @@ def crear_tabla_cotizaciones(datos, formatear_precio, formatear_porcentaje, form
                        borders_outerV=True,
                        resizable=True,
                        height=320,
-                       width=ancho_total,
+                       width=sum(ANCHOS_COLUMNAS.values()),
                        policy=dpg.mvTable_SizingFixedFit,
-                    #    scrollX=True,
-                    #    scrollY=True,
-                       freeze_columns=1):
-            
-            # Añadir columnas
-            dpg.add_table_column(label="#", width=anchos["#"])
-            dpg.add_table_column(label="Nombre", width=anchos["Nombre"])
-            dpg.add_table_column(label="Precio", width=anchos["Precio"])
-            dpg.add_table_column(label="1h%", width=anchos["1h%"])
-            dpg.add_table_column(label="24h%", width=anchos["24h%"])
-            dpg.add_table_column(label="7d%", width=anchos["7d%"])
-            dpg.add_table_column(label="Volumen 24h", width=anchos["Volumen 24h"])
-            dpg.add_table_column(label="Cap. Mercado", width=anchos["Cap. Mercado"])
-            dpg.add_table_column(label="Suministro", width=anchos["Suministro"])
-            
-            # Si no hay datos, mostrar mensaje
-            if not datos:
-                with dpg.table_row():
-                    dpg.add_text("--")
-                    dpg.add_text("No hay datos disponibles", color=[255, 165, 0, 255])
-                    for _ in range(7):
-                        dpg.add_text("--")
-                return
+                       freeze_columns=1,
+                       sortable=True,
+                       callback=ordenar_tabla_handler):
+            for etiqueta, ancho in ANCHOS_COLUMNAS.items():
+                columnas_tabla[dpg.add_table_column(label=etiqueta, width=ancho)] = CAMPOS_COLUMNAS[etiqueta]
+            for _ in range(config.FILAS_VISIBLES_COTIZACIONES):
+                with dpg.table_row(show=False) as fila:
+                    celdas = [dpg.add_text("") for _ in ANCHOS_COLUMNAS]
+                filas_pool.append({'fila': fila, 'celdas': celdas, 'valores': None})
+        
+        # Barra vertical: arriba está el máximo, que corresponde al desplazamiento 0
+        dpg.add_slider_int(tag="slider_tabla_cotizaciones", vertical=True, height=320, width=14,
+                           min_value=0, max_value=0, default_value=0, format="",
+                           callback=slider_tabla_handler)
+    
+    if not dpg.does_item_exist("manejadores_tabla_cotizaciones"):
+        with dpg.handler_registry(tag="manejadores_tabla_cotizaciones"):
+            dpg.add_mouse_wheel_handler(callback=rueda_tabla_handler)
+
+def formatear_fila(crypto, formatear_precio, formatear_porcentaje, formatear_volumen):
+    """Devuelve la lista de (texto, color) de cada celda de una fila"""
+    cambio_1h_val = crypto.get('cambio_1h', 0)
+    cambio_24h_val = crypto.get('cambio_24h', 0)
+    cambio_7d_val = crypto.get('cambio_7d', 0)
+    
+    # Formatear cap. mercado
+    cap_mercado_val = crypto.get('cap_mercado', 'N/A')
+    cap_mercado = formatear_volumen(cap_mercado_val) if isinstance(cap_mercado_val, (int, float)) else 'N/A'
+    
+    # Formatear suministro
+    suministro_val = crypto.get('suministro_circulante', 'N/A')
+    suministro = f"{suministro_val:,.0f}" if isinstance(suministro_val, (int, float)) else 'N/A'
+    
+    desviacion_vwap_val = crypto.get('desviacion_vwap', 0)
+    
+    return [
+        (str(crypto.get('posicion', '--')), None),
+        (truncar_texto(crypto.get('nombre', 'N/A'), 25), None),
+        (formatear_precio(crypto.get('precio', 0)), None),
+        (formatear_porcentaje(cambio_1h_val), obtener_color_cambio(cambio_1h_val)),
+        (formatear_porcentaje(cambio_24h_val), obtener_color_cambio(cambio_24h_val)),
+        (formatear_porcentaje(cambio_7d_val), obtener_color_cambio(cambio_7d_val)),
+        (formatear_volumen(crypto.get('volumen_24h', 0)), None),
+        (cap_mercado, None),
+        (suministro, None),
+        (f"{crypto.get('rsi', 50):.0f}", None),
+        (f"{crypto.get('volatilidad_7d', 0):.2f}%", None),
+        (formatear_porcentaje(desviacion_vwap_val), obtener_color_cambio(desviacion_vwap_val)),
+    ]
+
+def mostrar_fila(fila, valores):
+    """Muestra en una fila del pool los valores dados, modificando solo las celdas que cambiaron"""
+    anteriores = fila['valores']
+    if valores is None:
+        if anteriores is not None:
+            dpg.configure_item(fila['fila'], show=False)
+            fila['valores'] = None
+        return
+    if anteriores is None:
+        dpg.configure_item(fila['fila'], show=True)
+        anteriores = [(None, None)] * len(valores)
+    for celda, anterior, nuevo in zip(fila['celdas'], anteriores, valores):
+        if anterior[0] != nuevo[0]:
+            dpg.set_value(celda, nuevo[0])
+        if anterior[1] != nuevo[1]:
+            dpg.configure_item(celda, color=nuevo[1] or COLOR_TEXTO_TEMA)
+    fila['valores'] = valores
+
+def fila_sin_datos(mensaje):
+    return [("--", None), (mensaje, [255, 165, 0, 255])] + [("--", None)] * (len(ANCHOS_COLUMNAS) - 2)
+
+def coincide_filtro(crypto, filtro):
+    return filtro in crypto.get('ticker', '').lower() or filtro in crypto.get('nombre', '').lower()
+
+def total_filas():
+    return len(datos_tabla) if datos_tabla is not None else len(origen_tabla or ())
+
+def filas_ventana(inicio, fin):
+    """Filas visibles en [inicio, fin): de la lista filtrada o directamente del índice de la columna ordenada"""
+    if datos_tabla is not None:
+        return datos_tabla[inicio:fin]
+    if orden_tabla is None:
+        return (origen_tabla or [])[inicio:fin]
+    campo, descendente = orden_tabla
+    return ranking_tabla.rango(campo, inicio, fin, descendente)
+
+def dibujar_filas_visibles():
+    """Formatea y muestra solo las filas que entran en la ventana visible"""
+    global desplazamiento
+    if filtro_pendiente:
+        aplicar_filtro()
+    visibles = len(filas_pool)
+    total = total_filas()
+    maximo = max(0, total - visibles)
+    desplazamiento = min(max(0, desplazamiento), maximo)
+    
+    ventana = filas_ventana(desplazamiento, desplazamiento + visibles)
+    for i, fila in enumerate(filas_pool):
+        if i < len(ventana):
+            valores = formatear_fila(ventana[i], *formateadores)
+        elif i == 0 and not total:
+            valores = fila_sin_datos("Sin resultados para el filtro" if texto_filtro else "No hay datos disponibles")
+        else:
+            valores = None
+        mostrar_fila(fila, valores)
+    
+    dpg.configure_item("slider_tabla_cotizaciones", max_value=maximo, show=maximo > 0)
+    dpg.set_value("slider_tabla_cotizaciones", maximo - desplazamiento)
+
+def crear_tabla_cotizaciones(datos, formatear_precio, formatear_porcentaje, formatear_volumen):
+    """Actualiza la tabla de cotizaciones: filtra los datos y redibuja solo la ventana visible"""
+    global origen_tabla, ranking_tabla, formateadores
+    try:
+        with lock_tabla:
+            if not dpg.does_item_exist("tabla_cotizaciones"):
+                crear_estructura_tabla()
             
-            # Añadir filas de datos
-            for crypto in datos:
-                # Obtener datos
-                posicion = crypto.get('posicion', '--')
-                nombre = truncar_texto(crypto.get('nombre', 'N/A'), 25)
-                precio = formatear_precio(crypto.get('precio', 0))
-                
-                cambio_1h_val = crypto.get('cambio_1h', 0)
-                cambio_24h_val = crypto.get('cambio_24h', 0)
-                cambio_7d_val = crypto.get('cambio_7d', 0)
-                
-                cambio_1h = formatear_porcentaje(cambio_1h_val)
-                cambio_24h = formatear_porcentaje(cambio_24h_val)
-                cambio_7d = formatear_porcentaje(cambio_7d_val)
-                
-                volumen = formatear_volumen(crypto.get('volumen_24h', 0))
-                
-                # Formatear cap. mercado
-                cap_mercado_val = crypto.get('cap_mercado', 'N/A')
-                cap_mercado = formatear_volumen(cap_mercado_val) if isinstance(cap_mercado_val, (int, float)) else 'N/A'
-                
-                # Formatear suministro
-                suministro_val = crypto.get('suministro_circulante', 'N/A')
-                suministro = f"{suministro_val:,.0f}" if isinstance(suministro_val, (int, float)) else 'N/A'
-                
-                # Colores para cambios porcentuales
-                color_1h = obtener_color_cambio(cambio_1h_val)
-                color_24h = obtener_color_cambio(cambio_24h_val)
-                color_7d = obtener_color_cambio(cambio_7d_val)
-                
-                # Crear fila
-                with dpg.table_row():
-                    dpg.add_text(str(posicion))
-                    dpg.add_text(nombre)
-                    dpg.add_text(precio)
-                    dpg.add_text(cambio_1h, color=color_1h)
-                    dpg.add_text(cambio_24h, color=color_24h)
-                    dpg.add_text(cambio_7d, color=color_7d)
-                    dpg.add_text(volumen)
-                    dpg.add_text(cap_mercado)
-                    dpg.add_text(suministro)
-                    
+            formateadores = (formatear_precio, formatear_porcentaje, formatear_volumen)
+            # Las actualizaciones del stream modifican las filas en el lugar: se reutilizan índices y filtrado
+            if datos is not origen_tabla or len(datos) != len(origen_tabla):
+                origen_tabla = datos
+                ranking_tabla = RankingCotizaciones(datos) if orden_tabla is not None else None
+                aplicar_filtro()
+            dibujar_filas_visibles()
     except Exception as e:
         print(f"Error al crear tabla: {e}")
 
+filtro_pendiente = False  # el orden cambió y la lista filtrada debe recalcularse al dibujar
+
+def aplicar_filtro():
+    """Recalcula las filas que pasan el filtro de texto, sin consultar la API"""
+    global datos_tabla, filtro_pendiente
+    filtro_pendiente = False
+    filtro = texto_filtro.strip().lower()
+    if not filtro:
+        datos_tabla = None
+        return
+    if orden_tabla is None:
+        datos = origen_tabla or []
+    else:
+        datos = ranking_tabla.ordenadas(*orden_tabla)
+    datos_tabla = [crypto for crypto in datos if coincide_filtro(crypto, filtro)]
+
+def actualizar_orden_tabla(simbolos, campos=None):
+    """Reubica en los índices las filas que cambiaron (O(log n) por símbolo y columna)"""
+    global filtro_pendiente
+    with lock_tabla:
+        if ranking_tabla is None:
+            return
+        if ranking_tabla.actualizar(simbolos, campos) and datos_tabla is not None:
+            filtro_pendiente = True
+
+def ordenar_tabla(campo, descendente=True):
+    """Ordena la tabla por un campo usando su índice; None vuelve al orden del ranking"""
+    global orden_tabla, ranking_tabla, desplazamiento
+    with lock_tabla:
+        orden_tabla = (campo, descendente) if campo is not None else None
+        if orden_tabla is not None and ranking_tabla is None and origen_tabla is not None:
+            ranking_tabla = RankingCotizaciones(origen_tabla)
+        desplazamiento = 0
+        if formateadores is None:
+            return
+        aplicar_filtro()
+        dibujar_filas_visibles()
+
+def ordenar_tabla_handler(sender, app_data):
+    """Ordena por la columna cuyo encabezado se clickeó"""
+    if not app_data:
+        ordenar_tabla(None)
+        return
+    columna, direccion = app_data[0]
+    campo = columnas_tabla.get(columna)
+    if campo == 'posicion' and direccion > 0:
+        campo = None
+    ordenar_tabla(campo, direccion < 0)
+
+def vista_rapida_handler(sender, app_data):
+    """Muestra una vista predefinida (top ganadores, top volumen...)"""
+    orden = VISTAS_RAPIDAS.get(app_data)
+    ordenar_tabla(*(orden or (None,)))
+
+def filtro_tabla_handler(sender, app_data):
+    """Filtra la tabla por ticker o nombre mientras se escribe"""
+    global texto_filtro, desplazamiento
+    if formateadores is None:
+        return
+    with lock_tabla:
+        texto_filtro = app_data
+        desplazamiento = 0
+        aplicar_filtro()
+        dibujar_filas_visibles()
+
+def desplazar_tabla(nuevo_desplazamiento):
+    global desplazamiento
+    if formateadores is None:
+        return
+    with lock_tabla:
+        desplazamiento = nuevo_desplazamiento
+        dibujar_filas_visibles()
+
+def slider_tabla_handler(sender, app_data):
+    """Desplaza la tabla con la barra vertical"""
+    maximo = dpg.get_item_configuration("slider_tabla_cotizaciones")["max_value"]
+    desplazar_tabla(maximo - app_data)
+
+def rueda_tabla_handler(sender, app_data):
+    """Desplaza la tabla con la rueda del mouse cuando el cursor está sobre ella"""
+    if dpg.does_item_exist("tabla_cotizaciones") and dpg.is_item_hovered("tabla_cotizaciones"):
+        desplazar_tabla(desplazamiento - int(app_data) * config.FILAS_POR_PASO_RUEDA)
+
 def actualizar_hora_actualizacion():
     """Actualiza la hora de última actualización"""
     try:
         if dpg.does_item_exist("txt_ultima_actualizacion"):
             hora_actual = datetime.now().strftime("%H:%M:%S")
             dpg.set_value("txt_ultima_actualizacion", f"Última act: {hora_actual}")
+            dpg.configure_item("txt_ultima_actualizacion", color=COLOR_TEXTO_TEMA)
     except Exception as e:
         print(f"Error al actualizar hora: {e}")
 
+def mostrar_datos_desactualizados(instante):
+    """Indica que la tabla muestra el snapshot guardado mientras llegan datos nuevos"""
+    if dpg.does_item_exist("txt_ultima_actualizacion"):
+        hora = datetime.fromtimestamp(instante).strftime("%d/%m %H:%M:%S")
+        dpg.set_value("txt_ultima_actualizacion", f"Datos guardados del {hora} (desactualizados)")
+        dpg.configure_item("txt_ultima_actualizacion", color=COLOR_DESACTUALIZADO)
+
 def actualizar_estado_boton(actualizando):
     """Actualiza el estado del botón de actualización"""
     if dpg.does_item_exist("btn_actualizar"):
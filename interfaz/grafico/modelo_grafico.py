@@ -0,0 +1,92 @@
+"""
+Este archivo contiene los datos del gráfico de velas:
+
+- Serie completa de velas en arreglos de NumPy, cargada desde el almacén local
+- Recorte del rango visible con búsqueda binaria
+- Submuestreo por cubetas (apertura, máximo, mínimo, cierre, volumen) al ancho en píxeles
+- Actualización de la vela en curso con cada precio nuevo
+"""
+
+import numpy as np
+from api.almacen_velas import DURACION_INTERVALOS, ahora_ms, obtener_almacen_velas
+
+class SerieVelas:
+    """Velas de un símbolo e intervalo en arreglos paralelos (tiempos en segundos)."""
+
+    def __init__(self, simbolo, intervalo, velas):
+        self.simbolo = simbolo
+        self.intervalo = intervalo
+        self.duracion = DURACION_INTERVALOS[intervalo] / 1000
+        datos = np.array(velas, dtype=np.float64).reshape(-1, 7)
+        self.tiempos = datos[:, 0] / 1000
+        self.aperturas = datos[:, 1].copy()
+        self.maximos = datos[:, 2].copy()
+        self.minimos = datos[:, 3].copy()
+        self.cierres = datos[:, 4].copy()
+        self.volumenes = datos[:, 5].copy()
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    def rango(self, desde, hasta):
+        """Índices [inicio, fin) de las velas con tiempo entre desde y hasta."""
+        inicio = int(np.searchsorted(self.tiempos, desde, side='left'))
+        fin = int(np.searchsorted(self.tiempos, hasta, side='right'))
+        return max(0, inicio - 1), min(len(self), fin + 1)
+
+    def actualizar_precio(self, precio, instante):
+        """Aplica un precio a la vela en curso, o agrega una vela nueva si cambió el periodo.
+
+        Devuelve True si se agregó una vela.
+        """
+        if len(self) and instante < self.tiempos[-1] + self.duracion:
+            self.cierres[-1] = precio
+            self.maximos[-1] = max(self.maximos[-1], precio)
+            self.minimos[-1] = min(self.minimos[-1], precio)
+            return False
+        apertura = instante - instante % self.duracion
+        self.tiempos = np.append(self.tiempos, apertura)
+        self.aperturas = np.append(self.aperturas, precio)
+        self.maximos = np.append(self.maximos, precio)
+        self.minimos = np.append(self.minimos, precio)
+        self.cierres = np.append(self.cierres, precio)
+        self.volumenes = np.append(self.volumenes, 0.0)
+        return True
+
+def submuestrear(serie, inicio, fin, cubetas):
+    """Agrupa las velas [inicio, fin) en a lo sumo `cubetas` velas.
+
+    Cada cubeta conserva la apertura de su primera vela, el cierre de la
+    última, el máximo y mínimo del grupo y la suma del volumen, así que los
+    extremos de precio nunca se pierden. Devuelve (arreglos, velas por cubeta).
+    """
+    cantidad = fin - inicio
+    if cantidad <= 0:
+        vacio = np.empty(0)
+        return (vacio, vacio, vacio, vacio, vacio, vacio), 1
+    paso = max(1, -(-cantidad // max(1, cubetas)))
+    if paso == 1:
+        return (serie.tiempos[inicio:fin], serie.aperturas[inicio:fin], serie.cierres[inicio:fin],
+                serie.minimos[inicio:fin], serie.maximos[inicio:fin], serie.volumenes[inicio:fin]), 1
+
+    comienzos = np.arange(inicio, fin, paso)
+    finales = np.minimum(comienzos + paso, fin) - 1
+    return (
+        serie.tiempos[comienzos],
+        serie.aperturas[comienzos],
+        serie.cierres[finales],
+        np.minimum.reduceat(serie.minimos[inicio:fin], comienzos - inicio),
+        np.maximum.reduceat(serie.maximos[inicio:fin], comienzos - inicio),
+        np.add.reduceat(serie.volumenes[inicio:fin], comienzos - inicio),
+    ), paso
+
+def cargar_serie(simbolo, intervalo, dias):
+    """Completa el almacén con los últimos `dias` de velas y devuelve la serie."""
+    almacen = obtener_almacen_velas()
+    desde = ahora_ms() - int(dias * 86_400_000)
+    almacen.completar_historial(simbolo, intervalo, desde)
+    velas = almacen.leer(simbolo, intervalo, desde_ms=desde)
+    vela_en_curso = almacen.vela_en_curso(simbolo, intervalo)
+    if vela_en_curso:
+        velas.append(vela_en_curso)
+    return SerieVelas(simbolo, intervalo, velas)
@@ -0,0 +1,173 @@
+"""
+Este archivo contiene la ventana de Gráfico:
+
+- Gráfico nativo de velas y volumen de dearpygui, sin rasterizar imágenes
+- Redibujado del rango visible submuestreado al ancho del gráfico al hacer zoom o desplazar
+- Actualización de solo la última vela con cada precio nuevo
+"""
+
+import threading
+import time
+import dearpygui.dearpygui as dpg
+import config
+from api.almacen_velas import DURACION_INTERVALOS
+from interfaz.grafico.modelo_grafico import cargar_serie, submuestrear
+from interfaz.cotizaciones.controlador_cotizaciones import agregar_oyente_cotizaciones
+from interfaz.bus_ui import bus_ui
+
+RANGOS_HISTORIAL = {"1 día": 1, "1 semana": 7, "1 mes": 30, "1 año": 365}
+
+# Unidades de tiempo de dearpygui y su duración en segundos, de menor a mayor
+UNIDADES_TIEMPO = [
+    (dpg.mvTimeUnit_S, 1),
+    (dpg.mvTimeUnit_Min, 60),
+    (dpg.mvTimeUnit_Hr, 3600),
+    (dpg.mvTimeUnit_Day, 86400),
+    (dpg.mvTimeUnit_Mo, 2_592_000),
+    (dpg.mvTimeUnit_Yr, 31_536_000),
+]
+
+serie_actual = None
+rango_dibujado = None  # (desde, hasta, ancho) del último redibujado
+vista_actual = None  # listas submuestreadas que se muestran: tiempos, aperturas, cierres, mínimos, máximos, volúmenes
+lock_grafico = threading.Lock()
+
+def crear_panel_grafico():
+    """Crea los controles y los gráficos de velas y volumen"""
+    try:
+        with dpg.group(horizontal=True):
+            dpg.add_input_text(tag="input_grafico_simbolo", default_value="BTCUSDT", uppercase=True, width=100)
+            dpg.add_combo(list(DURACION_INTERVALOS), tag="combo_grafico_intervalo",
+                          default_value=config.INTERVALO_GRAFICO_DEFAULT, width=60)
+            dpg.add_combo(list(RANGOS_HISTORIAL), tag="combo_grafico_rango", default_value="1 semana", width=90)
+            dpg.add_button(label="Cargar", callback=btn_cargar_grafico_handler)
+            dpg.add_text("", tag="txt_grafico_estado")
+
+        with dpg.subplots(2, 1, row_ratios=[3, 1], link_all_x=True, width=-1, height=-1, tag="subplots_grafico"):
+            with dpg.plot(tag="plot_velas", no_title=True):
+                dpg.add_plot_axis(dpg.mvXAxis, time=True, tag="eje_x_velas")
+                with dpg.plot_axis(dpg.mvYAxis, tag="eje_y_velas"):
+                    dpg.add_candle_series([], [], [], [], [], tag="serie_velas", time_unit=dpg.mvTimeUnit_Hr)
+            with dpg.plot(tag="plot_volumen", no_title=True):
+                dpg.add_plot_axis(dpg.mvXAxis, time=True, tag="eje_x_volumen")
+                with dpg.plot_axis(dpg.mvYAxis, tag="eje_y_volumen"):
+                    dpg.add_bar_series([], [], tag="serie_volumen")
+
+        # Se revisa el rango visible en cada cuadro en que el gráfico se ve
+        with dpg.item_handler_registry(tag="manejadores_grafico"):
+            dpg.add_item_visible_handler(callback=grafico_visible_handler)
+        dpg.bind_item_handler_registry("plot_velas", "manejadores_grafico")
+
+        agregar_oyente_cotizaciones(cotizaciones_grafico)
+    except Exception as e:
+        print(f"Error al crear panel de gráfico: {e}")
+
+def btn_cargar_grafico_handler(sender=None, app_data=None, user_data=None):
+    """Manejador del botón Cargar: descarga lo que falte en segundo plano"""
+    simbolo = dpg.get_value("input_grafico_simbolo").strip()
+    intervalo = dpg.get_value("combo_grafico_intervalo")
+    dias = RANGOS_HISTORIAL[dpg.get_value("combo_grafico_rango")]
+    dpg.set_value("txt_grafico_estado", "Cargando...")
+    threading.Thread(target=cargar_grafico, args=(simbolo, intervalo, dias), daemon=True).start()
+
+def cargar_grafico(simbolo, intervalo, dias):
+    """Carga la serie desde el almacén local en segundo plano y publica su dibujo"""
+    try:
+        serie = cargar_serie(simbolo, intervalo, dias)
+        if not len(serie):
+            bus_ui.publicar("estado_grafico", dpg.set_value, "txt_grafico_estado", "Sin datos")
+            return
+        bus_ui.publicar("serie_grafico", mostrar_serie, serie)
+    except Exception as e:
+        print(f"Error al cargar gráfico: {e}")
+        bus_ui.publicar("estado_grafico", dpg.set_value, "txt_grafico_estado", "Error al cargar")
+
+def mostrar_serie(serie):
+    """Dibuja una serie completa; se ejecuta en el hilo de render"""
+    global serie_actual, rango_dibujado
+    with lock_grafico:
+        serie_actual = serie
+        rango_dibujado = None
+        dibujar_rango(serie.tiempos[0], serie.tiempos[-1] + serie.duracion)
+    dpg.fit_axis_data("eje_x_velas")
+    dpg.fit_axis_data("eje_y_velas")
+    dpg.fit_axis_data("eje_y_volumen")
+    dpg.set_value("txt_grafico_estado", f"{len(serie)} velas")
+
+def ancho_grafico():
+    """Ancho del gráfico en píxeles: una cubeta por píxel"""
+    ancho = dpg.get_item_rect_size("plot_velas")[0] if dpg.does_item_exist("plot_velas") else 0
+    return max(100, int(ancho or 800))
+
+def elegir_unidad_tiempo(segundos):
+    """Unidad de tiempo más grande que entra en la duración de una cubeta"""
+    elegida = UNIDADES_TIEMPO[0][0]
+    for unidad, duracion in UNIDADES_TIEMPO:
+        if duracion <= segundos:
+            elegida = unidad
+    return elegida
+
+def dibujar_rango(desde, hasta):
+    """Submuestrea el rango visible y reemplaza los datos de las series"""
+    global rango_dibujado, vista_actual
+    serie = serie_actual
+    ancho = ancho_grafico()
+    inicio, fin = serie.rango(desde, hasta)
+    datos, paso = submuestrear(serie, inicio, fin, ancho)
+    vista_actual = [columna.tolist() for columna in datos]
+    duracion_cubeta = serie.duracion * paso
+
+    dpg.configure_item("serie_velas", time_unit=elegir_unidad_tiempo(duracion_cubeta))
+    dpg.set_value("serie_velas", vista_actual[:5])
+    dpg.set_value("serie_volumen", [vista_actual[0], vista_actual[5]])
+    dpg.configure_item("serie_volumen", weight=duracion_cubeta * 0.8)
+    rango_dibujado = (desde, hasta, ancho)
+
+def grafico_visible_handler(sender=None, app_data=None, user_data=None):
+    """Redibuja solo si cambió el rango visible (zoom o desplazamiento) o el ancho"""
+    if serie_actual is None:
+        return
+    desde, hasta = dpg.get_axis_limits("eje_x_velas")
+    with lock_grafico:
+        if rango_dibujado is not None:
+            anterior_desde, anterior_hasta, anterior_ancho = rango_dibujado
+            tolerancia = (anterior_hasta - anterior_desde) * 0.01
+            if (abs(desde - anterior_desde) <= tolerancia and abs(hasta - anterior_hasta) <= tolerancia
+                    and anterior_ancho == ancho_grafico()):
+                return
+        dibujar_rango(desde, hasta)
+    dpg.fit_axis_data("eje_y_velas")
+    dpg.fit_axis_data("eje_y_volumen")
+
+def cotizaciones_grafico(precios):
+    """Aplica el precio nuevo a la vela en curso y publica el redibujado de solo la última vela"""
+    serie = serie_actual
+    if serie is None or serie.simbolo not in precios:
+        return
+    with lock_grafico:
+        vela_nueva = serie.actualizar_precio(precios[serie.simbolo], time.time())
+    if vela_nueva:
+        bus_ui.publicar("grafico_rango", redibujar_rango_actual, serie)
+    else:
+        bus_ui.publicar("grafico_ultima_vela", actualizar_ultima_vela, serie)
+
+def muestra_ultima_vela(serie):
+    """Si el gráfico muestra la serie y su vela en curso"""
+    return serie is serie_actual and rango_dibujado is not None and rango_dibujado[1] >= serie.tiempos[-1]
+
+def redibujar_rango_actual(serie):
+    """Redibuja el rango visible cuando empieza una vela nueva"""
+    with lock_grafico:
+        if muestra_ultima_vela(serie):
+            dibujar_rango(rango_dibujado[0], rango_dibujado[1])
+
+def actualizar_ultima_vela(serie):
+    """Actualiza solo la última cubeta dibujada, que contiene la vela en curso"""
+    with lock_grafico:
+        if not muestra_ultima_vela(serie):
+            return
+        precio = float(serie.cierres[-1])
+        vista_actual[2][-1] = precio
+        vista_actual[3][-1] = min(vista_actual[3][-1], precio)
+        vista_actual[4][-1] = max(vista_actual[4][-1], precio)
+        dpg.set_value("serie_velas", vista_actual[:5])
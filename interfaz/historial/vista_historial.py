@@ -0,0 +1,157 @@
+"""
+Este archivo contiene la ventana de Historial de operaciones:
+
+- Filtros por par, lado y usuario resueltos contra el índice del historial
+- Tabla paginada: solo existen los widgets de las filas de una página
+- Refresco agrupado cuando el diario registra operaciones nuevas
+- El diario y el índice se abren en segundo plano, sin frenar el hilo de render
+"""
+
+import threading
+from datetime import datetime
+import dearpygui.dearpygui as dpg
+import config
+from simulador.diario import obtener_diario
+from simulador.historial import obtener_indice_historial
+from interfaz.cotizaciones.modelo_cotizaciones import formatear_precio
+from interfaz.bus_ui import bus_ui
+
+COLUMNAS_HISTORIAL = {
+    "Fecha": 140,
+    "Usuario": 80,
+    "Par": 90,
+    "Lado": 60,
+    "Tipo": 60,
+    "Precio": 100,
+    "Cantidad": 90,
+    "Comisión": 80
+}
+
+ORDENES = {"Más recientes": True, "Más antiguas": False}
+LADOS = {"Todos": None, "Compra": "compra", "Venta": "venta"}
+
+pagina_actual = 0
+celdas_historial = []  # una lista de ids de texto por fila de la página
+temporizador_refresco = None
+indice_historial = None  # IndiceHistorial, cuando el diario ya está abierto
+error_historial = None  # motivo por el que no se pudo abrir el diario
+
+def crear_panel_historial():
+    """Crea los filtros, la paginación y las filas reutilizables de la tabla"""
+    try:
+        with dpg.group(horizontal=True):
+            dpg.add_input_text(label="Par", tag="input_historial_simbolo", uppercase=True, width=100,
+                               callback=filtros_historial_handler, on_enter=True)
+            dpg.add_combo(list(LADOS), label="Lado", tag="combo_historial_lado", default_value="Todos",
+                          width=80, callback=filtros_historial_handler)
+            dpg.add_input_text(label="Usuario", tag="input_historial_usuario", width=80,
+                               callback=filtros_historial_handler, on_enter=True)
+            dpg.add_combo(list(ORDENES), tag="combo_historial_orden", default_value="Más recientes",
+                          width=120, callback=filtros_historial_handler)
+        
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="<", callback=cambiar_pagina_handler, user_data=-1)
+            dpg.add_button(label=">", callback=cambiar_pagina_handler, user_data=1)
+            dpg.add_text("Cargando historial...", tag="txt_historial_pagina")
+        
+        with dpg.table(tag="tabla_historial", header_row=True, borders_innerH=True, borders_outerH=True,
+                       borders_innerV=True, borders_outerV=True, policy=dpg.mvTable_SizingFixedFit):
+            for etiqueta, ancho in COLUMNAS_HISTORIAL.items():
+                dpg.add_table_column(label=etiqueta, width=ancho)
+            for _ in range(config.FILAS_POR_PAGINA_HISTORIAL):
+                with dpg.table_row():
+                    celdas_historial.append([dpg.add_text("") for _ in COLUMNAS_HISTORIAL])
+        
+        threading.Thread(target=conectar_historial, daemon=True).start()
+        programar_refresco(0.5)
+    except Exception as e:
+        print(f"Error al crear panel de historial: {e}")
+
+def conectar_historial():
+    """Abre el diario (reproduce su cola), crea el índice y se suscribe a las operaciones nuevas"""
+    global indice_historial, error_historial
+    try:
+        diario = obtener_diario()
+        indice = obtener_indice_historial(diario)
+        diario.suscribir(operacion_registrada)
+        indice_historial = indice
+    except Exception as e:
+        print(f"Error al abrir el historial: {e}")
+        error_historial = str(e)
+
+def leer_filtros():
+    """Devuelve los filtros elegidos en la interfaz"""
+    return {
+        'simbolo': dpg.get_value("input_historial_simbolo").strip() or None,
+        'lado': LADOS[dpg.get_value("combo_historial_lado")],
+        'usuario': dpg.get_value("input_historial_usuario").strip() or None,
+        'descendente': ORDENES[dpg.get_value("combo_historial_orden")],
+    }
+
+def refrescar_historial():
+    """Consulta la página actual al índice y escribe solo esas filas"""
+    global pagina_actual
+    try:
+        indice = indice_historial
+        if indice is None and error_historial is not None:
+            # No se vuelve a programar: el diario no se va a abrir solo
+            dpg.set_value("txt_historial_pagina", f"No se pudo abrir el historial: {error_historial}")
+            return
+        if indice is None or not indice.cargado:
+            programar_refresco(0.5)
+            return
+        
+        por_pagina = config.FILAS_POR_PAGINA_HISTORIAL
+        total, operaciones = indice.consultar(pagina=pagina_actual, por_pagina=por_pagina, **leer_filtros())
+        paginas = max(1, -(-total // por_pagina))
+        if pagina_actual >= paginas:
+            pagina_actual = paginas - 1
+            total, operaciones = indice.consultar(pagina=pagina_actual, por_pagina=por_pagina, **leer_filtros())
+        
+        for fila, celdas in enumerate(celdas_historial):
+            valores = formatear_operacion(operaciones[fila]) if fila < len(operaciones) else [""] * len(celdas)
+            for celda, valor in zip(celdas, valores):
+                dpg.set_value(celda, valor)
+        
+        dpg.set_value("txt_historial_pagina", f"Página {pagina_actual + 1} de {paginas} ({total} operaciones)")
+    except Exception as e:
+        print(f"Error al refrescar historial: {e}")
+
+def formatear_operacion(operacion):
+    """Devuelve los textos de las celdas de una operación"""
+    return [
+        datetime.fromtimestamp(operacion['instante']).strftime("%d/%m %H:%M:%S"),
+        operacion['usuario'],
+        operacion['simbolo'],
+        operacion['lado'],
+        operacion['tipo'],
+        formatear_precio(operacion['precio']),
+        f"{operacion['cantidad']:g}",
+        f"${operacion['comision']:.4f}",
+    ]
+
+def filtros_historial_handler(sender=None, app_data=None, user_data=None):
+    """Manejador de los filtros: vuelve a la primera página"""
+    global pagina_actual
+    pagina_actual = 0
+    refrescar_historial()
+
+def cambiar_pagina_handler(sender=None, app_data=None, user_data=None):
+    """Manejador de los botones de página"""
+    global pagina_actual
+    pagina_actual = max(0, pagina_actual + user_data)
+    refrescar_historial()
+
+def programar_refresco(espera=0.2):
+    """Agrupa ráfagas de operaciones nuevas en un solo refresco, que se aplica en el hilo de render"""
+    global temporizador_refresco
+    if temporizador_refresco is not None and temporizador_refresco.is_alive():
+        return
+    temporizador_refresco = threading.Timer(espera, bus_ui.publicar, args=("historial", refrescar_historial))
+    temporizador_refresco.daemon = True
+    temporizador_refresco.start()
+
+def operacion_registrada(operacion, offset):
+    """Oyente del diario: refresca la vista si muestra las operaciones más recientes"""
+    if pagina_actual == 0:
+        programar_refresco()
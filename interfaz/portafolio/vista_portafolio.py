@@ -0,0 +1,171 @@
+"""
+Este archivo contiene la ventana de Portafolio:
+
+- Equity, efectivo y PnL realizado y no realizado de una cuenta del simulador
+- Tabla de posiciones con costo medio, valor, PnL y porcentaje de la cartera, con filas reutilizables
+- Valuación incremental del motor de portafolios: los precios nuevos solo marcan las posiciones de su símbolo
+- Refresco en el hilo de render solo cuando cambia la cuenta que se está mostrando
+- El diario se abre en segundo plano, sin frenar el hilo de render
+"""
+
+import threading
+import dearpygui.dearpygui as dpg
+import config
+from simulador.diario import obtener_diario
+from simulador.portafolio import obtener_motor_portafolio
+from interfaz.cotizaciones.modelo_cotizaciones import formatear_precio
+from interfaz.cotizaciones.controlador_cotizaciones import agregar_oyente_cotizaciones
+from interfaz.temas import obtener_color_cambio
+from interfaz.bus_ui import bus_ui
+
+COLUMNAS_PORTAFOLIO = {
+    "Par": 90,
+    "Cantidad": 100,
+    "Costo medio": 100,
+    "Precio": 100,
+    "Valor": 100,
+    "PnL no real.": 100,
+    "PnL real.": 90,
+    "% cartera": 70
+}
+
+usuario_mostrado = config.USUARIO_LOCAL
+celdas_portafolio = []  # una lista de ids de texto por fila
+motor_portafolio = None  # MotorPortafolio, cuando el diario ya está abierto
+error_portafolio = None  # motivo por el que no se pudo abrir el diario
+
+def crear_panel_portafolio():
+    """Crea el resumen de la cuenta y las filas reutilizables de la tabla de posiciones"""
+    try:
+        with dpg.group(horizontal=True):
+            dpg.add_input_text(label="Cuenta", tag="input_portafolio_usuario", default_value=config.USUARIO_LOCAL,
+                               width=100, callback=usuario_portafolio_handler, on_enter=True)
+            dpg.add_text("Cargando portafolio...", tag="txt_portafolio_resumen")
+
+        with dpg.group(horizontal=True):
+            dpg.add_text("PnL realizado:")
+            dpg.add_text("", tag="txt_portafolio_realizado")
+            dpg.add_text("PnL no realizado:")
+            dpg.add_text("", tag="txt_portafolio_no_realizado")
+
+        with dpg.table(tag="tabla_portafolio", header_row=True, borders_innerH=True, borders_outerH=True,
+                       borders_innerV=True, borders_outerV=True, policy=dpg.mvTable_SizingFixedFit):
+            for etiqueta, ancho in COLUMNAS_PORTAFOLIO.items():
+                dpg.add_table_column(label=etiqueta, width=ancho)
+            for _ in range(config.FILAS_PORTAFOLIO):
+                with dpg.table_row():
+                    celdas_portafolio.append([dpg.add_text("") for _ in COLUMNAS_PORTAFOLIO])
+
+        agregar_oyente_cotizaciones(procesar_cotizaciones_portafolio)
+        threading.Thread(target=conectar_portafolio, daemon=True).start()
+        bus_ui.publicar("portafolio", refrescar_portafolio)
+    except Exception as e:
+        print(f"Error al crear panel de portafolio: {e}")
+
+def conectar_portafolio():
+    """Abre el diario (reproduce su cola), crea el motor y se suscribe a las operaciones nuevas"""
+    global motor_portafolio, error_portafolio
+    try:
+        diario = obtener_diario()
+        motor = obtener_motor_portafolio(diario)
+        diario.suscribir(operacion_registrada)
+        motor_portafolio = motor
+    except Exception as e:
+        print(f"Error al abrir el portafolio: {e}")
+        error_portafolio = str(e)
+
+def formatear_pnl(valor):
+    """Formatea un PnL en USDT con signo"""
+    if valor is None:
+        return "-"
+    if valor > 0:
+        return f"+${valor:,.2f}"
+    elif valor < 0:
+        return f"-${-valor:,.2f}"
+    else:
+        return "$0.00"
+
+def refrescar_portafolio():
+    """Escribe el resumen y las posiciones de la cuenta mostrada"""
+    try:
+        motor = motor_portafolio
+        if motor is None and error_portafolio is not None:
+            # No se vuelve a programar: el diario no se va a abrir solo
+            dpg.set_value("txt_portafolio_resumen", f"No se pudo abrir el portafolio: {error_portafolio}")
+            return
+        if motor is None or not motor.cargado:
+            dpg.set_value("txt_portafolio_resumen", "Cargando portafolio...")
+            # El diario se carga en segundo plano: se vuelve a intentar en un rato
+            temporizador = threading.Timer(0.5, bus_ui.publicar, args=("portafolio", refrescar_portafolio))
+            temporizador.daemon = True
+            temporizador.start()
+            return
+
+        resumen = motor.resumen(usuario_mostrado)
+        if resumen is None:
+            dpg.set_value("txt_portafolio_resumen", f"Sin operaciones (saldo inicial ${config.SALDO_INICIAL_USDT:,.2f})")
+            posiciones = []
+            realizado = no_realizado = 0.0
+        else:
+            texto = f"Equity ${resumen['equity']:,.2f}  Efectivo ${resumen['efectivo']:,.2f}"
+            if resumen['sin_conversion']:
+                texto += f"  (sin precio en USDT: {', '.join(resumen['sin_conversion'])})"
+            dpg.set_value("txt_portafolio_resumen", texto)
+            # Primero las posiciones abiertas de mayor valor, después las cerradas con PnL realizado
+            posiciones = sorted(resumen['posiciones'], key=lambda p: (p['cantidad'] == 0, -abs(p['valor'] or 0.0)))
+            realizado = resumen['pnl_realizado']
+            no_realizado = resumen['pnl_no_realizado']
+
+        dpg.set_value("txt_portafolio_realizado", formatear_pnl(realizado))
+        dpg.configure_item("txt_portafolio_realizado", color=obtener_color_cambio(realizado))
+        dpg.set_value("txt_portafolio_no_realizado", formatear_pnl(no_realizado))
+        dpg.configure_item("txt_portafolio_no_realizado", color=obtener_color_cambio(no_realizado))
+
+        for fila, celdas in enumerate(celdas_portafolio):
+            valores = formatear_posicion(posiciones[fila]) if fila < len(posiciones) else [""] * len(celdas)
+            for celda, valor in zip(celdas, valores):
+                dpg.set_value(celda, valor)
+            if fila < len(posiciones):
+                dpg.configure_item(celdas[5], color=obtener_color_cambio(posiciones[fila]['pnl_no_realizado'] or 0.0))
+                dpg.configure_item(celdas[6], color=obtener_color_cambio(posiciones[fila]['pnl_realizado'] or 0.0))
+    except Exception as e:
+        print(f"Error al refrescar portafolio: {e}")
+
+def formatear_precio_par(precio, cotizado):
+    """Formatea un precio en el activo cotizado del par"""
+    if cotizado == "USDT":
+        return formatear_precio(precio)
+    return f"{precio:.8g} {cotizado}"
+
+def formatear_posicion(posicion):
+    """Devuelve los textos de las celdas de una posición"""
+    if posicion['cantidad'] == 0:
+        return [posicion['simbolo'], "0", "-", "-", "-", "-", formatear_pnl(posicion['pnl_realizado']), "-"]
+    sin_conversion = posicion['valor'] is None
+    return [
+        posicion['simbolo'],
+        f"{posicion['cantidad']:g}",
+        formatear_precio_par(abs(posicion['costo_medio']), posicion['cotizado']),
+        formatear_precio_par(posicion['precio'], posicion['cotizado']),
+        "-" if sin_conversion else f"${posicion['valor']:,.2f}",
+        formatear_pnl(posicion['pnl_no_realizado']),
+        formatear_pnl(posicion['pnl_realizado']),
+        "-" if sin_conversion else f"{posicion['asignacion']:.1f}%",
+    ]
+
+def usuario_portafolio_handler(sender=None, app_data=None, user_data=None):
+    """Manejador del campo de cuenta: muestra el portafolio de otro usuario"""
+    global usuario_mostrado
+    usuario_mostrado = dpg.get_value("input_portafolio_usuario").strip() or config.USUARIO_LOCAL
+    refrescar_portafolio()
+
+def operacion_registrada(operacion, offset):
+    """Oyente del diario: refresca la vista si la operación es de la cuenta mostrada"""
+    if operacion['usuario'] == usuario_mostrado:
+        bus_ui.publicar("portafolio", refrescar_portafolio)
+
+def procesar_cotizaciones_portafolio(precios):
+    """Marca a mercado las posiciones con precio nuevo (desde el hilo del refresco o del stream)"""
+    motor = motor_portafolio
+    if motor is not None and usuario_mostrado in motor.actualizar_precios(precios):
+        bus_ui.publicar("portafolio", refrescar_portafolio)
@@ -0,0 +1,118 @@
+"""
+Este archivo contiene el overlay de rendimiento:
+
+- Ventana flotante que se muestra u oculta con F3
+- Tiempo de cuadro, actualizaciones pendientes del bus, desglose del último refresco y latencias HTTP por ruta
+- Peso de la API de Binance usado en el último minuto
+"""
+
+import time
+import dearpygui.dearpygui as dpg
+import config
+from api.instrumentacion import registro_metricas, iniciar_exportacion
+
+# Etapas del refresco en el orden en que se ejecutan
+ETAPAS_REFRESCO = [
+    "refresco.coingecko",
+    "refresco.precios_24h",
+    "refresco.seleccion",
+    "refresco.velas",
+    "refresco.metricas_velas",
+    "refresco.oyentes",
+    "refresco.tabla",
+    "refresco",
+]
+
+ultima_actualizacion_overlay = 0.0
+
+def crear_overlay_rendimiento():
+    """Crea la ventana del overlay (oculta) y el atajo F3 para mostrarla"""
+    try:
+        with dpg.window(label="Rendimiento", tag="ventana_rendimiento", show=False, width=430, height=420,
+                        pos=(config.ANCHO_VENTANA - 640, 30), no_collapse=True):
+            dpg.add_text("", tag="txt_rendimiento_cuadro")
+            dpg.add_text("", tag="txt_rendimiento_peso")
+            dpg.add_separator()
+            dpg.add_text("Último refresco (ms)")
+            with dpg.table(header_row=True, borders_innerH=True, policy=dpg.mvTable_SizingStretchProp):
+                for etiqueta in ("Etapa", "Último", "p50", "p99"):
+                    dpg.add_table_column(label=etiqueta)
+                for etapa in ETAPAS_REFRESCO:
+                    with dpg.table_row():
+                        dpg.add_text(etapa.replace("refresco.", "  ") if etapa != "refresco" else "total")
+                        for columna in ("ultimo", "p50", "p99"):
+                            dpg.add_text("--", tag=f"txt_rendimiento_{etapa}_{columna}")
+            dpg.add_separator()
+            dpg.add_text("HTTP por ruta")
+            dpg.add_text("", tag="txt_rendimiento_http")
+
+        with dpg.item_handler_registry(tag="manejadores_rendimiento"):
+            dpg.add_item_visible_handler(callback=overlay_visible_handler)
+        dpg.bind_item_handler_registry("ventana_rendimiento", "manejadores_rendimiento")
+
+        with dpg.handler_registry():
+            dpg.add_key_press_handler(dpg.mvKey_F3, callback=alternar_overlay_handler)
+
+        iniciar_exportacion()
+    except Exception as e:
+        print(f"Error al crear overlay de rendimiento: {e}")
+
+def alternar_overlay_handler(sender=None, app_data=None, user_data=None):
+    """Muestra u oculta el overlay"""
+    visible = dpg.is_item_shown("ventana_rendimiento")
+    dpg.configure_item("ventana_rendimiento", show=not visible)
+
+def overlay_visible_handler(sender=None, app_data=None, user_data=None):
+    """Registra el tiempo de cuadro y refresca los textos a intervalos fijos mientras el overlay se ve"""
+    global ultima_actualizacion_overlay
+    registro_metricas.observar("cuadro_segundos", dpg.get_delta_time())
+    ahora = time.monotonic()
+    if ahora - ultima_actualizacion_overlay < config.INTERVALO_OVERLAY_RENDIMIENTO:
+        return
+    ultima_actualizacion_overlay = ahora
+    actualizar_overlay()
+
+def actualizar_overlay():
+    """Vuelca una instantánea del registro de métricas en el overlay"""
+    instantanea = registro_metricas.instantanea()
+    etapas = {}
+    rutas = {}
+    cuadro = None
+    for histograma in instantanea["histogramas"]:
+        if histograma["nombre"] == "cuadro_segundos":
+            cuadro = histograma
+        elif histograma["nombre"] == "etapa_segundos":
+            etapas[histograma["etiquetas"]["etapa"]] = histograma
+        elif histograma["nombre"] == "http_peticion_segundos":
+            rutas.setdefault(histograma["etiquetas"]["ruta"], {}).update(histograma)
+    for contador in instantanea["contadores"]:
+        ruta = contador["etiquetas"].get("ruta")
+        if ruta is None:
+            continue
+        if contador["nombre"] == "http_bytes_total":
+            rutas.setdefault(ruta, {})["bytes"] = contador["valor"]
+        elif contador["nombre"] == "http_errores_total":
+            rutas.setdefault(ruta, {})["errores"] = rutas.get(ruta, {}).get("errores", 0) + contador["valor"]
+    medidores = {medidor["nombre"]: medidor["valor"] for medidor in instantanea["medidores"]}
+
+    dpg.set_value("txt_rendimiento_cuadro",
+                  f"Cuadro: {dpg.get_delta_time() * 1000:.1f} ms ({dpg.get_frame_rate():.0f} fps)"
+                  f"  p99: {cuadro['p99'] * 1000 if cuadro else 0:.1f} ms"
+                  f"  cola UI: {medidores.get('ui_actualizaciones_pendientes', 0):.0f}")
+    dpg.set_value("txt_rendimiento_peso",
+                  f"Peso Binance usado: {medidores.get('binance_peso_usado', 0):.0f} / {config.PESO_MAXIMO_POR_MINUTO}")
+
+    for etapa in ETAPAS_REFRESCO:
+        histograma = etapas.get(etapa)
+        for columna in ("ultimo", "p50", "p99"):
+            texto = f"{histograma[columna] * 1000:.1f}" if histograma else "--"
+            dpg.set_value(f"txt_rendimiento_{etapa}_{columna}", texto)
+
+    lineas = []
+    for ruta, datos in sorted(rutas.items()):
+        lineas.append(
+            f"{ruta}: {datos.get('cuenta', 0)} pet. p50 {datos.get('p50', 0) * 1000:.0f} ms "
+            f"p99 {datos.get('p99', 0) * 1000:.0f} ms  {datos.get('bytes', 0) / 1024:.0f} KB  "
+            f"err {datos.get('errores', 0):.0f}"
+        )
+    dpg.set_value("txt_rendimiento_http", "\n".join(lineas) or "Sin peticiones")
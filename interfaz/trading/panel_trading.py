@@ -0,0 +1,126 @@
+"""
+Este archivo contiene el panel de la ventana de Trading:
+
+- Formulario para enviar órdenes de mercado, límite e IOC al motor de emparejamiento
+- Lista de órdenes abiertas con cancelación
+- Ejecución de órdenes en reposo cuando el precio en vivo las cruza
+- Registro de cada ejecución en el diario de operaciones
+- Envío y cancelación en segundo plano: el hilo de render solo lee el formulario y dibuja el resultado
+"""
+
+import threading
+import dearpygui.dearpygui as dpg
+import config
+from api.registro_simbolos import obtener_registro_simbolos
+from simulador.motor_ordenes import COMPRA, VENTA, MERCADO, LIMITE, IOC, MotorOrdenes
+from simulador.diario import obtener_diario
+from interfaz.cotizaciones.modelo_cotizaciones import obtener_precio_en_cache, formatear_precio
+from interfaz.cotizaciones.controlador_cotizaciones import agregar_oyente_cotizaciones
+from interfaz.bus_ui import bus_ui
+
+LADOS = {"Compra": COMPRA, "Venta": VENTA}
+TIPOS = {"Mercado": MERCADO, "Límite": LIMITE, "IOC": IOC}
+
+motor_ordenes = MotorOrdenes(cotizacion_externa=obtener_precio_en_cache, registro=obtener_registro_simbolos(),
+                             saldos=lambda usuario: obtener_diario().saldos_usuario(usuario))
+
+def crear_panel_trading():
+    """Crea el formulario de órdenes y la lista de órdenes abiertas"""
+    try:
+        with dpg.group(horizontal=True):
+            dpg.add_text("Par:")
+            dpg.add_input_text(tag="input_trading_simbolo", default_value="BTCUSDT", uppercase=True, width=120)
+            dpg.add_radio_button(list(LADOS), tag="radio_trading_lado", default_value="Compra", horizontal=True)
+        
+        with dpg.group(horizontal=True):
+            dpg.add_combo(list(TIPOS), tag="combo_trading_tipo", default_value="Límite", width=100)
+            dpg.add_input_double(label="Precio", tag="input_trading_precio", min_value=0, min_clamped=True, width=120)
+            dpg.add_input_double(label="Cantidad", tag="input_trading_cantidad", min_value=0, min_clamped=True, width=120)
+            dpg.add_button(label="Enviar orden", callback=btn_enviar_orden_handler)
+        
+        dpg.add_text("", tag="txt_trading_resultado")
+        dpg.add_spacer(height=5)
+        
+        dpg.add_text("Órdenes abiertas:")
+        with dpg.group(horizontal=True):
+            dpg.add_listbox([], tag="lista_ordenes_abiertas", num_items=5, width=450)
+            dpg.add_button(label="Cancelar orden", callback=btn_cancelar_orden_handler)
+        
+        agregar_oyente_cotizaciones(procesar_cotizaciones_trading)
+        # El diario se abre con la primera ejecución, fuera del hilo de render
+        motor_ordenes.oyentes.append(lambda ejecucion: obtener_diario().registrar(ejecucion))
+    except Exception as e:
+        print(f"Error al crear panel de trading: {e}")
+
+def actualizar_ordenes_abiertas():
+    """Refresca la lista de órdenes abiertas del usuario local"""
+    if not dpg.does_item_exist("lista_ordenes_abiertas"):
+        return
+    items = [
+        f"#{orden.id} {orden.lado} {orden.pendiente:g} {orden.simbolo} @ {formatear_precio(orden.precio)}"
+        for orden in motor_ordenes.ordenes_abiertas(config.USUARIO_LOCAL)
+    ]
+    dpg.configure_item("lista_ordenes_abiertas", items=items)
+
+def describir_resultado(resultado):
+    """Arma el texto de resultado de una orden"""
+    ejecuciones = resultado['ejecuciones']
+    texto = f"Orden #{resultado['id']}: {resultado['estado']}"
+    if ejecuciones:
+        cantidad = sum(e['cantidad'] for e in ejecuciones)
+        precio_medio = sum(e['precio'] * e['cantidad'] for e in ejecuciones) / cantidad
+        comision = sum(e['comision'] for e in ejecuciones)
+        texto += f" - {cantidad:g} a {formatear_precio(precio_medio)} (comisión ${comision:.4f})"
+    return texto
+
+def btn_enviar_orden_handler(sender=None, app_data=None, user_data=None):
+    """Manejador para el botón de envío de órdenes: lee el formulario y envía la orden en segundo plano"""
+    tipo = TIPOS[dpg.get_value("combo_trading_tipo")]
+    argumentos = (
+        config.USUARIO_LOCAL,
+        dpg.get_value("input_trading_simbolo").strip(),
+        LADOS[dpg.get_value("radio_trading_lado")],
+        tipo,
+        dpg.get_value("input_trading_cantidad"),
+        dpg.get_value("input_trading_precio") if tipo != MERCADO else None
+    )
+    dpg.set_value("txt_trading_resultado", "Enviando orden...")
+    threading.Thread(target=enviar_orden, args=argumentos, daemon=True).start()
+
+def enviar_orden(*argumentos):
+    """Envía la orden al motor (validación, emparejamiento y diario) y publica el resultado"""
+    try:
+        texto = describir_resultado(motor_ordenes.enviar_orden(*argumentos))
+    except ValueError as e:
+        texto = f"Orden rechazada: {e}"
+    except Exception as e:
+        print(f"Error al enviar orden: {e}")
+        texto = "Error al enviar orden"
+    publicar_resultado(texto)
+
+def btn_cancelar_orden_handler(sender=None, app_data=None, user_data=None):
+    """Manejador para el botón de cancelación"""
+    seleccion = dpg.get_value("lista_ordenes_abiertas")
+    if not seleccion:
+        return
+    id_orden = int(seleccion.split()[0].lstrip("#"))
+    threading.Thread(target=cancelar_orden, args=(id_orden,), daemon=True).start()
+
+def cancelar_orden(id_orden):
+    """Cancela la orden en segundo plano: el lock del motor puede estar tomado por un emparejamiento"""
+    if motor_ordenes.cancelar_orden(id_orden):
+        publicar_resultado(f"Orden #{id_orden} cancelada")
+    else:
+        bus_ui.publicar("ordenes_abiertas", actualizar_ordenes_abiertas)
+
+def publicar_resultado(texto):
+    """Muestra el resultado de una orden y refresca las órdenes abiertas en el hilo de render"""
+    bus_ui.publicar_lote((
+        ("resultado_trading", dpg.set_value, ("txt_trading_resultado", texto)),
+        ("ordenes_abiertas", actualizar_ordenes_abiertas, ()),
+    ))
+
+def procesar_cotizaciones_trading(precios):
+    """Ejecuta las órdenes en reposo que los precios nuevos cruzaron (desde el hilo del refresco o del stream)"""
+    if motor_ordenes.procesar_cotizaciones(precios):
+        bus_ui.publicar("ordenes_abiertas", actualizar_ordenes_abiertas)
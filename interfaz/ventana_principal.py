@@ -1,5 +1,12 @@
 from dearpygui.dearpygui import *
-from interfaz.cotizaciones.controlador_cotizaciones import inicializar_panel_cotizaciones, cargar_datos_iniciales
+from interfaz.cotizaciones.controlador_cotizaciones import inicializar_panel_cotizaciones, cargar_datos_iniciales, detener_servicios
+from interfaz.trading.panel_trading import crear_panel_trading
+from interfaz.historial.vista_historial import crear_panel_historial
+from interfaz.portafolio.vista_portafolio import crear_panel_portafolio
+from interfaz.grafico.vista_grafico import crear_panel_grafico
+from interfaz.rendimiento.vista_rendimiento import crear_overlay_rendimiento
+from interfaz.bus_ui import bus_ui
+from simulador.diario import cerrar_diario
 from interfaz.temas import aplicar_tema_global, aplicar_tema_titulo
 
 # acá adentro hay que poner las funciones para crear las ventanas correspondientes y sus funciones
@@ -21,7 +28,7 @@ def crear_ventana_principal():
         aplicar_tema_titulo("titulo_grafico")
         add_separator()
         add_spacer(height=5)
-        add_text("Información del gráfico (en desarrollo)")
+        crear_panel_grafico()
 
     # Ventana de Portafolio
     with window(label="Portafolio", width=850, height=273, pos=(0, 415)):
@@ -30,7 +37,7 @@ def crear_ventana_principal():
         aplicar_tema_titulo("titulo_portafolio")
         add_separator()
         add_spacer(height=5)
-        add_text("Información del portafolio (en desarrollo)")
+        crear_panel_portafolio()
 
     # Ventana de Trading
     with window(label="Trading", width=675, height=312, pos=(850, 688)):
@@ -39,7 +46,7 @@ def crear_ventana_principal():
         aplicar_tema_titulo("titulo_trading")
         add_separator()
         add_spacer(height=5)
-        add_text("Herramientas de trading (en desarrollo)")
+        crear_panel_trading()
 
     # Ventana de Historial
     with window(label="Historial", width=850, height=312, pos=(0, 688)):
@@ -48,12 +55,17 @@ def crear_ventana_principal():
         aplicar_tema_titulo("titulo_historial")
         add_separator()
         add_spacer(height=5)
-        add_text("Registro de operaciones (en desarrollo)")
+        crear_panel_historial()
+
+    # Overlay de rendimiento (F3)
+    crear_overlay_rendimiento()
 
 
 def iniciar_ui():
     # Crear contexto
     create_context()
+    # Los callbacks se ejecutan en el bucle de render, igual que las actualizaciones del bus
+    configure_app(manual_callback_management=True)
     set_global_font_scale(1.1)
     
     # Aplicar el tema global definido en temas.py
@@ -71,6 +83,11 @@ def iniciar_ui():
     # Cargar datos iniciales de cotizaciones
     cargar_datos_iniciales()
     
-    # Iniciar el bucle de eventos
-    start_dearpygui()
+    # Bucle de eventos: callbacks, actualizaciones de otros hilos dentro del presupuesto y un cuadro
+    while is_dearpygui_running():
+        run_callbacks(get_callback_queue())
+        bus_ui.procesar()
+        render_dearpygui_frame()
+    detener_servicios()
+    cerrar_diario()
     destroy_context()
\ No newline at end of file
@@ -1,7 +1,26 @@
-from interfaz.ventana_principal import iniciar_ui
+import argparse
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Exchange Cripto")
+    parser.add_argument("--headless", action="store_true",
+                        help="corre el refresco y el motor de órdenes sin interfaz gráfica")
+    parser.add_argument("--limite", type=int, default=None, help="criptomonedas a refrescar (modo headless)")
+    parser.add_argument("--intervalo", type=float, default=None, help="segundos entre refrescos (modo headless)")
+    parser.add_argument("--salida", default=None, help="archivo JSONL de salida; por defecto stdout (modo headless)")
+    parser.add_argument("--iteraciones", type=int, default=None, help="refrescos antes de salir (modo headless)")
+    parser.add_argument("--streaming", action="store_true", help="usa el stream de Binance (modo headless)")
+    parser.add_argument("--ordenes", default=None,
+                        help="archivo JSONL de órdenes para el motor, - para stdin (modo headless)")
+    args = parser.parse_args()
+
+    # Cada modo importa solo lo que usa: el modo headless nunca carga dearpygui
+    if args.headless:
+        from modo_headless import ejecutar_headless
+        ejecutar_headless(args.limite, args.intervalo, args.salida, args.streaming, args.iteraciones, args.ordenes)
+        return
+
+    from interfaz.ventana_principal import iniciar_ui
     iniciar_ui()
 
 
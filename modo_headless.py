@@ -0,0 +1,169 @@
+"""
+Este archivo contiene el modo sin interfaz gráfica (python main.py --headless):
+
+- Refresco periódico de cotizaciones sin crear un contexto de dearpygui, con el mismo planificador que la interfaz
+- Motor de órdenes alimentado con los precios de cada refresco y del stream
+- Órdenes leídas como líneas JSON de un archivo o de stdin (--ordenes)
+- Salida de cada refresco y ejecución en JSON, una línea por evento, a stdout o a un archivo
+"""
+
+import json
+import signal
+import sys
+import threading
+import time
+
+import config
+from api.instrumentacion import detener_exportacion, iniciar_exportacion, registro_metricas
+from api.registro_simbolos import obtener_registro_simbolos
+from interfaz.cotizaciones.modelo_cotizaciones import (guardar_snapshot_cotizaciones, obtener_datos_cotizacion,
+                                                       obtener_precio_en_cache)
+from interfaz.cotizaciones.planificador_refresco import PlanificadorRefresco
+from simulador.diario import cerrar_diario, obtener_diario
+from simulador.motor_ordenes import LIMITE, MotorOrdenes
+
+
+class ServicioHeadless:
+    """Refrescos planificados y motor de órdenes que emite sus resultados como JSON."""
+
+    def __init__(self, limite=None, intervalo=None, salida=None, streaming=False, iteraciones=None, ordenes=None):
+        self.limite = limite or config.LIMITE_CRIPTOMONEDAS_DEFAULT
+        self.intervalo = intervalo or config.INTERVALO_ACTUALIZACION
+        self.streaming = streaming
+        self.iteraciones = iteraciones
+        self.ordenes = ordenes  # ruta de un archivo JSONL de órdenes, "-" para stdin
+        self.realizadas = 0
+        self._salida = open(salida, "a", encoding="utf-8") if salida else sys.stdout
+        self._lock_salida = threading.Lock()
+        self._detener = threading.Event()
+        self._completado = False
+        self._primer_refresco = threading.Event()
+        self.motor = MotorOrdenes(cotizacion_externa=obtener_precio_en_cache, registro=obtener_registro_simbolos(),
+                                  saldos=obtener_diario().saldos_usuario)
+        self.motor.oyentes.append(obtener_diario().registrar)
+        self.motor.oyentes.append(lambda ejecucion: self.emitir("ejecucion", ejecucion))
+        self.planificador = PlanificadorRefresco(refrescar=self._refresco_planificado,
+                                                 intervalo_base=lambda: self.intervalo)
+
+    def emitir(self, tipo, datos):
+        """Escribe un evento como una línea JSON."""
+        linea = json.dumps({"tipo": tipo, "instante": time.time(), "datos": datos}, separators=(",", ":"))
+        with self._lock_salida:
+            self._salida.write(linea + "\n")
+            self._salida.flush()
+
+    def refrescar(self, cancelado=None):
+        """Refresca las cotizaciones, las pasa al motor de órdenes y las emite."""
+        with registro_metricas.medir("refresco"):
+            datos = obtener_datos_cotizacion(self.limite, cancelado)
+        if cancelado is not None and cancelado.is_set():
+            return
+        config.datos_cotizaciones = datos
+        self.motor.procesar_cotizaciones({crypto['simbolo']: crypto['precio'] for crypto in datos})
+        self.emitir("cotizaciones", [crypto.como_dict() for crypto in datos])
+        guardar_snapshot_cotizaciones(datos)
+
+    def _refresco_planificado(self, cancelado):
+        # Los errores van a stderr: stdout es la salida JSON
+        try:
+            self.refrescar(cancelado)
+        except Exception as e:
+            print(f"Error al actualizar datos: {e}", file=sys.stderr)
+        self._primer_refresco.set()
+        self.realizadas += 1
+        if self.iteraciones is not None and self.realizadas >= self.iteraciones:
+            self._completado = True
+            self.planificador.automatico = False
+            self._detener.set()
+        elif config.stream_mercado is not None:
+            config.stream_mercado.suscribir_velas([crypto['simbolo'] for crypto in config.datos_cotizaciones])
+
+    def _stream_actualizado(self, simbolos):
+        stream = config.stream_mercado
+        if stream is None:
+            return
+        precios = {simbolo: stream.obtener_cotizacion(simbolo).get('precio') for simbolo in simbolos}
+        self.motor.procesar_cotizaciones({simbolo: precio for simbolo, precio in precios.items() if precio})
+
+    def procesar_orden(self, linea):
+        """
+        Aplica una línea JSON de la fuente de órdenes y emite el resultado. Una orden lleva simbolo,
+        lado, cantidad y opcionalmente tipo (limite por defecto), precio y usuario; {"cancelar": id}
+        cancela una orden abierta.
+        """
+        try:
+            pedido = json.loads(linea)
+            if "cancelar" in pedido:
+                id_orden = int(pedido["cancelar"])
+                self.emitir("cancelacion", {"id": id_orden, "cancelada": self.motor.cancelar_orden(id_orden)})
+                return
+            resultado = self.motor.enviar_orden(pedido.get("usuario", config.USUARIO_LOCAL), pedido["simbolo"],
+                                                pedido["lado"], pedido.get("tipo", LIMITE), float(pedido["cantidad"]),
+                                                pedido.get("precio"))
+        except (ValueError, KeyError, TypeError) as e:
+            # JSONDecodeError es un ValueError
+            self.emitir("orden_rechazada", {"orden": linea, "error": str(e)})
+            return
+        self.emitir("orden", resultado)
+
+    def _leer_ordenes(self):
+        # Las órdenes a mercado necesitan precios: se espera al primer refresco
+        self._primer_refresco.wait()
+        fuente = sys.stdin if self.ordenes == "-" else open(self.ordenes, encoding="utf-8")
+        try:
+            for linea in fuente:
+                if self._detener.is_set() and not self._completado:
+                    break
+                if linea.strip():
+                    self.procesar_orden(linea.strip())
+        except Exception as e:
+            print(f"Error al leer órdenes: {e}", file=sys.stderr)
+        finally:
+            if fuente is not sys.stdin:
+                fuente.close()
+
+    def ejecutar(self):
+        """Refresca cada `intervalo` segundos hasta completar las iteraciones o recibir una señal."""
+        iniciar_exportacion()
+        if self.streaming:
+            # websockets solo se carga si se usa el stream
+            from api.stream_mercado import StreamMercado
+            config.stream_mercado = StreamMercado(al_actualizar=self._stream_actualizado)
+            config.stream_mercado.iniciar()
+
+        lector = None
+        if self.ordenes:
+            lector = threading.Thread(target=self._leer_ordenes, daemon=True)
+            lector.start()
+        try:
+            self.planificador.iniciar()
+            self.planificador.solicitar()
+            self._detener.wait()
+            # Al completar las iteraciones se terminan las órdenes ya enviadas; con una señal no se espera
+            if lector is not None and self._completado:
+                lector.join()
+        finally:
+            self.planificador.detener()
+            self.cerrar()
+
+    def detener(self, *_):
+        self._detener.set()
+        self._primer_refresco.set()
+
+    def cerrar(self):
+        """Detiene el stream y la exportación y cierra el diario y la salida."""
+        if config.stream_mercado is not None:
+            config.stream_mercado.detener()
+            config.stream_mercado = None
+        detener_exportacion()
+        cerrar_diario()
+        if self._salida is not sys.stdout:
+            self._salida.close()
+
+
+def ejecutar_headless(limite=None, intervalo=None, salida=None, streaming=False, iteraciones=None, ordenes=None):
+    """Arranca el servicio sin interfaz y lo detiene con Ctrl+C o SIGTERM."""
+    servicio = ServicioHeadless(limite, intervalo, salida, streaming, iteraciones, ordenes)
+    signal.signal(signal.SIGTERM, servicio.detener)
+    signal.signal(signal.SIGINT, servicio.detener)
+    servicio.ejecutar()
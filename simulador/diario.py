@@ -0,0 +1,199 @@
+"""
+Este archivo contiene el almacenamiento de operaciones del simulador:
+
+- Diario append-only (una operación JSON por línea) en datos/operaciones.json
+- fsync agrupado en segundo plano para no pagar un fsync por operación
+- Snapshots compactados de los saldos en datos/portafolio.json
+- Reconstrucción al arrancar desde el último snapshot más la cola del diario
+"""
+
+import json
+import os
+import threading
+from typing import Dict
+
+import config
+from api.registro_simbolos import obtener_registro_simbolos
+
+
+def separar_simbolo(simbolo):
+    """Devuelve (activo base, activo cotizado) de un par según el registro de símbolos de Binance, o None."""
+    return obtener_registro_simbolos().separar(simbolo)
+
+
+def aplicar_operacion(saldos: Dict, operacion: Dict):
+    """Aplica una ejecución a los saldos {usuario: {activo: cantidad}}."""
+    if "cotizado" in operacion:
+        partes = operacion["base"], operacion["cotizado"]
+    else:
+        # Operaciones grabadas antes de guardar los activos en el diario
+        partes = separar_simbolo(operacion["simbolo"])
+    if partes is None:
+        print(f"Operación de un par sin activo cotizado conocido, se ignora: {operacion['simbolo']}")
+        return
+    base, cotizado = partes
+    # El saldo inicial es siempre en USDT, aunque la primera operación cotice contra otro activo
+    cuenta = saldos.setdefault(operacion["usuario"], {"USDT": config.SALDO_INICIAL_USDT})
+    importe = operacion["precio"] * operacion["cantidad"]
+    if operacion["lado"] == "compra":
+        cuenta[base] = cuenta.get(base, 0.0) + operacion["cantidad"]
+        cuenta[cotizado] = cuenta.get(cotizado, 0.0) - importe - operacion["comision"]
+    else:
+        cuenta[base] = cuenta.get(base, 0.0) - operacion["cantidad"]
+        cuenta[cotizado] = cuenta.get(cotizado, 0.0) + importe - operacion["comision"]
+
+
+class DiarioOperaciones:
+    """Diario de operaciones con snapshots periódicos de los saldos."""
+
+    def __init__(self, ruta_diario=None, ruta_snapshot=None):
+        self.ruta_diario = ruta_diario or config.RUTA_OPERACIONES
+        self.ruta_snapshot = ruta_snapshot or config.RUTA_PORTAFOLIO
+        self.saldos = {}
+        self.secuencia = 0
+        self.oyentes = []  # funciones llamadas con (operación, offset en el diario)
+        self._archivo = None
+        self._offset = 0
+        self._desde_snapshot = 0
+        self._sin_fsync = 0
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo_fsync = None
+
+    def abrir(self):
+        """Reconstruye los saldos y deja el diario listo para agregar operaciones."""
+        snapshot = self._leer_snapshot()
+        self.saldos = snapshot.get("saldos", {})
+        self.secuencia = snapshot.get("secuencia", 0)
+        self._offset = snapshot.get("offset", 0)
+
+        os.makedirs(os.path.dirname(self.ruta_diario) or ".", exist_ok=True)
+        self._archivo = open(self.ruta_diario, "a+b")
+        if self._offset > os.path.getsize(self.ruta_diario):
+            # El diario es más corto que lo que dice el snapshot (se borró o se restauró una copia vieja):
+            # los saldos se reconstruyen desde el principio del diario
+            print(f"El snapshot apunta más allá del final de {self.ruta_diario}, se ignora")
+            self.saldos = {}
+            self.secuencia = 0
+            self._offset = 0
+        self._reproducir_cola()
+
+        self._hilo_fsync = threading.Thread(target=self._bucle_fsync, daemon=True)
+        self._hilo_fsync.start()
+
+    def suscribir(self, oyente):
+        """Registra un oyente y devuelve el offset desde el cual recibirá operaciones."""
+        with self._lock:
+            self.oyentes.append(oyente)
+            return self._offset
+
+    def saldos_usuario(self, usuario) -> Dict:
+        """Copia de los saldos de un usuario; una cuenta sin operaciones tiene el saldo inicial."""
+        with self._lock:
+            cuenta = self.saldos.get(usuario)
+            return dict(cuenta) if cuenta is not None else {"USDT": config.SALDO_INICIAL_USDT}
+
+    def _leer_snapshot(self):
+        try:
+            with open(self.ruta_snapshot, encoding="utf-8") as archivo:
+                contenido = archivo.read()
+            return json.loads(contenido) if contenido.strip() else {}
+        except FileNotFoundError:
+            return {}
+
+    def _reproducir_cola(self):
+        """Aplica las operaciones escritas después del snapshot."""
+        self._archivo.seek(self._offset)
+        for linea in self._archivo:
+            # Una línea a medio escribir por un corte se descarta
+            if not linea.endswith(b"\n"):
+                break
+            try:
+                operacion = json.loads(linea)
+            except json.JSONDecodeError:
+                break
+            self._offset += len(linea)
+            if operacion["seq"] > self.secuencia:
+                aplicar_operacion(self.saldos, operacion)
+                self.secuencia = operacion["seq"]
+                self._desde_snapshot += 1
+        # Nunca se agranda el archivo: truncate más allá del final lo rellenaría con ceros
+        self._archivo.truncate(min(self._offset, os.path.getsize(self.ruta_diario)))
+        self._archivo.seek(0, os.SEEK_END)
+
+    def registrar(self, operacion: Dict):
+        """
+        Agrega una operación al diario en tiempo constante y actualiza los saldos. Los activos del par
+        se guardan con la operación, así la reconstrucción no depende del registro de símbolos; un par
+        sin activo cotizado conocido se rechaza con ValueError antes de escribir.
+        """
+        partes = separar_simbolo(operacion["simbolo"])
+        if partes is None:
+            raise ValueError(f"Par sin activo cotizado conocido: {operacion['simbolo']}")
+        with self._lock:
+            self.secuencia += 1
+            registro = dict(operacion, base=partes[0], cotizado=partes[1], seq=self.secuencia)
+            linea = (json.dumps(registro, separators=(",", ":")) + "\n").encode("utf-8")
+            inicio = self._offset
+            self._archivo.write(linea)
+            self._archivo.flush()
+            self._offset += len(linea)
+            self._sin_fsync += 1
+            self._desde_snapshot += 1
+            aplicar_operacion(self.saldos, registro)
+
+            if self._desde_snapshot >= config.OPERACIONES_POR_SNAPSHOT:
+                self._guardar_snapshot()
+            # Dentro del lock para que los oyentes reciban las operaciones en orden
+            for oyente in self.oyentes:
+                oyente(registro, inicio)
+
+    def _guardar_snapshot(self):
+        """Escribe los saldos y la posición del diario de forma atómica."""
+        os.fsync(self._archivo.fileno())
+        self._sin_fsync = 0
+        snapshot = {"secuencia": self.secuencia, "offset": self._offset, "saldos": self.saldos}
+        temporal = f"{self.ruta_snapshot}.tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(snapshot, archivo)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta_snapshot)
+        self._desde_snapshot = 0
+
+    def _bucle_fsync(self):
+        while not self._detener.wait(config.INTERVALO_FSYNC):
+            with self._lock:
+                if self._sin_fsync and self._archivo is not None:
+                    os.fsync(self._archivo.fileno())
+                    self._sin_fsync = 0
+
+    def cerrar(self):
+        """Sincroniza el diario, guarda un snapshot y cierra el archivo."""
+        self._detener.set()
+        with self._lock:
+            if self._archivo is None:
+                return
+            self._guardar_snapshot()
+            self._archivo.close()
+            self._archivo = None
+
+
+_diario = None
+_lock_diario = threading.Lock()
+
+
+def obtener_diario() -> DiarioOperaciones:
+    """Devuelve el diario compartido, abriéndolo en el primer uso."""
+    global _diario
+    with _lock_diario:
+        if _diario is None:
+            _diario = DiarioOperaciones()
+            _diario.abrir()
+    return _diario
+
+
+def cerrar_diario():
+    """Cierra el diario compartido si se llegó a abrir."""
+    if _diario is not None:
+        _diario.cerrar()
@@ -0,0 +1,142 @@
+"""
+Este archivo contiene el índice del historial de operaciones:
+
+- Índices en memoria por símbolo, lado y usuario sobre el diario de operaciones
+- Filtros y orden por instante resueltos contra los índices, sin releer el diario
+- Lectura desde disco solo de las filas de la página pedida
+"""
+
+import json
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+LADOS = ("compra", "venta")
+
+
+class IndiceHistorial:
+    """Índice de las operaciones del diario con consultas paginadas."""
+
+    def __init__(self, ruta_diario):
+        self.ruta_diario = ruta_diario
+        self.cargado = False
+        self._offsets = array("q")  # posición en el diario de cada operación, en orden de llegada
+        self._instantes = array("d")
+        self._por_simbolo: Dict[str, array] = {}
+        self._por_lado: Dict[str, array] = {lado: array("l") for lado in LADOS}
+        self._por_usuario: Dict[str, array] = {}
+        self._pendientes = []  # operaciones recibidas mientras se carga el índice
+        self._lock = threading.Lock()
+
+    def cargar(self, hasta_offset):
+        """Indexa el diario existente hasta `hasta_offset` y luego las operaciones en espera."""
+        with open(self.ruta_diario, "rb") as archivo:
+            offset = 0
+            for linea in archivo:
+                if offset >= hasta_offset:
+                    break
+                self._indexar(json.loads(linea), offset)
+                offset += len(linea)
+
+        with self._lock:
+            for operacion, offset in self._pendientes:
+                self._indexar(operacion, offset)
+            self._pendientes = []
+            self.cargado = True
+
+    def agregar(self, operacion, offset):
+        """Oyente del diario: indexa una operación nueva en O(1)."""
+        with self._lock:
+            if not self.cargado:
+                self._pendientes.append((operacion, offset))
+                return
+            self._indexar(operacion, offset)
+
+    def _indexar(self, operacion, offset):
+        posicion = len(self._offsets)
+        self._offsets.append(offset)
+        self._instantes.append(operacion["instante"])
+        self._por_simbolo.setdefault(operacion["simbolo"], array("l")).append(posicion)
+        self._por_lado[operacion["lado"]].append(posicion)
+        self._por_usuario.setdefault(operacion["usuario"], array("l")).append(posicion)
+
+    def simbolos(self) -> List[str]:
+        """Devuelve los símbolos con operaciones, ordenados."""
+        with self._lock:
+            return sorted(self._por_simbolo)
+
+    def consultar(self, simbolo=None, lado=None, usuario=None, desde=None, hasta=None,
+                  descendente=True, pagina=0, por_pagina=50) -> Tuple[int, List[Dict]]:
+        """Devuelve (total de coincidencias, operaciones de la página pedida)."""
+        with self._lock:
+            posiciones = self._filtrar(simbolo, lado, usuario, desde, hasta)
+            total = len(posiciones)
+            if descendente:
+                fin = total - pagina * por_pagina
+                seleccion = posiciones[max(0, fin - por_pagina):max(0, fin)][::-1]
+            else:
+                seleccion = posiciones[pagina * por_pagina:(pagina + 1) * por_pagina]
+            offsets = [self._offsets[posicion] for posicion in seleccion]
+        return total, self._leer(offsets)
+
+    def _filtrar(self, simbolo, lado, usuario, desde, hasta):
+        """Intersecta los índices pedidos partiendo del más chico."""
+        listas = []
+        if simbolo is not None:
+            listas.append(self._por_simbolo.get(simbolo, array("l")))
+        if lado is not None:
+            listas.append(self._por_lado[lado])
+        if usuario is not None:
+            listas.append(self._por_usuario.get(usuario, array("l")))
+
+        if not listas:
+            posiciones = range(len(self._offsets))
+        else:
+            listas.sort(key=len)
+            posiciones = listas[0]
+            for otra in listas[1:]:
+                posiciones = interseccion_ordenada(posiciones, otra)
+
+        # Las posiciones están en orden de llegada, así que el instante es creciente
+        if desde is not None:
+            posiciones = posiciones[bisect_left(posiciones, desde, key=self._instantes.__getitem__):]
+        if hasta is not None:
+            posiciones = posiciones[:bisect_right(posiciones, hasta, key=self._instantes.__getitem__)]
+        return posiciones
+
+    def _leer(self, offsets) -> List[Dict]:
+        operaciones = []
+        with open(self.ruta_diario, "rb") as archivo:
+            for offset in offsets:
+                archivo.seek(offset)
+                operaciones.append(json.loads(archivo.readline()))
+        return operaciones
+
+
+def interseccion_ordenada(chica, grande):
+    """Intersección de dos listas crecientes buscando cada elemento de la chica en la grande."""
+    resultado = array("l")
+    inicio = 0
+    for valor in chica:
+        inicio = bisect_left(grande, valor, inicio)
+        if inicio == len(grande):
+            break
+        if grande[inicio] == valor:
+            resultado.append(valor)
+    return resultado
+
+
+_indice = None
+_lock_indice = threading.Lock()
+
+
+def obtener_indice_historial(diario) -> Optional[IndiceHistorial]:
+    """Devuelve el índice compartido; la primera vez lo carga en segundo plano."""
+    global _indice
+    with _lock_indice:
+        if _indice is None:
+            _indice = IndiceHistorial(diario.ruta_diario)
+            hasta_offset = diario.suscribir(_indice.agregar)
+            threading.Thread(target=_indice.cargar, args=(hasta_offset,), daemon=True).start()
+    return _indice
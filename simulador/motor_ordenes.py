@@ -0,0 +1,343 @@
+"""
+Este archivo contiene el motor de emparejamiento de órdenes del simulador:
+
+- Libro de órdenes límite por símbolo con prioridad precio-tiempo
+- Niveles de precio en heaps y colas FIFO por nivel (alta y cancelación en O(log n))
+- Órdenes de mercado, límite, IOC y cancelación
+- Validación de estado, tick y lote de cada par contra el registro de símbolos, si se le pasa uno
+- Control de fondos contra los saldos de la cuenta, descontando lo reservado por sus órdenes abiertas
+- Contraparte simulada que ejecuta al último precio en vivo de Binance, resuelto antes de tomar el lock
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import config
+
+COMPRA = "compra"
+VENTA = "venta"
+
+MERCADO = "mercado"
+LIMITE = "limite"
+IOC = "ioc"
+
+CONTRAPARTE_SIMULADA = "binance"
+
+
+def tasa_comision(es_maker):
+    """Fracción del importe que se cobra como comisión, como en Binance spot."""
+    return config.COMISION_MAKER if es_maker else config.COMISION_TAKER
+
+
+def calcular_comision(precio, cantidad, es_maker):
+    """Comisión en USDT de una ejecución."""
+    return precio * cantidad * tasa_comision(es_maker)
+
+
+def multiplo(valor, paso):
+    """Si `valor` es múltiplo de `paso` salvo el error de coma flotante; un paso 0 acepta cualquier valor."""
+    if paso <= 0:
+        return True
+    pasos = valor / paso
+    return abs(pasos - round(pasos)) <= 1e-9 * max(1.0, pasos)
+
+
+class Orden:
+    """Orden de un usuario; `pendiente` es la cantidad aún sin ejecutar."""
+
+    __slots__ = ("id", "usuario", "simbolo", "lado", "tipo", "precio", "cantidad", "pendiente", "activa", "instante")
+
+    def __init__(self, id_orden, usuario, simbolo, lado, tipo, precio, cantidad):
+        self.id = id_orden
+        self.usuario = usuario
+        self.simbolo = simbolo
+        self.lado = lado
+        self.tipo = tipo
+        self.precio = precio
+        self.cantidad = cantidad
+        self.pendiente = cantidad
+        self.activa = True
+        self.instante = time.time()
+
+
+class LibroOrdenes:
+    """Libro de órdenes de un símbolo.
+
+    Los precios de cada lado viven en un heap y cada precio tiene una cola
+    FIFO de órdenes. Las cancelaciones marcan la orden como inactiva y se
+    descartan al llegar al frente de su cola (borrado perezoso).
+    """
+
+    def __init__(self, simbolo):
+        self.simbolo = simbolo
+        self._precios = {COMPRA: [], VENTA: []}  # compras guardadas como -precio
+        self._niveles = {COMPRA: {}, VENTA: {}}  # precio -> deque de órdenes
+        self._volumen = {COMPRA: {}, VENTA: {}}  # precio -> cantidad activa en el nivel
+
+    def _clave(self, lado, precio):
+        return -precio if lado == COMPRA else precio
+
+    def mejor_precio(self, lado) -> Optional[float]:
+        """Devuelve el mejor precio con órdenes activas del lado indicado."""
+        heap = self._precios[lado]
+        niveles = self._niveles[lado]
+        while heap:
+            precio = -heap[0] if lado == COMPRA else heap[0]
+            cola = niveles.get(precio)
+            while cola and not cola[0].activa:
+                cola.popleft()
+            if cola:
+                return precio
+            heapq.heappop(heap)
+            niveles.pop(precio, None)
+            self._volumen[lado].pop(precio, None)
+        return None
+
+    def agregar(self, orden: Orden):
+        """Deja una orden en el libro al final de la cola de su precio."""
+        niveles = self._niveles[orden.lado]
+        cola = niveles.get(orden.precio)
+        if cola is None:
+            cola = niveles[orden.precio] = deque()
+            heapq.heappush(self._precios[orden.lado], self._clave(orden.lado, orden.precio))
+        cola.append(orden)
+        volumen = self._volumen[orden.lado]
+        volumen[orden.precio] = volumen.get(orden.precio, 0.0) + orden.pendiente
+
+    def retirar(self, orden: Orden):
+        """Marca una orden como cancelada; su lugar en la cola se libera al llegar al frente."""
+        orden.activa = False
+        volumen = self._volumen[orden.lado]
+        if orden.precio in volumen:
+            volumen[orden.precio] -= orden.pendiente
+
+    def primera_orden(self, lado) -> Optional[Orden]:
+        """Devuelve la orden con prioridad del lado indicado."""
+        precio = self.mejor_precio(lado)
+        if precio is None:
+            return None
+        return self._niveles[lado][precio][0]
+
+    def consumir(self, orden: Orden, cantidad):
+        """Descuenta una cantidad ejecutada de la orden al frente de su cola."""
+        orden.pendiente -= cantidad
+        self._volumen[orden.lado][orden.precio] -= cantidad
+        if orden.pendiente <= 1e-12:
+            orden.activa = False
+            self._niveles[orden.lado][orden.precio].popleft()
+
+    def profundidad(self, lado, niveles=10) -> List:
+        """Devuelve hasta `niveles` pares (precio, cantidad) desde el mejor precio."""
+        volumen = self._volumen[lado]
+        precios = sorted((p for p, v in volumen.items() if v > 1e-12), reverse=(lado == COMPRA))
+        return [(precio, volumen[precio]) for precio in precios[:niveles]]
+
+
+class MotorOrdenes:
+    """Motor de emparejamiento con un libro por símbolo y contraparte simulada."""
+
+    def __init__(self, cotizacion_externa: Callable[[str], Optional[float]] = None, registro=None,
+                 saldos: Callable[[str], Dict[str, float]] = None):
+        # Solo debe leer precios ya recibidos (stream o tabla): se llama en cada orden y no puede ir a la red
+        self.cotizacion_externa = cotizacion_externa
+        self.registro = registro  # RegistroSimbolos de api/registro_simbolos.py, o None para no validar pares
+        self.saldos = saldos  # usuario -> {activo: cantidad}, o None para no controlar fondos
+        self.libros: Dict[str, LibroOrdenes] = {}
+        self.ordenes: Dict[int, Orden] = {}  # órdenes que siguen en algún libro
+        self.oyentes = []  # funciones llamadas con cada ejecución
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def libro(self, simbolo) -> LibroOrdenes:
+        """Devuelve el libro del símbolo, creándolo si no existe."""
+        libro = self.libros.get(simbolo)
+        if libro is None:
+            libro = self.libros[simbolo] = LibroOrdenes(simbolo)
+        return libro
+
+    def enviar_orden(self, usuario, simbolo, lado, tipo, cantidad, precio=None) -> Dict:
+        """Procesa una orden nueva y devuelve su id, estado y ejecuciones."""
+        if lado not in (COMPRA, VENTA):
+            raise ValueError(f"Lado de orden inválido: {lado}")
+        if tipo not in (MERCADO, LIMITE, IOC):
+            raise ValueError(f"Tipo de orden inválido: {tipo}")
+        if cantidad <= 0:
+            raise ValueError("La cantidad debe ser positiva")
+        if tipo != MERCADO and (precio is None or precio <= 0):
+            raise ValueError("Las órdenes límite e IOC necesitan un precio positivo")
+        if self.registro is not None:
+            self._validar_par(simbolo, cantidad, None if tipo == MERCADO else precio)
+
+        # El precio de referencia se resuelve fuera del lock
+        precio_externo = self.cotizacion_externa(simbolo) if self.cotizacion_externa else None
+        if tipo == MERCADO and precio_externo is None and self.cotizacion_externa is not None:
+            raise ValueError(f"Sin precio en vivo para {simbolo}")
+        partes = self.registro.separar(simbolo) if self.saldos is not None and self.registro is not None else None
+
+        with self._lock:
+            if self.saldos is not None:
+                # Los saldos se leen dentro del lock: dos órdenes simultáneas no pueden gastar el mismo saldo
+                saldos = self.saldos(usuario)
+                self._validar_fondos(usuario, simbolo, partes, lado, cantidad, precio or precio_externo, saldos)
+            orden = Orden(next(self._ids), usuario, simbolo, lado, tipo, precio, cantidad)
+            ejecuciones = self._emparejar(orden, precio_externo)
+
+            if orden.pendiente > 1e-12 and tipo == LIMITE:
+                self.libro(simbolo).agregar(orden)
+                self.ordenes[orden.id] = orden
+                estado = "parcial" if ejecuciones else "abierta"
+            elif orden.pendiente > 1e-12:
+                orden.activa = False
+                estado = "parcial_cancelada" if ejecuciones else "cancelada"
+            else:
+                orden.activa = False
+                estado = "ejecutada"
+
+        return {"id": orden.id, "estado": estado, "pendiente": orden.pendiente, "ejecuciones": ejecuciones}
+
+    def _validar_par(self, simbolo, cantidad, precio):
+        """Rechaza pares suspendidos o deslistados y cantidades o precios fuera de lote o de tick."""
+        info = self.registro.obtener(simbolo)
+        if info is None:
+            # Sin registro cargado no se puede saber si el par existe
+            if len(self.registro):
+                raise ValueError(f"Par desconocido: {simbolo}")
+            return
+        if not info.operable:
+            raise ValueError(f"El par {simbolo} no está habilitado ({info.estado})")
+        if cantidad < info.cantidad_minima:
+            raise ValueError(f"La cantidad mínima de {simbolo} es {info.cantidad_minima:g}")
+        if not multiplo(cantidad, info.paso_cantidad):
+            raise ValueError(f"La cantidad de {simbolo} debe ser múltiplo de {info.paso_cantidad:g}")
+        if precio is not None and not multiplo(precio, info.paso_precio):
+            raise ValueError(f"El precio de {simbolo} debe ser múltiplo de {info.paso_precio:g}")
+
+    def _validar_fondos(self, usuario, simbolo, partes, lado, cantidad, precio, saldos):
+        """Rechaza la orden si la cuenta no cubre su importe más lo reservado por sus órdenes abiertas."""
+        if partes is None:
+            raise ValueError(f"Par desconocido: {simbolo}")
+        # Una compra compromete el activo cotizado con la comisión; una venta, el activo base
+        indice = 1 if lado == COMPRA else 0
+        activo = partes[indice]
+        if lado == COMPRA:
+            if precio is None:
+                raise ValueError(f"Sin precio en vivo para {simbolo}")
+            necesario = precio * cantidad * (1 + tasa_comision(False))
+        else:
+            necesario = cantidad
+        for orden in self.ordenes.values():
+            if orden.usuario != usuario or orden.lado != lado or not orden.activa:
+                continue
+            if orden.simbolo != simbolo:
+                otras = self.registro.separar(orden.simbolo)
+                if otras is None or otras[indice] != activo:
+                    continue
+            if lado == COMPRA:
+                necesario += orden.precio * orden.pendiente * (1 + tasa_comision(True))
+            else:
+                necesario += orden.pendiente
+        disponible = saldos.get(activo, 0.0)
+        if necesario > disponible + 1e-9:
+            raise ValueError(f"Fondos insuficientes: hacen falta {necesario:g} {activo} y hay {disponible:g}")
+
+    def cancelar_orden(self, id_orden) -> bool:
+        """Cancela una orden abierta. Devuelve False si ya no estaba en el libro."""
+        with self._lock:
+            orden = self.ordenes.pop(id_orden, None)
+            if orden is None or not orden.activa:
+                return False
+            self.libro(orden.simbolo).retirar(orden)
+            return True
+
+    def ordenes_abiertas(self, usuario=None) -> List[Orden]:
+        """Devuelve las órdenes en el libro, opcionalmente de un solo usuario."""
+        with self._lock:
+            return [orden for orden in self.ordenes.values() if usuario is None or orden.usuario == usuario]
+
+    def _precio_cruza(self, orden, precio):
+        if orden.tipo == MERCADO:
+            return True
+        return precio <= orden.precio if orden.lado == COMPRA else precio >= orden.precio
+
+    def _emparejar(self, orden: Orden, precio_externo=None) -> List[Dict]:
+        """Ejecuta la orden contra el libro y, si sigue pendiente, contra la contraparte simulada al `precio_externo`."""
+        libro = self.libro(orden.simbolo)
+        lado_opuesto = VENTA if orden.lado == COMPRA else COMPRA
+        ejecuciones = []
+
+        while orden.pendiente > 1e-12:
+            contraria = libro.primera_orden(lado_opuesto)
+            if contraria is None or not self._precio_cruza(orden, contraria.precio):
+                break
+            # La contraparte simulada tiene prioridad si ofrece mejor precio
+            if precio_externo is not None:
+                mejor_externo = precio_externo < contraria.precio if orden.lado == COMPRA else precio_externo > contraria.precio
+                if mejor_externo:
+                    break
+            cantidad = min(orden.pendiente, contraria.pendiente)
+            libro.consumir(contraria, cantidad)
+            orden.pendiente -= cantidad
+            if not contraria.activa:
+                self.ordenes.pop(contraria.id, None)
+            ejecuciones.append(self._registrar(orden, contraria.usuario, contraria.precio, cantidad, es_maker=False))
+            self._registrar(contraria, orden.usuario, contraria.precio, cantidad, es_maker=True)
+
+        if orden.pendiente > 1e-12 and precio_externo is not None and self._precio_cruza(orden, precio_externo):
+            cantidad = orden.pendiente
+            orden.pendiente = 0.0
+            ejecuciones.append(self._registrar(orden, CONTRAPARTE_SIMULADA, precio_externo, cantidad, es_maker=False))
+
+        return ejecuciones
+
+    def procesar_cotizacion(self, simbolo, precio) -> List[Dict]:
+        """Ejecuta contra la contraparte simulada las órdenes límite que el precio en vivo cruzó."""
+        with self._lock:
+            libro = self.libros.get(simbolo)
+            if libro is None:
+                return []
+            ejecuciones = []
+            for lado in (COMPRA, VENTA):
+                while True:
+                    orden = libro.primera_orden(lado)
+                    if orden is None:
+                        break
+                    cruza = precio <= orden.precio if lado == COMPRA else precio >= orden.precio
+                    if not cruza:
+                        break
+                    # La orden en reposo se ejecuta a su propio precio, como maker
+                    cantidad = orden.pendiente
+                    libro.consumir(orden, cantidad)
+                    self.ordenes.pop(orden.id, None)
+                    ejecuciones.append(self._registrar(orden, CONTRAPARTE_SIMULADA, orden.precio, cantidad, es_maker=True))
+            return ejecuciones
+
+    def procesar_cotizaciones(self, precios: Dict[str, float]) -> List[Dict]:
+        """Aplica procesar_cotizacion a cada símbolo con órdenes abiertas."""
+        ejecuciones = []
+        with self._lock:
+            for simbolo, precio in precios.items():
+                if simbolo in self.libros:
+                    ejecuciones.extend(self.procesar_cotizacion(simbolo, precio))
+        return ejecuciones
+
+    def _registrar(self, orden: Orden, contraparte, precio, cantidad, es_maker) -> Dict:
+        ejecucion = {
+            "id_orden": orden.id,
+            "usuario": orden.usuario,
+            "contraparte": contraparte,
+            "simbolo": orden.simbolo,
+            "lado": orden.lado,
+            "tipo": orden.tipo,
+            "precio": precio,
+            "cantidad": cantidad,
+            "comision": calcular_comision(precio, cantidad, es_maker),
+            "maker": es_maker,
+            "instante": time.time(),
+        }
+        for oyente in self.oyentes:
+            oyente(ejecucion)
+        return ejecucion
@@ -0,0 +1,314 @@
+"""
+Este archivo contiene el motor de valuación de portafolios del simulador:
+
+- Posiciones por cuenta con costo FIFO (lotes) o costo promedio, largas o cortas
+- PnL realizado al reducir posiciones y PnL no realizado marcado a mercado
+- Índice símbolo -> posiciones abiertas: cada precio nuevo toca solo las posiciones de ese símbolo
+- Efectivo, valor y costo de cada cuenta por activo cotizado, mantenidos por diferencias en O(1) por posición marcada
+- Equity y PnL en USDT: los pares que cotizan contra otro activo se convierten con el precio de <COTIZADO>USDT
+- Carga desde el diario de operaciones en segundo plano y operaciones nuevas como oyente del diario
+"""
+
+import itertools
+import json
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set
+
+import config
+from api.instrumentacion import registro_metricas
+from simulador.diario import separar_simbolo
+
+FIFO = "fifo"
+COSTO_PROMEDIO = "promedio"
+
+# Activo en el que se valúan las cuentas y se entrega el saldo inicial
+MONEDA_VALUACION = "USDT"
+
+# Cantidades por debajo de este valor se consideran posición cerrada
+EPSILON = 1e-12
+
+
+def acumular(totales: Dict[str, float], cotizado, diferencia):
+    """Suma una diferencia al total de un activo cotizado."""
+    totales[cotizado] = totales.get(cotizado, 0.0) + diferencia
+
+
+class Posicion:
+    """Posición de una cuenta en un par. `cantidad` y `costo` son negativos en una posición corta."""
+
+    __slots__ = ("cuenta", "simbolo", "cotizado", "cantidad", "costo", "lotes", "precio", "valor", "pnl_realizado")
+
+    def __init__(self, cuenta, simbolo, cotizado):
+        self.cuenta = cuenta  # CuentaPortafolio dueña, para marcar sin buscarla
+        self.simbolo = simbolo
+        self.cotizado = cotizado  # valor, costo y PnL están en este activo
+        self.cantidad = 0.0
+        self.costo = 0.0  # costo de la cantidad abierta
+        self.lotes = deque()  # [cantidad, precio] en orden de apertura, solo con costo FIFO
+        self.precio = None  # último precio de mercado
+        self.valor = 0.0  # cantidad * precio
+        self.pnl_realizado = 0.0
+
+    @property
+    def abierta(self):
+        return self.cantidad != 0.0
+
+    @property
+    def costo_medio(self):
+        return self.costo / self.cantidad if self.cantidad else 0.0
+
+    @property
+    def pnl_no_realizado(self):
+        return self.valor - self.costo
+
+    def operar(self, cantidad, precio, fifo=True) -> float:
+        """
+        Aplica una ejecución (`cantidad` positiva compra, negativa vende) y devuelve el PnL realizado.
+        Lo que supera a la posición contraria abre una posición nueva en el otro sentido.
+        """
+        realizado = 0.0
+        if self.cantidad * cantidad < 0:
+            signo = 1.0 if self.cantidad > 0 else -1.0
+            cerrada = min(abs(cantidad), abs(self.cantidad))
+            costo_cerrado = self._consumir_lotes(cerrada) if fifo else abs(self.costo) * cerrada / abs(self.cantidad)
+            realizado = signo * (cerrada * precio - costo_cerrado)
+            self.cantidad -= signo * cerrada
+            self.costo -= signo * costo_cerrado
+            cantidad += signo * cerrada
+            if abs(self.cantidad) < EPSILON:
+                self.cantidad = 0.0
+                self.costo = 0.0
+                self.lotes.clear()
+
+        if abs(cantidad) >= EPSILON:
+            self.cantidad += cantidad
+            self.costo += cantidad * precio
+            if fifo:
+                self.lotes.append([abs(cantidad), precio])
+
+        self.pnl_realizado += realizado
+        return realizado
+
+    def _consumir_lotes(self, cantidad) -> float:
+        """Retira `cantidad` de los lotes más viejos y devuelve su costo."""
+        costo = 0.0
+        while cantidad > EPSILON and self.lotes:
+            lote = self.lotes[0]
+            usada = min(cantidad, lote[0])
+            costo += usada * lote[1]
+            lote[0] -= usada
+            cantidad -= usada
+            if lote[0] <= EPSILON:
+                self.lotes.popleft()
+        return costo
+
+
+class CuentaPortafolio:
+    """Efectivo, posiciones y totales de una cuenta por activo cotizado, actualizados por diferencias."""
+
+    __slots__ = ("usuario", "efectivo", "posiciones", "valor_posiciones", "costo_posiciones", "pnl_realizado")
+
+    def __init__(self, usuario, efectivo):
+        self.usuario = usuario
+        self.efectivo: Dict[str, float] = {MONEDA_VALUACION: efectivo}  # activo cotizado -> saldo
+        self.posiciones: Dict[str, Posicion] = {}
+        self.valor_posiciones: Dict[str, float] = {}  # activo cotizado -> suma del valor de sus posiciones
+        self.costo_posiciones: Dict[str, float] = {}
+        self.pnl_realizado: Dict[str, float] = {}
+
+    def total(self, *totales: Dict[str, float], tasa: Callable[[str], Optional[float]]) -> float:
+        """Suma en USDT de los totales por activo cotizado; los activos sin tasa de conversión no suman."""
+        resultado = 0.0
+        for por_cotizado in totales:
+            for cotizado, valor in por_cotizado.items():
+                conversion = tasa(cotizado)
+                if conversion is not None:
+                    resultado += valor * conversion
+        return resultado
+
+    def equity(self, tasa) -> float:
+        return self.total(self.efectivo, self.valor_posiciones, tasa=tasa)
+
+    def pnl_no_realizado(self, tasa) -> float:
+        return self.total(self.valor_posiciones, tasa=tasa) - self.total(self.costo_posiciones, tasa=tasa)
+
+
+class MotorPortafolio:
+    """Portafolios de todas las cuentas del simulador, marcados a mercado con cada precio nuevo."""
+
+    def __init__(self, metodo=None, saldo_inicial=None, separar: Callable[[str], Optional[tuple]] = None):
+        self.metodo = metodo or config.METODO_COSTO_PORTAFOLIO
+        if self.metodo not in (FIFO, COSTO_PROMEDIO):
+            raise ValueError(f"Método de costo inválido: {self.metodo}")
+        self.saldo_inicial = config.SALDO_INICIAL_USDT if saldo_inicial is None else saldo_inicial
+        self.separar = separar or separar_simbolo
+        self.cuentas: Dict[str, CuentaPortafolio] = {}
+        self.cargado = False
+        self._abiertas: Dict[str, Dict[str, Posicion]] = {}  # símbolo -> usuario -> posición abierta
+        self._precios: Dict[str, float] = {}  # último precio de cada símbolo
+        self._conversiones: Dict[str, Set[str]] = {}  # <COTIZADO>USDT -> cuentas con saldos en ese cotizado
+        self._pendientes = []  # operaciones recibidas mientras se carga el diario
+        self._lock = threading.Lock()
+
+    def cargar(self, ruta_diario, hasta_offset):
+        """Aplica el diario existente hasta `hasta_offset` y luego las operaciones en espera."""
+        try:
+            with open(ruta_diario, "rb") as archivo:
+                offset = 0
+                for linea in archivo:
+                    if offset >= hasta_offset:
+                        break
+                    operacion = json.loads(linea)
+                    with self._lock:
+                        self._aplicar(operacion)
+                    offset += len(linea)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            for operacion in self._pendientes:
+                self._aplicar(operacion)
+            self._pendientes = []
+            self.cargado = True
+
+    def agregar(self, operacion, offset=None):
+        """Oyente del diario: aplica una ejecución nueva a la posición de su cuenta."""
+        with self._lock:
+            if not self.cargado:
+                self._pendientes.append(operacion)
+                return
+            self._aplicar(operacion)
+
+    def _cuenta(self, usuario) -> CuentaPortafolio:
+        cuenta = self.cuentas.get(usuario)
+        if cuenta is None:
+            cuenta = self.cuentas[usuario] = CuentaPortafolio(usuario, self.saldo_inicial)
+        return cuenta
+
+    def tasa(self, cotizado) -> Optional[float]:
+        """Precio en USDT de un activo cotizado, o None si todavía no se conoce."""
+        if cotizado == MONEDA_VALUACION:
+            return 1.0
+        return self._precios.get(cotizado + MONEDA_VALUACION)
+
+    def _aplicar(self, operacion):
+        simbolo = operacion["simbolo"]
+        # El diario guarda los activos del par; las operaciones viejas se separan con el registro
+        partes = (operacion["base"], operacion["cotizado"]) if "cotizado" in operacion else self.separar(simbolo)
+        if partes is None:
+            print(f"Operación de un par sin activo cotizado conocido, se ignora: {simbolo}")
+            return
+        cotizado = partes[1]
+        cuenta = self._cuenta(operacion["usuario"])
+        precio = operacion["precio"]
+        cantidad = operacion["cantidad"] if operacion["lado"] == "compra" else -operacion["cantidad"]
+
+        posicion = cuenta.posiciones.get(simbolo)
+        if posicion is None:
+            posicion = cuenta.posiciones[simbolo] = Posicion(cuenta, simbolo, cotizado)
+            if cotizado != MONEDA_VALUACION:
+                self._conversiones.setdefault(cotizado + MONEDA_VALUACION, set()).add(cuenta.usuario)
+        # Hasta recibir una cotización del símbolo se marca al precio de la última ejecución
+        posicion.precio = self._precios.get(simbolo, precio)
+        valor_anterior = posicion.valor
+        costo_anterior = posicion.costo
+
+        # La comisión se cobra en el activo cotizado y cuenta como PnL realizado
+        realizado = posicion.operar(cantidad, precio, self.metodo == FIFO) - operacion["comision"]
+        posicion.pnl_realizado -= operacion["comision"]
+        posicion.valor = posicion.cantidad * posicion.precio
+
+        acumular(cuenta.efectivo, cotizado, -(cantidad * precio + operacion["comision"]))
+        acumular(cuenta.pnl_realizado, cotizado, realizado)
+        acumular(cuenta.valor_posiciones, cotizado, posicion.valor - valor_anterior)
+        acumular(cuenta.costo_posiciones, cotizado, posicion.costo - costo_anterior)
+
+        abiertas = self._abiertas.setdefault(simbolo, {})
+        if posicion.abierta:
+            abiertas[cuenta.usuario] = posicion
+        else:
+            abiertas.pop(cuenta.usuario, None)
+
+    def actualizar_precios(self, precios: Dict[str, float]) -> Set[str]:
+        """Marca a mercado las posiciones abiertas de los símbolos con precio nuevo. Devuelve las cuentas afectadas."""
+        afectadas = set()
+        marcadas = 0
+        with self._lock:
+            # Se recorre el lado más chico: el mercado entero o los símbolos con posiciones
+            if len(precios) <= len(self._abiertas):
+                pares = ((simbolo, precio, self._abiertas.get(simbolo)) for simbolo, precio in precios.items())
+            else:
+                pares = ((simbolo, precios.get(simbolo), abiertas) for simbolo, abiertas in self._abiertas.items())
+                # Los pares de conversión se leen aunque nadie tenga posiciones en ellos
+                pares = itertools.chain(pares, ((simbolo, precios.get(simbolo), None) for simbolo in self._conversiones
+                                                if simbolo not in self._abiertas))
+            for simbolo, precio, abiertas in pares:
+                if not precio:
+                    continue
+                self._precios[simbolo] = precio
+                cuentas_convertidas = self._conversiones.get(simbolo)
+                if cuentas_convertidas:
+                    afectadas.update(cuentas_convertidas)
+                if not abiertas:
+                    continue
+                for posicion in abiertas.values():
+                    valor = posicion.cantidad * precio
+                    valores = posicion.cuenta.valor_posiciones
+                    valores[posicion.cotizado] += valor - posicion.valor
+                    posicion.valor = valor
+                    posicion.precio = precio
+                afectadas.update(abiertas)
+                marcadas += len(abiertas)
+        if marcadas:
+            registro_metricas.sumar("portafolio_posiciones_marcadas_total", marcadas)
+        return afectadas
+
+    def resumen(self, usuario) -> Optional[Dict]:
+        """Totales y posiciones de una cuenta, copiados para leerlos fuera del lock."""
+        with self._lock:
+            cuenta = self.cuentas.get(usuario)
+            if cuenta is None:
+                return None
+            tasa = self.tasa
+            equity = cuenta.equity(tasa)
+            posiciones: List[Dict] = []
+            for posicion in cuenta.posiciones.values():
+                # Valor y PnL en USDT; costo medio y precio en el activo cotizado del par
+                conversion = tasa(posicion.cotizado)
+                valor = None if conversion is None else posicion.valor * conversion
+                posiciones.append({
+                    'simbolo': posicion.simbolo,
+                    'cotizado': posicion.cotizado,
+                    'cantidad': posicion.cantidad,
+                    'costo_medio': posicion.costo_medio,
+                    'precio': posicion.precio,
+                    'valor': valor,
+                    'pnl_no_realizado': None if conversion is None else posicion.pnl_no_realizado * conversion,
+                    'pnl_realizado': None if conversion is None else posicion.pnl_realizado * conversion,
+                    'asignacion': None if valor is None else (valor / equity * 100 if equity > 0 else 0.0),
+                })
+            return {
+                'usuario': usuario,
+                'efectivo': cuenta.total(cuenta.efectivo, tasa=tasa),
+                'equity': equity,
+                'pnl_realizado': cuenta.total(cuenta.pnl_realizado, tasa=tasa),
+                'pnl_no_realizado': cuenta.pnl_no_realizado(tasa),
+                'sin_conversion': sorted(cotizado for cotizado in cuenta.efectivo if tasa(cotizado) is None),
+                'posiciones': posiciones,
+            }
+
+
+_motor = None
+_lock_motor = threading.Lock()
+
+
+def obtener_motor_portafolio(diario) -> MotorPortafolio:
+    """Devuelve el motor compartido; la primera vez carga el diario en segundo plano."""
+    global _motor
+    with _lock_motor:
+        if _motor is None:
+            _motor = MotorPortafolio()
+            hasta_offset = diario.suscribir(_motor.agregar)
+            threading.Thread(target=_motor.cargar, args=(diario.ruta_diario, hasta_offset), daemon=True).start()
+    return _motor
@@ -0,0 +1,6 @@
+"""Configuración común de los tests: importa los módulos de la aplicación desde la raíz del repositorio."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
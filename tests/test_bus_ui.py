@@ -0,0 +1,51 @@
+"""Tests del bus de la interfaz: lotes atómicos por cuadro y reemplazo de claves pendientes."""
+
+from interfaz.bus_ui import BusUI
+
+
+def test_un_lote_no_se_parte_entre_cuadros():
+    bus = BusUI()
+    aplicadas = []
+    bus.publicar_lote((("tabla", aplicadas.append, ("tabla",)), ("hora", aplicadas.append, ("hora",))))
+    bus.publicar("otra", aplicadas.append, "otra")
+
+    # Sin presupuesto se aplica el primer lote entero y el resto espera al cuadro siguiente
+    assert bus.procesar(presupuesto=0) == 2
+    assert aplicadas == ["tabla", "hora"]
+    assert len(bus) == 1
+    assert bus.procesar(presupuesto=0) == 1
+    assert aplicadas == ["tabla", "hora", "otra"]
+
+
+def test_el_lote_nuevo_absorbe_al_pendiente_que_reemplaza():
+    bus = BusUI()
+    aplicadas = []
+    bus.publicar_lote((("resultado", aplicadas.append, ("orden 1",)),
+                       ("ordenes", aplicadas.append, ("abiertas 1",))))
+    bus.publicar("precio", aplicadas.append, "precio")
+    bus.publicar("ordenes", aplicadas.append, "abiertas 2")
+    assert len(bus) == 3
+
+    # El resultado de la orden sale en el mismo cuadro que la lista de órdenes más reciente
+    assert bus.procesar(presupuesto=0) == 1
+    assert aplicadas == ["precio"]
+    assert bus.procesar(presupuesto=0) == 2
+    assert aplicadas == ["precio", "orden 1", "abiertas 2"]
+    assert len(bus) == 0
+
+
+def test_claves_repetidas_dentro_del_lote_y_anonimas():
+    bus = BusUI()
+    aplicadas = []
+    bus.publicar_lote((("a", aplicadas.append, (1,)), (None, aplicadas.append, (2,)),
+                       ("a", aplicadas.append, (3,)), (None, aplicadas.append, (4,))))
+    assert bus.procesar() == 3
+    assert aplicadas == [2, 3, 4]
+
+
+def test_un_error_no_corta_el_lote():
+    bus = BusUI()
+    aplicadas = []
+    bus.publicar_lote((("falla", lambda: 1 / 0, ()), ("sigue", aplicadas.append, ("ok",))))
+    assert bus.procesar() == 2
+    assert aplicadas == ["ok"]
@@ -0,0 +1,36 @@
+"""Tests de la caché de CoinGecko: snapshot en disco con refrescos concurrentes de páginas."""
+
+import json
+import threading
+
+from api.cache_coingecko import VERSION_SNAPSHOT, CacheCoinGecko
+
+PAGINAS = 8
+
+
+def test_refrescos_concurrentes_no_pisan_el_snapshot(tmp_path, capsys):
+    ruta = tmp_path / "coingecko.json"
+    barrera = threading.Barrier(PAGINAS)
+
+    def descargar(pagina):
+        # Todas las páginas terminan a la vez y escriben el snapshot juntas
+        barrera.wait()
+        return {f"moneda-{pagina}": {"simbolo": f"M{pagina}", "datos": "x" * 50_000}}
+
+    cache = CacheCoinGecko(descargar, ruta=str(ruta), ttl=0)
+    cache._paginas = {}
+    hilos = [threading.Thread(target=cache._refrescar_pagina, args=(pagina,)) for pagina in range(1, PAGINAS + 1)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert "Error" not in capsys.readouterr().out
+    snapshot = json.loads(ruta.read_text())
+    assert snapshot["version"] == VERSION_SNAPSHOT
+    assert sorted(int(pagina) for pagina in snapshot["paginas"]) == list(range(1, PAGINAS + 1))
+    assert not (tmp_path / "coingecko.json.tmp").exists()
+
+    recargada = CacheCoinGecko(descargar, ruta=str(ruta))
+    recargada._cargar_snapshot()
+    assert set(recargada._paginas) == set(range(1, PAGINAS + 1))
@@ -0,0 +1,89 @@
+"""Tests de las cintas de mercado: grabación, búsqueda y reproducción por el transporte y por HTTP."""
+
+import json
+import time
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from api.cinta import GrabadorCinta, LectorCinta, TransporteCinta, activar_reproduccion
+from herramientas import servidor_cinta_local
+
+INICIO = 1_700_000_000.0
+URL_PRECIO = "https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT&extra=1"
+FRAME = json.dumps({"stream": "!miniTicker@arr", "data": [{"s": "BTCUSDT", "c": "101"}]})
+
+
+def respuesta(url, cuerpo, estado=200):
+    grabada = requests.Response()
+    grabada.url = url
+    grabada.status_code = estado
+    grabada.headers = CaseInsensitiveDict({"Content-Type": "application/json", "Content-Length": "99"})
+    grabada._content = cuerpo.encode("utf-8")
+    return grabada
+
+
+@pytest.fixture
+def cinta(tmp_path):
+    ruta = str(tmp_path / "mercado.cinta")
+    grabador = GrabadorCinta(ruta)
+    grabador.grabar_respuesta(respuesta(URL_PRECIO, '{"price": "100"}'), INICIO)
+    grabador.grabar_frame(FRAME, INICIO + 0.5)
+    grabador.grabar_respuesta(respuesta(URL_PRECIO, '{"price": "101"}'), INICIO + 1.0)
+    grabador.cerrar()
+    return ruta
+
+
+def test_grabacion_y_busqueda(cinta):
+    lector = LectorCinta(cinta)
+    assert len(lector) == 3
+    assert lector.tipos == ["http", "ws", "http"]
+    assert lector.claves[0] == "/api/v3/ticker/price?extra=1&symbol=BTCUSDT"
+    assert "Content-Length" not in lector.leer(0)["cabeceras"]
+    assert lector.buscar(INICIO + 0.2) == 1
+    assert [registro["frame"] for _, registro in lector.registros(tipo="ws")] == [FRAME]
+    assert [instante for instante, _ in lector.registros(desde=lector.buscar(INICIO + 0.6))] == [INICIO + 1.0]
+
+
+def test_registro_cortado_al_final(cinta):
+    with open(cinta, "rb+") as archivo:
+        archivo.truncate(archivo.seek(0, 2) - 3)
+    assert LectorCinta(cinta).tipos == ["http", "ws"]
+
+
+def test_reproduccion_a_velocidad_maxima(cinta):
+    sesion = requests.Session()
+    activar_reproduccion(sesion, cinta, velocidad=0)
+    inicio = time.monotonic()
+    # El orden de los parámetros no cambia la clave; agotadas las respuestas se repite la última
+    cuerpos = [sesion.get("https://api.binance.com/api/v3/ticker/price?extra=1&symbol=BTCUSDT").json()
+               for _ in range(3)]
+    assert time.monotonic() - inicio < 0.5
+    assert cuerpos == [{"price": "100"}, {"price": "101"}, {"price": "101"}]
+    assert sesion.get("https://api.binance.com/api/v3/time").status_code == 404
+
+
+def test_reproduccion_acelerada(cinta):
+    transporte = TransporteCinta(LectorCinta(cinta), velocidad=10)
+    clave = "/api/v3/ticker/price?extra=1&symbol=BTCUSDT"
+    assert transporte.siguiente(clave)["cuerpo"] == '{"price": "100"}'
+    inicio = time.monotonic()
+    assert transporte.siguiente(clave)["cuerpo"] == '{"price": "101"}'
+    # Un segundo de cinta a 10x son 0.1 s reales
+    assert 0.09 <= time.monotonic() - inicio < 0.9
+
+
+def test_servidor_http_sirve_los_mismos_cuerpos(cinta):
+    servidor = servidor_cinta_local.iniciar_servidor(cinta, puerto=0, velocidad=0)
+    try:
+        sesion = requests.Session()
+        sesion.trust_env = False
+        base = f"http://127.0.0.1:{servidor.server_address[1]}"
+        respuestas = [sesion.get(f"{base}/api/v3/ticker/price?symbol=BTCUSDT&extra=1", timeout=5) for _ in range(2)]
+        assert [r.text for r in respuestas] == ['{"price": "100"}', '{"price": "101"}']
+        assert respuestas[0].headers["Content-Type"] == "application/json"
+        assert sesion.get(f"{base}/api/v3/time", timeout=5).status_code == 404
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
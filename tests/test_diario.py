@@ -0,0 +1,116 @@
+"""Tests del diario de operaciones: reconstrucción desde el snapshot y la cola del diario."""
+
+import json
+import os
+
+import pytest
+
+import config
+from simulador import diario as modulo_diario
+from simulador.diario import DiarioOperaciones
+
+PARES = {"BTCUSDT": ("BTC", "USDT"), "ETHBTC": ("ETH", "BTC")}
+
+
+@pytest.fixture(autouse=True)
+def pares_fijos(monkeypatch):
+    # Sin registro de símbolos: el diario no debe ir a la red en los tests
+    monkeypatch.setattr(modulo_diario, "separar_simbolo", PARES.get)
+
+
+def operacion(simbolo="BTCUSDT", lado="compra", cantidad=1.0, precio=100.0, usuario="a"):
+    return {"usuario": usuario, "simbolo": simbolo, "lado": lado, "tipo": "limite",
+            "cantidad": cantidad, "precio": precio, "comision": 0.0, "instante": 0.0}
+
+
+def abrir(tmp_path):
+    diario = DiarioOperaciones(str(tmp_path / "operaciones.json"), str(tmp_path / "portafolio.json"))
+    diario.abrir()
+    return diario
+
+
+def test_saldo_inicial_en_usdt_aunque_la_primera_operacion_no_cotice_en_usdt(tmp_path):
+    diario = abrir(tmp_path)
+    diario.registrar(operacion("ETHBTC", cantidad=10, precio=0.05))
+    saldos = diario.saldos_usuario("a")
+    diario.cerrar()
+    assert saldos == {"USDT": config.SALDO_INICIAL_USDT, "ETH": 10, "BTC": -0.5}
+
+
+def test_snapshot_mas_alla_del_final_del_diario(tmp_path):
+    diario = abrir(tmp_path)
+    diario.registrar(operacion())
+    diario.registrar(operacion())
+    diario.cerrar()
+
+    # Se restaura un diario más corto que el que conoce el snapshot
+    ruta = tmp_path / "operaciones.json"
+    primera = ruta.read_bytes().splitlines(keepends=True)[0]
+    ruta.write_bytes(primera)
+    assert json.loads((tmp_path / "portafolio.json").read_text())["offset"] > len(primera)
+
+    diario = abrir(tmp_path)
+    saldos = diario.saldos_usuario("a")
+    diario.cerrar()
+    assert saldos["BTC"] == 1.0
+    assert os.path.getsize(ruta) == len(primera)
+
+
+def test_reproduce_la_cola_y_descarta_una_linea_cortada(tmp_path):
+    lineas = [json.dumps(dict(operacion(cantidad=cantidad), seq=seq)).encode() + b"\n"
+              for seq, cantidad in ((1, 1.0), (2, 2.0))]
+    ruta = tmp_path / "operaciones.json"
+    # Un corte dejó la tercera operación a medio escribir
+    ruta.write_bytes(b"".join(lineas) + b'{"usuario":"a","simbolo":"BTC')
+
+    diario = abrir(tmp_path)
+    assert diario.secuencia == 2
+    assert diario.saldos_usuario("a")["BTC"] == 3.0
+    assert ruta.read_bytes() == b"".join(lineas)
+
+    diario.registrar(operacion(cantidad=4.0))
+    diario.cerrar()
+    registros = [json.loads(linea) for linea in ruta.read_bytes().splitlines()]
+    assert [registro["seq"] for registro in registros] == [1, 2, 3]
+
+
+def test_reproduce_desde_el_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OPERACIONES_POR_SNAPSHOT", 2)
+    diario = abrir(tmp_path)
+    for cantidad in (1.0, 2.0, 4.0):
+        diario.registrar(operacion(cantidad=cantidad))
+    # Se simula un corte: el snapshot quedó en la segunda operación y la tercera solo está en el diario
+    diario._detener.set()
+    diario._archivo.close()
+    snapshot = json.loads((tmp_path / "portafolio.json").read_text())
+    assert snapshot["secuencia"] == 2
+
+    diario = abrir(tmp_path)
+    saldos = diario.saldos_usuario("a")
+    diario.cerrar()
+    assert saldos["BTC"] == 7.0
+    assert saldos["USDT"] == pytest.approx(config.SALDO_INICIAL_USDT - 700.0)
+
+
+def test_par_sin_activo_cotizado_conocido_se_rechaza(tmp_path):
+    diario = abrir(tmp_path)
+    with pytest.raises(ValueError, match="activo cotizado"):
+        diario.registrar(operacion("NUEVOXYZ"))
+    diario.cerrar()
+    assert diario.secuencia == 0
+    assert (tmp_path / "operaciones.json").read_bytes() == b""
+
+
+def test_la_reconstruccion_no_depende_del_registro(tmp_path, monkeypatch):
+    diario = abrir(tmp_path)
+    diario.registrar(operacion("ETHBTC", cantidad=10, precio=0.05))
+    diario.cerrar()
+    os.remove(tmp_path / "portafolio.json")
+
+    # Al reabrir el registro ya no conoce el par: los activos salen del propio diario
+    monkeypatch.setattr(modulo_diario, "separar_simbolo", lambda simbolo: None)
+    diario = abrir(tmp_path)
+    saldos = diario.saldos_usuario("a")
+    diario.cerrar()
+    assert saldos["ETH"] == 10
+    assert saldos["BTC"] == -0.5
@@ -0,0 +1,96 @@
+"""Tests del modo headless: refrescos con el planificador y órdenes leídas de un archivo JSONL."""
+
+import json
+
+import pytest
+
+import config
+import modo_headless
+
+
+class Fila(dict):
+    def como_dict(self):
+        return dict(self)
+
+
+class RegistroVacio:
+    def __len__(self):
+        return 0
+
+    def obtener(self, simbolo):
+        return None
+
+    def separar(self, simbolo):
+        return {"BTCUSDT": ("BTC", "USDT")}.get(simbolo)
+
+
+class DiarioEnMemoria:
+    def __init__(self):
+        self.ejecuciones = []
+
+    def saldos_usuario(self, usuario):
+        return {"USDT": 1000.0}
+
+    def registrar(self, ejecucion):
+        self.ejecuciones.append(ejecucion)
+
+
+@pytest.fixture
+def servicio(monkeypatch, tmp_path):
+    refrescos = []
+
+    def datos(limite, cancelado=None):
+        refrescos.append(limite)
+        return [Fila(simbolo="BTCUSDT", precio=100.0)]
+
+    diario = DiarioEnMemoria()
+    monkeypatch.setattr(config, "datos_cotizaciones", [])
+    monkeypatch.setattr(modo_headless, "obtener_datos_cotizacion", datos)
+    monkeypatch.setattr(modo_headless, "guardar_snapshot_cotizaciones", lambda datos: None)
+    monkeypatch.setattr(modo_headless, "obtener_registro_simbolos", RegistroVacio)
+    monkeypatch.setattr(modo_headless, "obtener_diario", lambda: diario)
+    monkeypatch.setattr(modo_headless, "cerrar_diario", lambda: None)
+    monkeypatch.setattr(modo_headless, "iniciar_exportacion", lambda: None)
+    monkeypatch.setattr(modo_headless, "detener_exportacion", lambda: None)
+
+    def crear(**opciones):
+        salida = tmp_path / "salida.jsonl"
+        instancia = modo_headless.ServicioHeadless(limite=3, salida=str(salida), **opciones)
+        instancia.refrescos = refrescos
+        instancia.diario = diario
+        instancia.eventos = lambda: [json.loads(linea) for linea in salida.read_text().splitlines()]
+        return instancia
+    return crear
+
+
+def test_refrescos_con_el_planificador(servicio):
+    instancia = servicio(intervalo=0.01, iteraciones=3)
+    instancia.ejecutar()
+    assert instancia.refrescos == [3, 3, 3]
+    assert [evento["tipo"] for evento in instancia.eventos()] == ["cotizaciones"] * 3
+
+
+def test_ordenes_desde_un_archivo(servicio, tmp_path):
+    ruta = tmp_path / "ordenes.jsonl"
+    ruta.write_text("\n".join([
+        json.dumps({"simbolo": "BTCUSDT", "lado": "compra", "cantidad": 1, "precio": 90.0}),
+        json.dumps({"simbolo": "BTCUSDT", "lado": "compra", "tipo": "mercado", "cantidad": 2}),
+        json.dumps({"simbolo": "BTCUSDT", "lado": "compra", "tipo": "mercado", "cantidad": 100}),
+        "{no es json",
+        "",
+        json.dumps({"cancelar": 1}),
+    ]) + "\n")
+
+    instancia = servicio(intervalo=60, iteraciones=1, ordenes=str(ruta))
+    instancia.ejecutar()
+
+    eventos = [evento for evento in instancia.eventos() if evento["tipo"] != "cotizaciones"]
+    assert [evento["tipo"] for evento in eventos] == [
+        "orden", "ejecucion", "orden", "orden_rechazada", "orden_rechazada", "cancelacion"]
+    assert eventos[0]["datos"]["estado"] == "abierta"
+    # La orden a mercado se ejecuta al precio del refresco
+    assert eventos[2]["datos"]["estado"] == "ejecutada"
+    assert eventos[1]["datos"]["precio"] == 100.0
+    assert "Fondos insuficientes" in eventos[3]["datos"]["error"]
+    assert eventos[5]["datos"] == {"id": 1, "cancelada": True}
+    assert len(instancia.diario.ejecuciones) == 1
@@ -0,0 +1,146 @@
+"""Tests del motor de emparejamiento: prioridad precio-tiempo, cancelación perezosa, precio de referencia y fondos."""
+
+import threading
+import time
+
+import pytest
+
+from simulador.motor_ordenes import COMPRA, IOC, LIMITE, MERCADO, VENTA, MotorOrdenes
+
+PARES = {"BTCUSDT": ("BTC", "USDT"), "ETHUSDT": ("ETH", "USDT")}
+
+
+class RegistroFijo:
+    """Registro de símbolos mínimo: separa los pares conocidos y no valida tick ni lote."""
+
+    def __len__(self):
+        return 0
+
+    def obtener(self, simbolo):
+        return None
+
+    def separar(self, simbolo):
+        return PARES.get(simbolo)
+
+
+def crear_motor(precios=None, saldos=None):
+    cuentas = saldos or {}
+    return MotorOrdenes(cotizacion_externa=(precios or {}).get, registro=RegistroFijo(),
+                        saldos=lambda usuario: cuentas.get(usuario, {"USDT": 1000.0}))
+
+
+def test_cotizacion_externa_fuera_del_lock():
+    motor = crear_motor()
+
+    libre = []
+
+    def tomar_lock():
+        libre.append(motor._lock.acquire(blocking=False))
+        if libre[-1]:
+            motor._lock.release()
+
+    def cotizacion(simbolo):
+        # El lock es reentrante: se prueba desde otro hilo si está libre mientras se resuelve el precio
+        hilo = threading.Thread(target=tomar_lock)
+        hilo.start()
+        hilo.join()
+        return 100.0
+
+    motor.cotizacion_externa = cotizacion
+    resultado = motor.enviar_orden("a", "BTCUSDT", COMPRA, MERCADO, 1)
+    assert resultado["estado"] == "ejecutada"
+    assert resultado["ejecuciones"][0]["precio"] == 100.0
+    assert libre == [True]
+
+
+def test_mercado_sin_precio_en_cache_se_rechaza():
+    motor = crear_motor()
+    with pytest.raises(ValueError, match="Sin precio"):
+        motor.enviar_orden("a", "BTCUSDT", COMPRA, MERCADO, 1)
+
+
+def test_compra_sin_fondos_se_rechaza():
+    motor = crear_motor({"BTCUSDT": 100.0})
+    with pytest.raises(ValueError, match="Fondos insuficientes"):
+        motor.enviar_orden("a", "BTCUSDT", COMPRA, MERCADO, 10)
+
+
+def test_fondos_reservados_por_ordenes_abiertas():
+    motor = crear_motor()
+    assert motor.enviar_orden("a", "BTCUSDT", COMPRA, LIMITE, 6, 100.0)["estado"] == "abierta"
+    # Los 600 USDT de la orden abierta ya no están disponibles para otra compra contra USDT
+    with pytest.raises(ValueError, match="Fondos insuficientes"):
+        motor.enviar_orden("a", "ETHUSDT", COMPRA, LIMITE, 5, 100.0)
+
+
+def test_dos_ordenes_simultaneas_no_gastan_el_mismo_saldo():
+    cuenta = {"USDT": 1000.0}
+
+    def saldos(usuario):
+        # Ensancha la ventana entre leer los saldos y registrar la ejecución
+        leidos = dict(cuenta)
+        time.sleep(0.05)
+        return leidos
+
+    def registrar(ejecucion):
+        cuenta["USDT"] -= ejecucion["cantidad"] * ejecucion["precio"]
+
+    motor = MotorOrdenes(cotizacion_externa={"BTCUSDT": 100.0}.get, registro=RegistroFijo(), saldos=saldos)
+    motor.oyentes.append(registrar)
+    resultados = []
+
+    def comprar():
+        try:
+            resultados.append(motor.enviar_orden("a", "BTCUSDT", COMPRA, MERCADO, 6)["estado"])
+        except ValueError as e:
+            resultados.append(str(e))
+
+    hilos = [threading.Thread(target=comprar) for _ in range(2)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert resultados.count("ejecutada") == 1
+    assert any("Fondos insuficientes" in resultado for resultado in resultados)
+    assert cuenta["USDT"] == 400.0
+
+
+def test_venta_necesita_el_activo_base():
+    motor = crear_motor(saldos={"a": {"USDT": 1000.0, "BTC": 1.0}})
+    with pytest.raises(ValueError, match="Fondos insuficientes"):
+        motor.enviar_orden("a", "BTCUSDT", VENTA, LIMITE, 2, 100.0)
+    assert motor.enviar_orden("a", "BTCUSDT", VENTA, LIMITE, 1, 100.0)["estado"] == "abierta"
+
+
+def test_prioridad_precio_tiempo():
+    motor = MotorOrdenes()
+    motor.enviar_orden("b", "BTCUSDT", VENTA, LIMITE, 1, 101.0)
+    motor.enviar_orden("c", "BTCUSDT", VENTA, LIMITE, 1, 101.0)
+    motor.enviar_orden("d", "BTCUSDT", VENTA, LIMITE, 1, 100.0)
+
+    resultado = motor.enviar_orden("a", "BTCUSDT", COMPRA, LIMITE, 2.5, 101.0)
+    # Primero el mejor precio; al mismo precio, la orden más antigua
+    assert [(e["contraparte"], e["precio"], e["cantidad"]) for e in resultado["ejecuciones"]] == [
+        ("d", 100.0, 1), ("b", 101.0, 1), ("c", 101.0, 0.5)]
+    assert resultado["estado"] == "ejecutada"
+    assert motor.libro("BTCUSDT").profundidad(VENTA) == [(101.0, 0.5)]
+
+
+def test_cancelacion_perezosa():
+    motor = MotorOrdenes()
+    primera = motor.enviar_orden("b", "BTCUSDT", VENTA, LIMITE, 1, 100.0)["id"]
+    motor.enviar_orden("c", "BTCUSDT", VENTA, LIMITE, 1, 100.0)
+    solitaria = motor.enviar_orden("d", "BTCUSDT", VENTA, LIMITE, 1, 99.0)["id"]
+    libro = motor.libro("BTCUSDT")
+
+    assert motor.cancelar_orden(primera)
+    assert motor.cancelar_orden(solitaria)
+    assert not motor.cancelar_orden(primera)
+    # Las órdenes canceladas siguen en sus colas hasta llegar al frente, pero no cuentan
+    assert libro.mejor_precio(VENTA) == 100.0
+    assert libro.profundidad(VENTA) == [(100.0, 1)]
+
+    resultado = motor.enviar_orden("a", "BTCUSDT", COMPRA, IOC, 2, 100.0)
+    assert [e["contraparte"] for e in resultado["ejecuciones"]] == ["c"]
+    assert resultado["estado"] == "parcial_cancelada"
+    assert libro.mejor_precio(VENTA) is None
@@ -0,0 +1,99 @@
+"""Tests del planificador de refrescos: agrupación de pedidos, cancelación y parámetros de cada pedido."""
+
+import threading
+import time
+
+import numpy as np
+
+from interfaz.cotizaciones import modelo_cotizaciones
+from interfaz.cotizaciones.planificador_refresco import PlanificadorRefresco
+
+ESPERA = 5  # tope de segundos para cada espera; los tests terminan mucho antes
+
+
+class RefrescoControlado:
+    """Refresco que se queda bloqueado hasta que el test lo libera."""
+
+    def __init__(self):
+        self.llamadas = []  # (cancelado, parámetros) de cada refresco
+        self.empezo = threading.Semaphore(0)
+        self.liberar = threading.Event()
+
+    def __call__(self, cancelado, **parametros):
+        self.llamadas.append((cancelado, parametros))
+        self.empezo.release()
+        self.liberar.wait(ESPERA)
+
+
+def crear_planificador(refresco):
+    terminados = threading.Semaphore(0)
+    planificador = PlanificadorRefresco(refresco, intervalo_base=lambda: 60.0, automatico=False,
+                                        al_cambiar_estado=lambda ocupado: ocupado or terminados.release(),
+                                        parametros={"limite": 50})
+    planificador.iniciar()
+    return planificador, terminados
+
+
+def test_pedidos_durante_un_refresco_se_agrupan():
+    refresco = RefrescoControlado()
+    planificador, terminados = crear_planificador(refresco)
+    try:
+        planificador.solicitar()
+        assert refresco.empezo.acquire(timeout=ESPERA)
+        for _ in range(5):
+            planificador.solicitar()
+        refresco.liberar.set()
+
+        # Los cinco pedidos hechos durante el primer refresco se resuelven con uno solo
+        assert terminados.acquire(timeout=ESPERA)
+        assert terminados.acquire(timeout=ESPERA)
+        assert not terminados.acquire(timeout=0.2)
+        assert len(refresco.llamadas) == 2
+    finally:
+        planificador.detener()
+
+
+def test_cancelar_en_curso_con_parametros_nuevos():
+    refresco = RefrescoControlado()
+    planificador, terminados = crear_planificador(refresco)
+    try:
+        planificador.solicitar()
+        assert refresco.empezo.acquire(timeout=ESPERA)
+        planificador.solicitar(cancelar_en_curso=True, limite=None)
+        cancelado_primero = refresco.llamadas[0][0]
+        assert cancelado_primero.is_set()
+        refresco.liberar.set()
+
+        assert terminados.acquire(timeout=ESPERA)
+        assert terminados.acquire(timeout=ESPERA)
+        (_, primeros), (cancelado_segundo, segundos) = refresco.llamadas
+        assert primeros == {"limite": 50}
+        assert segundos == {"limite": None}
+        assert not cancelado_segundo.is_set()
+    finally:
+        planificador.detener()
+
+
+def test_la_cancelacion_corta_las_descargas_de_velas(monkeypatch):
+    cancelado = threading.Event()
+    pedidas = []
+
+    class Almacen:
+        def obtener_velas(self, simbolo, intervalo, limite, precio):
+            pedidas.append(simbolo)
+            cancelado.set()
+            return []
+
+    class Mercado:
+        simbolos = [f"M{i:04d}USDT" for i in range(500)]
+
+        def __getitem__(self, campo):
+            return np.ones(len(self.simbolos))
+
+    monkeypatch.setattr(modelo_cotizaciones, "obtener_almacen_velas", Almacen)
+    assert not modelo_cotizaciones.completar_metricas_velas(Mercado(), np.arange(500), cancelado)
+    pedidas_al_volver = len(pedidas)
+    assert pedidas_al_volver < 2 * 500
+    # Las descargas que seguían en la cola se cancelaron: no empieza ninguna más
+    time.sleep(0.1)
+    assert len(pedidas) == pedidas_al_volver
@@ -0,0 +1,97 @@
+"""Tests del motor de portafolios: costo FIFO y promedio, cruces por cero y cuentas con varios activos cotizados."""
+
+import pytest
+
+from simulador.portafolio import COSTO_PROMEDIO, FIFO, MotorPortafolio
+
+COTIZADOS = {"BTCUSDT": ("BTC", "USDT"), "ETHUSDT": ("ETH", "USDT"), "ETHBTC": ("ETH", "BTC")}
+
+
+def crear_motor(metodo=FIFO):
+    motor = MotorPortafolio(metodo, saldo_inicial=10_000.0, separar=COTIZADOS.get)
+    motor.cargado = True
+    return motor
+
+
+def operacion(simbolo, lado, cantidad, precio, comision=0.0, usuario="a"):
+    return {"usuario": usuario, "simbolo": simbolo, "lado": lado, "cantidad": cantidad,
+            "precio": precio, "comision": comision}
+
+
+@pytest.mark.parametrize("metodo, realizado_parcial", [(FIFO, 200.0), (COSTO_PROMEDIO, 150.0)])
+def test_pnl_realizado_al_cruzar_cero(metodo, realizado_parcial):
+    motor = crear_motor(metodo)
+    motor.agregar(operacion("BTCUSDT", "compra", 1, 100.0))
+    motor.agregar(operacion("BTCUSDT", "compra", 1, 200.0))
+    motor.agregar(operacion("BTCUSDT", "venta", 1, 300.0))
+    assert motor.resumen("a")["pnl_realizado"] == pytest.approx(realizado_parcial)
+
+    # Vende 3 con 1 en cartera: cierra la larga y abre una corta de 2 a 400
+    motor.agregar(operacion("BTCUSDT", "venta", 3, 400.0))
+    resumen = motor.resumen("a")
+    posicion = resumen["posiciones"][0]
+    assert posicion["cantidad"] == pytest.approx(-2.0)
+    assert posicion["costo_medio"] == pytest.approx(400.0)
+    assert resumen["pnl_realizado"] == pytest.approx(400.0)
+
+    motor.actualizar_precios({"BTCUSDT": 300.0})
+    assert motor.resumen("a")["pnl_no_realizado"] == pytest.approx(200.0)
+
+    motor.agregar(operacion("BTCUSDT", "compra", 2, 300.0))
+    resumen = motor.resumen("a")
+    assert resumen["posiciones"][0]["cantidad"] == 0.0
+    assert resumen["pnl_realizado"] == pytest.approx(600.0)
+    assert resumen["pnl_no_realizado"] == pytest.approx(0.0)
+    assert resumen["equity"] == pytest.approx(10_600.0)
+
+
+def test_comision_cuenta_como_pnl_realizado():
+    motor = crear_motor()
+    motor.agregar(operacion("BTCUSDT", "compra", 1, 100.0, comision=0.5))
+    resumen = motor.resumen("a")
+    assert resumen["pnl_realizado"] == pytest.approx(-0.5)
+    assert resumen["equity"] == pytest.approx(9_999.5)
+
+
+def test_cuenta_con_varios_activos_cotizados():
+    motor = crear_motor()
+    motor.agregar(operacion("ETHBTC", "compra", 10, 0.05))
+    motor.agregar(operacion("BTCUSDT", "compra", 0.1, 60_000.0))
+
+    # Sin precio de BTCUSDT cotizado todavía, el saldo en BTC no se puede convertir
+    motor._precios.clear()
+    resumen = motor.resumen("a")
+    assert resumen["sin_conversion"] == ["BTC"]
+
+    motor.actualizar_precios({"BTCUSDT": 60_000.0, "ETHBTC": 0.05})
+    resumen = motor.resumen("a")
+    # 10 ETH por 0.5 BTC: la posición vale 0.5 BTC = 30.000 USDT y el saldo en BTC es -0.5
+    assert resumen["sin_conversion"] == []
+    assert resumen["efectivo"] == pytest.approx(10_000.0 - 6_000.0 - 0.5 * 60_000.0)
+    assert resumen["equity"] == pytest.approx(10_000.0)
+    eth = next(posicion for posicion in resumen["posiciones"] if posicion["simbolo"] == "ETHBTC")
+    assert eth["valor"] == pytest.approx(30_000.0)
+    assert eth["asignacion"] == pytest.approx(300.0)
+
+    # Una suba de ETHBTC se valúa en USDT al precio de BTCUSDT
+    afectadas = motor.actualizar_precios({"ETHBTC": 0.06})
+    assert afectadas == {"a"}
+    assert motor.resumen("a")["pnl_no_realizado"] == pytest.approx(10 * 0.01 * 60_000.0)
+
+    # Una suba de BTCUSDT cambia el equity de la cuenta aunque no tenga posiciones nuevas que marcar
+    otro = crear_motor()
+    otro.agregar(operacion("ETHBTC", "compra", 10, 0.05))
+    assert otro.actualizar_precios({"BTCUSDT": 50_000.0}) == {"a"}
+    # También cuando llegan más precios que símbolos con posiciones y se recorren las posiciones
+    assert otro.actualizar_precios({"BTCUSDT": 40_000.0, "ETHUSDT": 1.0, "XRPUSDT": 1.0}) == {"a"}
+    assert otro.tasa("BTC") == 40_000.0
+    assert otro.resumen("a")["equity"] == pytest.approx(10_000.0)
+
+
+def test_solo_marca_posiciones_del_simbolo():
+    motor = crear_motor()
+    motor.agregar(operacion("BTCUSDT", "compra", 1, 100.0, usuario="a"))
+    motor.agregar(operacion("ETHUSDT", "compra", 1, 10.0, usuario="b"))
+    assert motor.actualizar_precios({"ETHUSDT": 12.0}) == {"b"}
+    assert motor.resumen("a")["pnl_no_realizado"] == pytest.approx(0.0)
+    assert motor.resumen("b")["pnl_no_realizado"] == pytest.approx(2.0)
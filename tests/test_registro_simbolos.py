@@ -0,0 +1,72 @@
+"""Tests del registro de símbolos: unión con CoinGecko y separación de pares que /exchangeInfo no conoce."""
+
+import threading
+
+from api import registro_simbolos as modulo_registro
+from api.registro_simbolos import RegistroSimbolos
+
+FILAS = [
+    ("BTCUSDT", "BTC", "USDT", "TRADING", 0.01, 0.00001, 0.00001),
+    ("ETHBTC", "ETH", "BTC", "TRADING", 0.00001, 0.0001, 0.0001),
+    ("USDTBRL", "USDT", "BRL", "TRADING", 0.001, 0.1, 0.1),
+]
+
+
+def crear_registro(tmp_path):
+    registro = RegistroSimbolos(lambda: FILAS, ruta=str(tmp_path / "simbolos.json"))
+    registro.cargar()
+    return registro
+
+
+def test_monedas_con_el_mismo_simbolo(tmp_path):
+    registro = crear_registro(tmp_path)
+    registro.vincular_coingecko({
+        "bitcoin": {"simbolo": "BTC", "cap_mercado": 1e12},
+        "batcat": {"simbolo": "BTC", "cap_mercado": 1e6},
+        "ethereum": {"simbolo": "ETH", "cap_mercado": 4e11},
+    })
+    assert registro.obtener("BTCUSDT").id_coingecko == "bitcoin"
+    assert registro.par_coingecko("bitcoin", "USDT").simbolo == "BTCUSDT"
+    assert registro.par_coingecko("batcat", "USDT") is None
+    assert registro.par_coingecko("ethereum", "BTC").simbolo == "ETHBTC"
+
+
+def test_la_union_se_rehace_al_refrescar(tmp_path):
+    registro = crear_registro(tmp_path)
+    registro.vincular_coingecko({"bitcoin": {"simbolo": "BTC", "cap_mercado": 1e12}})
+    registro.refrescar()
+    assert registro.par_coingecko("bitcoin", "USDT") is None
+    registro.vincular_coingecko({"bitcoin": {"simbolo": "BTC", "cap_mercado": 1e12}})
+    assert registro.par_coingecko("bitcoin", "USDT").simbolo == "BTCUSDT"
+
+
+def test_separar(tmp_path):
+    registro = crear_registro(tmp_path)
+    assert registro.separar("USDTBRL") == ("USDT", "BRL")
+    # Fuera del registro se separa por los activos cotizados conocidos, sin inventar uno
+    assert registro.separar("NUEVOUSDT") == ("NUEVO", "USDT")
+    assert registro.separar("NUEVOXYZ") is None
+
+
+def test_cargar_no_descarga_dos_veces_mientras_se_indexa(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo_registro, "ESPERA_ENTRE_INTENTOS", 0)
+    descargas = []
+
+    def descargar():
+        descargas.append(1)
+        return FILAS
+
+    registro = RegistroSimbolos(descargar, ruta=str(tmp_path / "simbolos.json"))
+    indexar = registro._indexar
+
+    def indexar_con_otra_carga(filas, instante):
+        # Otro hilo pide el registro entre la descarga y el índice
+        if len(descargas) == 1:
+            hilo = threading.Thread(target=registro.cargar)
+            hilo.start()
+            hilo.join()
+        indexar(filas, instante)
+
+    registro._indexar = indexar_con_otra_carga
+    assert registro.cargar()
+    assert len(descargas) == 1
@@ -0,0 +1,88 @@
+"""Tests del stream de mercado contra el servidor local: precios, reconexión y resuscripción."""
+
+import threading
+import time
+
+import pytest
+
+import config
+from api import stream_mercado as modulo_stream
+from api.stream_mercado import StreamMercado
+from herramientas.servidor_stream_local import iniciar_servidor
+
+TICKERS = {"stream": "!miniTicker@arr", "data": [
+    {"s": "BTCUSDT", "c": "101", "o": "100", "q": "5000"},
+    {"s": "ETHBTC", "c": "0.05", "o": "0.05", "q": "10"},
+]}
+VELA = {"stream": "btcusdt@kline_1h", "data": {
+    "e": "kline", "k": {"s": "BTCUSDT", "o": "100", "c": "102", "t": 0, "x": False}}}
+
+
+class RegistroVacio:
+    def operables(self):
+        # Sin pares cargados el stream acepta los pares USDT por el sufijo
+        return None
+
+
+def esperar(condicion, timeout=5):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicion():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    monkeypatch.setattr(modulo_stream, "obtener_registro_simbolos", RegistroVacio)
+    monkeypatch.setattr(modulo_stream, "obtener_grabador", lambda: None)
+    monkeypatch.setattr(config, "ESPERA_BASE_REINTENTO", 0.01)
+    servidor = iniciar_servidor([(0.0, TICKERS), (0.0, VELA), (0.02, TICKERS)], puerto=0)
+    puerto = servidor.socket.getsockname()[1]
+
+    actualizados = []
+    instancia = StreamMercado(url_base=f"ws://127.0.0.1:{puerto}", al_actualizar=actualizados.append)
+    instancia.actualizados = actualizados
+    instancia.resincronizaciones = threading.Semaphore(0)
+    # La resincronización por REST iría a Binance: solo se cuenta
+    instancia._resincronizar = instancia.resincronizaciones.release
+    yield instancia
+    instancia.detener()
+    servidor.shutdown()
+
+
+def test_los_precios_se_actualizan(stream):
+    stream.iniciar()
+    assert stream.resincronizaciones.acquire(timeout=5)
+    assert esperar(lambda: stream.obtener_cotizacion("BTCUSDT").get("precio") == 101.0)
+    cotizacion = stream.obtener_cotizacion("BTCUSDT")
+    assert cotizacion["cambio_24h"] == 1.0
+    assert cotizacion["volumen_24h"] == 5000.0
+    # Sin suscripción no llegan velas, y los pares que no cotizan en USDT se ignoran
+    assert "cambio_1h" not in cotizacion
+    assert stream.obtener_cotizacion("ETHBTC") == {}
+    assert {"BTCUSDT"} in stream.actualizados
+
+
+def test_suscripcion_reconexion_y_resuscripcion(stream):
+    stream.iniciar()
+    assert stream.resincronizaciones.acquire(timeout=5)
+    assert esperar(lambda: stream.conectado and stream._conexion is not None)
+
+    stream.suscribir_velas(["BTCUSDT"])
+    assert esperar(lambda: "BTCUSDT" in stream.velas_1h)
+    assert stream.obtener_cotizacion("BTCUSDT")["cambio_1h"] == 2.0
+
+    # Un corte: el stream reconecta, resincroniza y vuelve a pedir las velas suscriptas
+    conexion = stream._conexion
+    conexion.close()
+    assert stream.resincronizaciones.acquire(timeout=5)
+    assert esperar(lambda: stream._conexion is not None and stream._conexion is not conexion)
+    with stream._lock:
+        stream.velas_1h.clear()
+    assert esperar(lambda: "BTCUSDT" in stream.velas_1h)
+    assert "btcusdt@kline_1h" in stream._url_streams()
+
+    stream.suscribir_velas([])
+    assert "btcusdt@kline_1h" not in stream._url_streams()
@@ -0,0 +1,56 @@
+"""Tests del parser por bloques de /ticker/24hr."""
+
+import json
+
+import numpy as np
+import pytest
+
+from api.ticker_24h import parsear_tickers
+
+TICKERS = [
+    {"symbol": "BTCUSDT", "openPrice": "100.0", "highPrice": "120.0", "lowPrice": "90.0",
+     "lastPrice": "110.0", "volume": "10.0", "quoteVolume": "1050.0"},
+    {"symbol": "ETHBTC", "openPrice": "0.05", "highPrice": "0.06", "lowPrice": "0.04",
+     "lastPrice": "0.055", "volume": "5.0", "quoteVolume": "0.25"},
+    {"symbol": "USDTBRL", "openPrice": "5.0", "highPrice": "5.1", "lowPrice": "4.9",
+     "lastPrice": "5.05", "volume": "1000.0", "quoteVolume": "5000.0"},
+    {"symbol": "ETHUSDT", "openPrice": "0", "highPrice": "0", "lowPrice": "0",
+     "lastPrice": "3000.0", "volume": "0", "quoteVolume": "0"},
+]
+CUERPO = json.dumps(TICKERS).encode()
+
+
+def partir(cuerpo, *cortes):
+    limites = (0, *cortes, len(cuerpo))
+    return [cuerpo[desde:hasta] for desde, hasta in zip(limites, limites[1:])]
+
+
+def test_un_solo_bloque():
+    simbolos, columnas = parsear_tickers([CUERPO])
+    assert simbolos == ["BTCUSDT", "ETHUSDT"]
+    assert columnas["precio"].tolist() == [110.0, 3000.0]
+    assert columnas["cambio_24h"].tolist() == [pytest.approx(10.0), 0.0]
+    # VWAP = volumen en USDT / volumen en la moneda; sin volumen, el último precio
+    assert columnas["vwap"].tolist() == [105.0, 3000.0]
+
+
+def test_corte_en_cualquier_byte():
+    esperado_simbolos, esperado = parsear_tickers([CUERPO])
+    for corte in range(1, len(CUERPO)):
+        simbolos, columnas = parsear_tickers(partir(CUERPO, corte, min(corte + 7, len(CUERPO))))
+        assert simbolos == esperado_simbolos, corte
+        for campo, valores in esperado.items():
+            np.testing.assert_array_equal(columnas[campo], valores)
+
+
+def test_bloques_de_un_byte_y_operables():
+    bloques = [CUERPO[i:i + 1] for i in range(len(CUERPO))]
+    simbolos, columnas = parsear_tickers(bloques, operables={"USDTBRL", "ETHBTC"})
+    assert simbolos == ["ETHBTC", "USDTBRL"]
+    assert columnas["precio"].tolist() == [0.055, 5.05]
+
+
+def test_respuesta_vacia():
+    simbolos, columnas = parsear_tickers(partir(b"[]", 1))
+    assert simbolos == []
+    assert len(columnas["precio"]) == 0